@@ -0,0 +1,108 @@
+"""Concurrency benchmark: sync Session vs AsyncSession inside async handlers.
+
+Simulates concurrent requests that each run one slow query
+(``SELECT pg_sleep(--query-seconds)``), the way the routes did before and
+after moving to ``AsyncSession``:
+
+  sync   ``SessionLocal`` (psycopg2) called from a coroutine, so each round
+         trip blocks the event loop and requests run one after another
+  async  ``AsyncSessionLocal`` (asyncpg); requests overlap up to the pool size
+
+Event-loop lag is the longest delay a 10ms ticker saw while the requests
+ran: it is what every other request on the worker waits on.
+
+Engines come from DATABASE_URL / ASYNC_DATABASE_URL. Without a Postgres
+server, point both at the same SQLite file (requires aiosqlite); pg_sleep is
+then registered as a SQLite function.
+
+Usage:
+    python -m app.bench_db_concurrency --requests 100 --concurrency 10
+    DATABASE_URL=sqlite:////tmp/bench.db ASYNC_DATABASE_URL=sqlite+aiosqlite:////tmp/bench.db \\
+        python -m app.bench_db_concurrency
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event, func, select
+
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def _register_sqlite_sleep():
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("pg_sleep", 1, time.sleep)
+
+    for target in (engine, async_engine.sync_engine):
+        if target.dialect.name == "sqlite":
+            event.listen(target, "connect", _connect)
+
+
+async def sync_request(seconds):
+    with SessionLocal() as db:
+        db.execute(select(func.pg_sleep(seconds)))
+
+
+async def async_request(seconds):
+    async with AsyncSessionLocal() as db:
+        await db.execute(select(func.pg_sleep(seconds)))
+
+
+async def run(name, request, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - started - 0.01)
+
+    async def _run():
+        async with semaphore:
+            started = time.perf_counter()
+            await request(args.query_seconds)
+            latencies.append(time.perf_counter() - started)
+
+    # Warm up the pool so connection setup is not measured
+    await asyncio.gather(*(request(0) for _ in range(min(args.concurrency, 5))))
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(_run() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+    print(
+        f"{name:<6} requests={args.requests:<5} wall={elapsed:7.2f}s "
+        f"throughput={args.requests / elapsed:8.1f}/s "
+        f"p50={statistics.median(latencies):6.3f}s p95={percentile(latencies, 95):6.3f}s "
+        f"loop_lag_max={lag:6.3f}s"
+    )
+
+
+async def main(args):
+    _register_sqlite_sleep()
+    print(f"sync engine:  {engine.url.render_as_string()}")
+    print(f"async engine: {async_engine.url.render_as_string()}")
+    await run("sync", sync_request, args)
+    await run("async", async_request, args)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    parser.add_argument("--query-seconds", type=float, default=0.05, help="Server time of each query")
+    asyncio.run(main(parser.parse_args()))
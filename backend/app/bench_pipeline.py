@@ -0,0 +1,114 @@
+"""Offline throughput benchmark for the LLM ingestion pipeline.
+
+Runs the validation, flashcard and quiz generation steps in-process against
+the fake LLM provider, so results are reproducible on a machine with no
+network. Cache, rate limiter and metrics are disabled unless asked for,
+so the numbers reflect the pipeline itself.
+
+Usage:
+    LLM_PROVIDER=fake python -m app.bench_pipeline --words 500 --concurrency 20 --mode batch
+
+Latency and error injection come from the FAKE_LLM_* settings in config.py.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from app.config import get_settings
+from app.globals import clients, configs
+from app.llm.batching import plan_quiz_batches
+from app.llm.client import structured_response
+from app.llm.providers import create_provider
+from app.llm.quizzes import generate_quizzes, generate_quizzes_for_batch
+from app.schemas.openai_schemas import FLASHCARD_SCHEMA, QUIZ_TYPE_SCHEMAS, VALIDATE_SCHEMA
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def run_stage(name, jobs, concurrency):
+    """Run coroutine factories with bounded concurrency and print timings."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def _run(job):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                return await job()
+            except Exception:
+                failures += 1
+                return None
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+    calls_before = clients["openai"].calls
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_run(job) for job in jobs))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<12} jobs={len(jobs):<5} wall={elapsed:7.2f}s "
+        f"throughput={len(jobs) / elapsed if elapsed else 0:8.1f}/s "
+        f"p50={statistics.median(latencies) if latencies else 0:6.3f}s p95={percentile(latencies, 95):6.3f}s "
+        f"llm_calls={clients['openai'].calls - calls_before} failures={failures}"
+    )
+    return [r for r in results if r is not None]
+
+
+async def main(args):
+    settings = get_settings()
+    settings.LLM_CACHE_ENABLED = args.cache
+    settings.LLM_RATE_LIMIT_ENABLED = args.rate_limit
+    settings.LLM_METRICS_ENABLED = args.metrics
+    settings.OPENAI_CONCURRENT_REQUESTS = args.concurrency
+    configs["app_config"] = settings
+    clients["openai"] = create_provider(settings)
+
+    words = [f"word{i}" for i in range(args.words)]
+    batches = [words[i:i + 10] for i in range(0, len(words), 10)]
+    quiz_types = list(QUIZ_TYPE_SCHEMAS)
+
+    await run_stage("validate", [
+        (lambda b=b: structured_response("Validate.", "\n".join(b), "valid_words", VALIDATE_SCHEMA)) for b in batches
+    ], args.concurrency)
+    cards = await run_stage("flashcards", [
+        (lambda b=b: structured_response("Define.", "\n".join(b), "flashcards", FLASHCARD_SCHEMA)) for b in batches
+    ], args.concurrency)
+    flashcards = [
+        {"flashcard_id": i, **card} for i, card in enumerate(c for result in cards for c in result["flashcards"])
+    ]
+
+    if args.mode == "batch":
+        quiz_batches = plan_quiz_batches(
+            flashcards,
+            len(quiz_types),
+            settings.QUIZ_BATCH_TOKEN_BUDGET,
+            settings.QUIZ_BATCH_MAX_FLASHCARDS,
+            settings.QUIZ_OUTPUT_TOKENS_PER_TYPE,
+        )
+        jobs = [lambda b=b: generate_quizzes_for_batch(b, quiz_types) for b in quiz_batches]
+    else:
+        settings.QUIZ_GENERATION_MODE = args.mode
+        jobs = [lambda fc=fc: generate_quizzes(fc, quiz_types) for fc in flashcards]
+    await run_stage("quizzes", jobs, args.concurrency)
+    await clients["openai"].close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent jobs and in-flight LLM requests")
+    parser.add_argument("--mode", choices=["per_type", "combined", "batch"], default="batch")
+    parser.add_argument("--cache", action="store_true", help="Enable the LLM cache (needs Redis or a cache dir)")
+    parser.add_argument("--rate-limit", action="store_true", help="Enable the Redis rate limiter")
+    parser.add_argument("--metrics", action="store_true", help="Record LLM call metrics in Redis")
+    asyncio.run(main(parser.parse_args()))
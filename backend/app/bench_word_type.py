@@ -0,0 +1,148 @@
+"""Benchmark and agreement report for the local word-type classifier.
+
+Compares ``app.services.word_type`` with reference labels and reports how
+many LLM word_type calls it would save (coverage), how often its confident
+answers agree with the reference, and which rules disagree.
+
+Reference labels come from, in order of preference:
+  --llm        ask the configured LLM provider (the labels the pipeline used before)
+  --input      a TSV file with "text<TAB>word|phrase" lines
+  (default)    the small hand-labelled sample below
+
+Usage:
+    python -m app.bench_word_type
+    python -m app.bench_word_type --input fronts.tsv --llm --concurrency 20
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict
+
+from app.services.word_type import classify_with_reason
+
+# Hand-labelled flashcard fronts covering the seeded languages
+SAMPLE = [
+    ("casa", "word"), ("la casa", "phrase"), ("perro", "word"), ("¿Cómo estás?", "phrase"),
+    ("buenos días", "phrase"), ("sacapuntas", "word"), ("me gusta leer", "phrase"), ("por favor", "phrase"),
+    ("maison", "word"), ("pomme de terre", "word"), ("je ne sais pas", "phrase"), ("l'eau", "word"),
+    ("aujourd'hui", "word"), ("s'il vous plaît", "phrase"), ("bonjour", "word"), ("château fort", "word"),
+    ("Haus", "word"), ("Guten Morgen!", "phrase"), ("Kühlschrank", "word"), ("ich bin müde", "phrase"),
+    ("das Auto", "phrase"), ("Entschuldigung", "word"), ("ice cream", "word"), ("mother-in-law", "word"),
+    ("break a leg", "phrase"), ("the early bird catches the worm", "phrase"), ("serendipity", "word"),
+    ("don't", "word"), ("look up", "phrase"), ("New York", "word"),
+    ("猫", "word"), ("图书馆", "word"), ("电脑", "word"), ("一石二鸟", "phrase"), ("我喜欢吃苹果", "phrase"),
+    ("你好", "word"), ("马马虎虎", "phrase"), ("谢谢你的帮助", "phrase"),
+    ("食べる", "word"), ("コンピューター", "word"), ("猫が好き", "phrase"), ("日本の首都", "phrase"),
+    ("ありがとう", "word"), ("お願いします", "phrase"), ("美しい", "word"), ("水", "word"),
+    ("học sinh", "word"), ("Tôi yêu bạn nhiều", "phrase"), ("xin chào", "phrase"), ("cảm ơn", "word"),
+    ("nước", "word"), ("bệnh viện", "word"), ("không có gì", "phrase"), ("ăn", "word"),
+    ("chúc mừng năm mới", "phrase"), ("đẹp", "word"),
+]
+
+
+def read_tsv(path):
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            text, _, label = line.rstrip("\n").partition("\t")
+            if text.strip():
+                entries.append((text.strip(), label.strip() or None))
+    return entries
+
+
+async def llm_labels(texts, concurrency):
+    """Label ``texts`` with the LLM word_type call, bypassing the heuristic."""
+    from app.config import get_settings
+    from app.globals import clients, configs
+    from app.llm.executor import bounded_semaphore
+    from app.llm.providers import create_provider
+    from app.llm.quizzes import detect_word_type
+
+    settings = get_settings()
+    settings.LLM_METRICS_ENABLED = False
+    configs["app_config"] = settings
+    clients["openai"] = create_provider(settings)
+    semaphore = bounded_semaphore(concurrency)
+
+    async def _label(text):
+        async with semaphore:
+            try:
+                return (await detect_word_type(text, "", heuristic=False))["type"]
+            except Exception:
+                return None
+
+    try:
+        return await asyncio.gather(*(_label(text) for text in texts))
+    finally:
+        await clients["openai"].close()
+
+
+def benchmark(texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classify_with_reason(text)
+    elapsed = time.perf_counter() - started
+    return len(texts) * repeat / elapsed if elapsed else 0.0
+
+
+def report(entries):
+    decided = agreed = labelled = 0
+    confusion = Counter()
+    by_rule = defaultdict(lambda: [0, 0])  # rule -> [decided with a label, agreed]
+    disagreements = []
+    for text, reference in entries:
+        predicted, rule = classify_with_reason(text)
+        if predicted is not None:
+            decided += 1
+        if reference is None:
+            continue
+        labelled += 1
+        confusion[(reference, predicted or "llm")] += 1
+        if predicted is not None:
+            by_rule[rule][0] += 1
+            if predicted == reference:
+                agreed += 1
+                by_rule[rule][1] += 1
+            else:
+                disagreements.append((text, reference, predicted, rule))
+
+    print(f"entries:    {len(entries)}")
+    print(f"coverage:   {decided / len(entries):.1%} decided locally ({len(entries) - decided} still need the LLM)")
+    if not labelled:
+        return
+    decided_labelled = sum(count for count, _ in by_rule.values())
+    if decided_labelled:
+        print(f"agreement:  {agreed / decided_labelled:.1%} of {decided_labelled} local decisions match the reference")
+    print("confusion (reference -> local):")
+    for reference in ("word", "phrase"):
+        row = "  ".join(f"{predicted}={confusion[(reference, predicted)]}" for predicted in ("word", "phrase", "llm"))
+        print(f"  {reference:<7} {row}")
+    print("by rule:")
+    for rule, (count, ok) in sorted(by_rule.items(), key=lambda item: -item[1][0]):
+        print(f"  {rule:<24} decided={count:<5} agreement={ok / count:.1%}")
+    if disagreements:
+        print("disagreements:")
+        for text, reference, predicted, rule in disagreements:
+            print(f"  {text!r}: reference={reference} local={predicted} ({rule})")
+
+
+def main(args):
+    entries = read_tsv(args.input) if args.input else list(SAMPLE)
+    if args.llm:
+        labels = asyncio.run(llm_labels([text for text, _ in entries], args.concurrency))
+        entries = [(text, label) for (text, _), label in zip(entries, labels)]
+
+    report(entries)
+    rate = benchmark([text for text, _ in entries], args.repeat)
+    print(f"throughput: {rate:,.0f} classifications/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="TSV file: text<TAB>word|phrase (label optional)")
+    parser.add_argument("--llm", action="store_true", help="Use LLM labels as the reference")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent LLM requests with --llm")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the entries for the throughput figure")
+    main(parser.parse_args())
@@ -1,18 +1,28 @@
 import os
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Optional
 import asyncio
+import httpx
 from celery import Celery
-from openai import AsyncOpenAI
+from kombu import Queue
+from celery.signals import worker_process_shutdown, worker_shutdown
+from loguru import logger
+from openai import DefaultAsyncHttpxClient
 from app.config import get_settings
+from app.database import SessionLocal
 from app.globals import clients, configs
+from app.llm.client import structured_response
+from app.llm.executor import shared_semaphore
+from app.llm.instrumentation import get_metrics, with_call_context
+from app.llm.providers import create_provider
+from app.llm.runtime import AsyncRuntime
+from app.llm.quizzes import generate_quizzes, generate_quizzes_for_batch, needs_word_info
+from app.services.bulk_quizzes import advance_bulk_job, job_chunks, start_bulk_job, start_stage_two
+from app.services.distractors import get_corpus
+from app.services.import_jobs import record_progress
+from app.services.quiz_store import save_generated_quizzes
 from app.schemas.openai_schemas import (
     VALIDATE_SCHEMA,
     FLASHCARD_SCHEMA,
-    WORD_TYPE_SCHEMA,
-    WORD_RELATIONS_SCHEMA,
-    RELATED_PHRASES_SCHEMA,
-    QUIZ_TYPE_SCHEMAS,
 )
 
 settings = get_settings()
@@ -23,190 +33,210 @@ celery = Celery('tasks')
 celery.conf.broker_url = os.environ.get("CELERY_BROKER_URL", "redis://redis:6379")
 celery.conf.result_backend = os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379")
 
-# Initialize OpenAI client in the global clients dictionary
-clients["openai"] = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Request-blocking work and background import work use separate queues so
+# that a large import backlog never delays validate/generate-flashcards.
+# Run dedicated workers per queue: `-Q interactive` and `-Q bulk`.
+INTERACTIVE_QUEUE = "interactive"
+BULK_QUEUE = "bulk"
+celery.conf.task_queues = (Queue(INTERACTIVE_QUEUE), Queue(BULK_QUEUE))
+celery.conf.task_default_queue = BULK_QUEUE
+celery.conf.task_routes = {
+    "app.celery_app.validate_words_batch": {"queue": INTERACTIVE_QUEUE},
+    "app.celery_app.generate_flashcards_batch": {"queue": INTERACTIVE_QUEUE},
+    "app.celery_app.generate_quizzes_batch": {"queue": BULK_QUEUE},
+    "app.celery_app.generate_quizzes_for_flashcards": {"queue": BULK_QUEUE},
+    "app.celery_app.start_bulk_quiz_generation": {"queue": BULK_QUEUE},
+    "app.celery_app.poll_bulk_quiz_generation": {"queue": BULK_QUEUE},
+}
+# Workers take one message at a time so queued work is never stuck behind a busy process
+celery.conf.worker_prefetch_multiplier = 1
+celery.conf.task_acks_late = True
+
+# Initialize the LLM provider in the global clients dictionary. With the
+# persistent loop every task in the process shares its connection pool.
+clients["openai"] = create_provider(
+    settings,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        )
+    ),
+)
+
+runtime = AsyncRuntime(settings.WORKER_ASYNC_CONCURRENCY)
+
+
+def run_async(coro):
+    """Run a task's coroutine on the persistent loop, or in a fresh loop when disabled."""
+    if settings.CELERY_ASYNC_LOOP:
+        return runtime.run(coro)
+    return asyncio.run(coro)
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def _close_runtime(**kwargs):
+    runtime.stop(clients["openai"].close)
 
 @celery.task
 def validate_words_batch(words: List[str], language: str) -> List[str]:
     """Validate a batch of words using LLM."""
     async def _validate():
-        response = await clients["openai"].responses.create(
-            model=settings.OPENAI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": "You are a word validation assistant. Filter out any invalid entries that are not words or meaningful phrases.",
-                },
-                {"role": "user", "content": "\n".join(words)},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "valid_words",
-                    "schema": VALIDATE_SCHEMA,
-                    "strict": True,
-                }
-            },
-        )
-        result = json.loads(response.output[0].content[0].text)
+        async with shared_semaphore():
+            result = await structured_response(
+                "You are a word validation assistant. Filter out any invalid entries that are not words or meaningful phrases.",
+                "\n".join(words),
+                "valid_words",
+                VALIDATE_SCHEMA,
+            )
         return result["valid_words"]
 
-    return asyncio.run(_validate())
+    return run_async(with_call_context(_validate(), "validate_words_batch"))
 
 @celery.task
 def generate_flashcards_batch(words: List[str], language: str) -> List[Dict[str, str]]:
     """Generate flashcards for a batch of words using LLM."""
     async def _generate():
-        response = await clients["openai"].responses.create(
-            model=settings.OPENAI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": f"You are a language translation assistant. Generate clear and accurate definitions in English for these {language} words/phrases.",
-                },
-                {"role": "user", "content": "\n".join(words)},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "flashcards",
-                    "schema": FLASHCARD_SCHEMA,
-                    "strict": True,
-                }
-            },
-        )
-        result = json.loads(response.output[0].content[0].text)
+        async with shared_semaphore():
+            result = await structured_response(
+                f"You are a language translation assistant. Generate clear and accurate definitions in English for these {language} words/phrases.",
+                "\n".join(words),
+                "flashcards",
+                FLASHCARD_SCHEMA,
+            )
         return result["flashcards"]
 
-    return asyncio.run(_generate())
+    return run_async(with_call_context(_generate(), "generate_flashcards_batch"))
 
 @celery.task
 def generate_quizzes_batch(flashcard: Dict[str, str], quiz_types: List[str]) -> List[Dict[str, Any]]:
     """Generate quizzes for a flashcard."""
-    async def _detect_word_type(word: str, meaning: str) -> Dict:
-        response = await clients["openai"].responses.create(
-            model=settings.OPENAI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": "You are a language analysis assistant. Determine if the given text is a single word or a phrase.",
-                },
-                {"role": "user", "content": f"Text: {word}\nMeaning: {meaning}"},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "word_type",
-                    "schema": WORD_TYPE_SCHEMA,
-                    "strict": True,
-                }
-            },
-        )
-        return json.loads(response.output[0].content[0].text)
-
-    async def _get_word_relations(word: str, meaning: str) -> Dict:
-        response = await clients["openai"].responses.create(
-            model=settings.OPENAI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": "You are a language assistant. Generate synonyms and antonyms for the given word.",
-                },
-                {"role": "user", "content": f"Word: {word}\nMeaning: {meaning}"},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "word_relations",
-                    "schema": WORD_RELATIONS_SCHEMA,
-                    "strict": True,
-                }
-            },
-        )
-        return json.loads(response.output[0].content[0].text)
-
-    async def _get_related_phrases(word: str, meaning: str) -> Dict:
-        response = await clients["openai"].responses.create(
-            model=settings.OPENAI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": "You are a language assistant. Generate phrases or proverbs that share meaning with the given word.",
-                },
-                {"role": "user", "content": f"Word: {word}\nMeaning: {meaning}"},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "related_phrases",
-                    "schema": RELATED_PHRASES_SCHEMA,
-                    "strict": True,
-                }
-            },
-        )
-        return json.loads(response.output[0].content[0].text)
-
-    async def _generate_quiz(quiz_type: str, word: str, meaning: str, word_info: Dict = None) -> Dict:
-        schema = QUIZ_TYPE_SCHEMAS[quiz_type]
-        system_prompt = "You are a quiz generation assistant. Generate a quiz based on the given word and its meaning."
-        
-        if quiz_type in ["Synonym Selection (Multiple-Choice)", "Antonym Selection (Multiple-Choice)"]:
-            if not word_info or "synonyms" not in word_info or "antonyms" not in word_info:
-                return None
-            additional_context = f"\nSynonyms: {', '.join(word_info['synonyms'])}\nAntonyms: {', '.join(word_info['antonyms'])}"
-        elif quiz_type in ["Word to Proverb (Multiple-Choice)", "Proverb to Word (Multiple-Choice)", "Proverb to Word (Cloze)"]:
-            if not word_info or "phrases" not in word_info:
-                return None
-            additional_context = f"\nRelated Phrases: {json.dumps(word_info['phrases'])}"
-        else:
-            additional_context = ""
-
-        response = await clients["openai"].responses.create(
-            model=settings.OPENAI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {"role": "user", "content": f"Word: {word}\nMeaning: {meaning}{additional_context}\nQuiz Type: {quiz_type}"},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "quiz",
-                    "schema": schema,
-                    "strict": True,
-                }
-            },
-        )
-        return json.loads(response.output[0].content[0].text)
-
-    async def _process():
-        word, meaning = flashcard["front"], flashcard["back"]
-        quizzes = []
-
-        # 1. Detect if word or phrase
-        word_type_info = await _detect_word_type(word, meaning)
-        
-        # Initialize word_info for quiz generation
-        word_info = {}
-        
-        # 2. If it's a word, get synonyms, antonyms and phrases
-        if word_type_info["type"] == "word":
-            relations = await _get_word_relations(word, meaning)
-            word_info.update(relations)
-            phrases = await _get_related_phrases(word, meaning)
-            word_info.update(phrases)
-
-        # 3. Generate quizzes for each type
-        for quiz_type in quiz_types:
-            quiz_content = await _generate_quiz(quiz_type, word, meaning, word_info)
-            if quiz_content:
-                quizzes.append({
-                    "type": quiz_type,
-                    "content": quiz_content
-                })
-
-        return quizzes
-
-    return asyncio.run(_process())
\ No newline at end of file
+    return run_async(with_call_context(generate_quizzes(flashcard, quiz_types), "generate_quizzes_batch", priority="bulk"))
+
+
+@celery.task(ignore_result=True)
+def generate_quizzes_for_flashcards(
+    flashcards: List[Dict[str, Any]],
+    quiz_types: List[str],
+    import_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    language_id: Optional[int] = None,
+) -> Dict[str, int]:
+    """Generate and store quizzes for several flashcards with grouped LLM requests.
+
+    Each flashcard is a dict with flashcard_id, front and back. Quizzes are
+    written to the database in bulk as soon as the batch is done, and the
+    progress counters of ``import_id`` are updated, so nothing depends on a
+    client polling for the result. LLM usage is added to the import's
+    metrics summary. Distractors for multiple-choice types come from the
+    user's and public flashcards of the language where possible.
+    """
+    flashcard_ids = [flashcard["flashcard_id"] for flashcard in flashcards]
+    try:
+        corpus = get_corpus(user_id, language_id)
+        results = run_async(with_call_context(
+            generate_quizzes_for_batch(flashcards, quiz_types, corpus),
+            "generate_quizzes_for_flashcards", import_id, "bulk",
+        ))
+        with SessionLocal() as db:
+            saved = save_generated_quizzes(db, results, user_id, language_id)
+            db.commit()
+    except Exception:
+        if import_id:
+            record_progress(import_id, failed_ids=flashcard_ids)
+        raise
+    if import_id:
+        record_progress(import_id, completed_ids=flashcard_ids, quizzes=saved)
+    return {"flashcards": len(flashcards), "quizzes": saved}
+
+
+@celery.task(ignore_result=True)
+def start_bulk_quiz_generation(
+    flashcards: List[Dict[str, Any]],
+    quiz_types: List[str],
+    import_id: str,
+    user_id: int,
+    language_id: int,
+) -> None:
+    """Submit the quiz prompts of a large import as a batch file (see services/bulk_quizzes.py)."""
+    try:
+        start_bulk_job(import_id, flashcards, quiz_types, user_id, language_id)
+    except Exception:
+        record_progress(import_id, failed_ids=[flashcard["flashcard_id"] for flashcard in flashcards])
+        raise
+    poll_bulk_quiz_generation.apply_async((import_id,), countdown=settings.LLM_BATCH_POLL_SECONDS)
+
+
+@celery.task(ignore_result=True)
+def poll_bulk_quiz_generation(import_id: str) -> None:
+    """Advance a bulk import's batch job, store finished quizzes and reschedule itself."""
+    try:
+        step = advance_bulk_job(import_id)
+    except FileNotFoundError:
+        logger.error("Bulk import {}: job files are missing from LLM_BATCH_DIR", import_id)
+        return
+    except Exception:
+        logger.exception("Bulk import {}: checking the batch failed, retrying later", import_id)
+        poll_bulk_quiz_generation.apply_async((import_id,), countdown=settings.LLM_BATCH_POLL_SECONDS)
+        return
+
+    state = step["state"]
+    if step["status"] == "failed":
+        logger.error("Bulk import {}: {}", import_id, step.get("error"))
+        if state["stage"] == 1:
+            record_progress(import_id, failed_ids=state["flashcard_ids"])
+            return
+        # Stage 1 quizzes are saved; only the context types are missing, so
+        # they are generated in real time and those tasks report the progress
+        context_types = [qt for qt in state["quiz_types"] if needs_word_info(qt)]
+        for chunk in job_chunks(import_id):
+            generate_quizzes_for_flashcards.delay(
+                flashcards=chunk,
+                quiz_types=context_types,
+                import_id=import_id,
+                user_id=state["user_id"],
+                language_id=state["language_id"],
+            )
+        return
+
+    saved = 0
+    if step["results"]:
+        try:
+            with SessionLocal() as db:
+                saved = save_generated_quizzes(db, step["results"], state["user_id"], state["language_id"])
+                db.commit()
+        except Exception:
+            # The job has not moved on, so the next poll replays these results
+            logger.exception("Bulk import {}: saving quizzes failed, retrying later", import_id)
+            poll_bulk_quiz_generation.apply_async((import_id,), countdown=settings.LLM_BATCH_POLL_SECONDS)
+            return
+
+    usage = step["usage"]
+    if settings.LLM_METRICS_ENABLED and usage.total_tokens:
+        cost = settings.LLM_BATCH_PRICE_FACTOR * (
+            usage.input_tokens * settings.LLM_PRICE_INPUT_PER_1M + usage.output_tokens * settings.LLM_PRICE_OUTPUT_PER_1M
+        ) / 1_000_000
+        get_metrics().add_to_summary(import_id, {
+            "batch_input_tokens": usage.input_tokens,
+            "batch_output_tokens": usage.output_tokens,
+            "batch_failed_requests": step["failed_requests"],
+            "cost_usd": cost,
+        })
+        get_metrics().inc("llm_cost_usd_total", cost, {"task": "bulk_batch", "schema": "batch", "label": "batch"})
+
+    if step["status"] == "done":
+        record_progress(import_id, completed_ids=state["flashcard_ids"], quizzes=saved)
+        return
+    if saved:
+        record_progress(import_id, quizzes=saved)
+    countdown = settings.LLM_BATCH_POLL_SECONDS
+    if step["status"] == "stage_done":
+        # Only now that stage 1 is committed; a failure here replays stage 1
+        # on the next poll (saving skips quizzes that already exist)
+        try:
+            start_stage_two(import_id, step)
+            countdown = 0
+        except Exception:
+            logger.exception("Bulk import {}: submitting stage 2 failed, retrying later", import_id)
+    poll_bulk_quiz_generation.apply_async((import_id,), countdown=countdown)
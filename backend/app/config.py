@@ -6,11 +6,116 @@ class ModelConfig:
         env = Env()
         env.read_env()
         
+        # LLM provider: "openai", or "fake" for offline load testing
+        self.LLM_PROVIDER = env.str("LLM_PROVIDER", "openai")
+        self.LLM_MAX_RETRIES = env.int("LLM_MAX_RETRIES", 3)  # Retries on 429s and transient errors
+
+        # Fake provider behaviour (LLM_PROVIDER=fake)
+        self.FAKE_LLM_LATENCY = env.str("FAKE_LLM_LATENCY", "lognormal")  # fixed, uniform or lognormal
+        self.FAKE_LLM_LATENCY_MS = env.float("FAKE_LLM_LATENCY_MS", 800.0)  # Mean (uniform) or median (lognormal)
+        self.FAKE_LLM_LATENCY_JITTER = env.float("FAKE_LLM_LATENCY_JITTER", 0.5)  # ± ms (uniform) or sigma (lognormal)
+        self.FAKE_LLM_ERROR_RATE = env.float("FAKE_LLM_ERROR_RATE", 0.0)
+        self.FAKE_LLM_RATE_LIMIT_RATE = env.float("FAKE_LLM_RATE_LIMIT_RATE", 0.0)
+        self.FAKE_LLM_SEED = env.int("FAKE_LLM_SEED", 0)
+
         # OpenAI Configuration
-        self.OPENAI_API_KEY = env.str("OPENAI_API_KEY")
+        self.OPENAI_API_KEY = env.str("OPENAI_API_KEY", "")  # Not needed with the fake provider
         self.OPENAI_MODEL = env.str("OPENAI_MODEL", "gpt-4o-mini")  # Default to gpt-4o-mini
         self.OPENAI_CONCURRENT_REQUESTS = env.int("OPENAI_CONCURRENT_REQUESTS", 5)  # Default to 5 concurrent requests
 
+        # Cluster-wide OpenAI rate limits shared by the API and the workers
+        self.LLM_RATE_LIMIT_ENABLED = env.bool("LLM_RATE_LIMIT_ENABLED", True)
+        self.LLM_RATE_LIMIT_REDIS_URL = env.str("LLM_RATE_LIMIT_REDIS_URL", "redis://redis:6379/1")
+        self.OPENAI_RPM_LIMIT = env.int("OPENAI_RPM_LIMIT", 500)  # Requests per minute
+        self.OPENAI_TPM_LIMIT = env.int("OPENAI_TPM_LIMIT", 200_000)  # Tokens per minute
+        self.LLM_OUTPUT_TOKENS_ESTIMATE = env.int("LLM_OUTPUT_TOKENS_ESTIMATE", 1_000)  # Reserved per request until usage is known
+        self.LLM_BULK_BUDGET_FRACTION = env.float("LLM_BULK_BUDGET_FRACTION", 0.8)  # Rest is kept for interactive calls
+
+        # LLM call metrics (histograms in Redis, exported on /metrics)
+        self.LLM_METRICS_ENABLED = env.bool("LLM_METRICS_ENABLED", True)
+        self.METRICS_REDIS_URL = env.str("METRICS_REDIS_URL", "redis://redis:6379/1")
+        self.LLM_PRICE_INPUT_PER_1M = env.float("LLM_PRICE_INPUT_PER_1M", 0.15)  # USD, gpt-4o-mini pricing
+        self.LLM_PRICE_OUTPUT_PER_1M = env.float("LLM_PRICE_OUTPUT_PER_1M", 0.60)
+
+        # Celery workers: run LLM tasks on one persistent event loop per process
+        # (use with --pool threads) instead of asyncio.run per task
+        self.CELERY_ASYNC_LOOP = env.bool("CELERY_ASYNC_LOOP", True)
+        self.WORKER_ASYNC_CONCURRENCY = env.int("WORKER_ASYNC_CONCURRENCY", 32)  # Tasks running at once per process
+        self.LLM_HTTP_MAX_CONNECTIONS = env.int("LLM_HTTP_MAX_CONNECTIONS", 50)  # Shared OpenAI connection pool size
+
+        # Quiz generation: "combined" asks for all quiz types of a flashcard in one
+        # request, "per_type" sends one request per quiz type
+        self.QUIZ_GENERATION_MODE = env.str("QUIZ_GENERATION_MODE", "combined")
+        # Multi-flashcard quiz batches are packed up to this estimated prompt + output size
+        self.QUIZ_BATCH_TOKEN_BUDGET = env.int("QUIZ_BATCH_TOKEN_BUDGET", 12_000)
+        self.QUIZ_BATCH_MAX_FLASHCARDS = env.int("QUIZ_BATCH_MAX_FLASHCARDS", 20)
+        self.QUIZ_OUTPUT_TOKENS_PER_TYPE = env.int("QUIZ_OUTPUT_TOKENS_PER_TYPE", 120)  # Rough size of one generated quiz
+        self.WORD_TYPE_HEURISTIC_ENABLED = env.bool("WORD_TYPE_HEURISTIC_ENABLED", True)  # Skip the word_type LLM call when rules are confident
+
+        # Multiple-choice distractors drawn from the language's existing flashcards
+        self.DISTRACTORS_ENABLED = env.bool("DISTRACTORS_ENABLED", True)
+        self.DISTRACTOR_CORPUS_SIZE = env.int("DISTRACTOR_CORPUS_SIZE", 5_000)  # Latest flashcards per language
+        self.DISTRACTOR_CORPUS_TTL_SECONDS = env.int("DISTRACTOR_CORPUS_TTL_SECONDS", 300)
+        self.DISTRACTOR_MIN_CORPUS = env.int("DISTRACTOR_MIN_CORPUS", 20)  # Below this the LLM writes the choices
+
+        # Near-duplicate detection of flashcard fronts (shingle-set similarity, 0-1)
+        self.NEAR_DUPLICATE_THRESHOLD = env.float("NEAR_DUPLICATE_THRESHOLD", 0.7)
+        self.NEAR_DUPLICATE_MAX_INDEXES = env.int("NEAR_DUPLICATE_MAX_INDEXES", 256)  # Per process, least recently used evicted
+
+        # Imports with at least this many flashcards generate quizzes through batch
+        # files (LLM_BATCH_BACKEND "openai" or "local"); 0 disables the automatic switch
+        self.QUIZ_BULK_MODE_MIN_FLASHCARDS = env.int("QUIZ_BULK_MODE_MIN_FLASHCARDS", 2_000)
+        self.LLM_BATCH_BACKEND = env.str("LLM_BATCH_BACKEND", "openai")
+        self.LLM_BATCH_DIR = env.str("LLM_BATCH_DIR", "/tmp/khoailang_batches")  # Must be shared by all workers
+        self.LLM_BATCH_POLL_SECONDS = env.int("LLM_BATCH_POLL_SECONDS", 60)
+        self.LLM_BATCH_PRICE_FACTOR = env.float("LLM_BATCH_PRICE_FACTOR", 0.5)  # Batch price relative to real-time
+
+        # Import jobs and their progress, written by the API and the workers
+        self.IMPORT_JOBS_REDIS_URL = env.str("IMPORT_JOBS_REDIS_URL", "redis://redis:6379/1")
+        self.IMPORT_JOB_TTL_SECONDS = env.int("IMPORT_JOB_TTL_SECONDS", 7 * 24 * 3600)  # Since the last update
+
+        # Validate / generate-flashcards jobs
+        self.WORD_JOB_POLL_SECONDS = env.float("WORD_JOB_POLL_SECONDS", 0.5)  # Result backend polling interval
+        self.WORD_JOB_TIMEOUT_SECONDS = env.int("WORD_JOB_TIMEOUT_SECONDS", 300)
+
+        # Streaming uploads (/api/words/upload)
+        self.UPLOAD_CHUNK_BYTES = env.int("UPLOAD_CHUNK_BYTES", 256 * 1024)
+        self.UPLOAD_BATCH_SIZE = env.int("UPLOAD_BATCH_SIZE", 1_000)  # Records per validation job / import insert
+        self.UPLOAD_DEDUP_CAPACITY = env.int("UPLOAD_DEDUP_CAPACITY", 2_000_000)  # ~3.6 MB Bloom filter at 0.1%
+        self.UPLOAD_DEDUP_FP_RATE = env.float("UPLOAD_DEDUP_FP_RATE", 0.001)
+
+        # Database connection pools, per process. The API's async engine and the
+        # sync engine (Celery workers, scripts, streaming exports) are sized separately.
+        self.DB_POOL_SIZE = env.int("DB_POOL_SIZE", 5)  # Async engine (API routes)
+        self.DB_MAX_OVERFLOW = env.int("DB_MAX_OVERFLOW", 10)
+        self.DB_SYNC_POOL_SIZE = env.int("DB_SYNC_POOL_SIZE", 5)  # Sync engine
+        self.DB_SYNC_MAX_OVERFLOW = env.int("DB_SYNC_MAX_OVERFLOW", 10)
+        self.DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", 30.0)  # Seconds to wait for a connection before failing
+        self.DB_POOL_RECYCLE = env.int("DB_POOL_RECYCLE", 1800)  # Replace connections older than this (seconds, -1 = never)
+        self.DB_POOL_PRE_PING = env.bool("DB_POOL_PRE_PING", True)  # Test connections on checkout
+        self.DB_PGBOUNCER = env.bool("DB_PGBOUNCER", False)  # Behind a transaction-mode pooler: no prepared statement caches
+        self.DB_POOL_METRICS_INTERVAL_SECONDS = env.int("DB_POOL_METRICS_INTERVAL_SECONDS", 15)  # 0 disables
+
+        # Streaming exports (catalogs and collections)
+        self.EXPORT_YIELD_PER = env.int("EXPORT_YIELD_PER", 1_000)  # Rows fetched per server-side cursor round trip
+        self.EXPORT_CHUNK_BYTES = env.int("EXPORT_CHUNK_BYTES", 64 * 1024)
+
+        # Keyset pagination of list endpoints
+        self.PAGE_SIZE_DEFAULT = env.int("PAGE_SIZE_DEFAULT", 100)  # Items per page without ?limit=
+        self.PAGE_SIZE_MAX = env.int("PAGE_SIZE_MAX", 500)  # Larger ?limit= values are capped to this
+
+        # LLM response cache
+        self.LLM_CACHE_ENABLED = env.bool("LLM_CACHE_ENABLED", True)
+        self.LLM_CACHE_REDIS_URL = env.str("LLM_CACHE_REDIS_URL", "redis://redis:6379/1")
+        self.LLM_CACHE_DIR = env.str("LLM_CACHE_DIR", "/tmp/khoailang_llm_cache")  # Local fallback when Redis is down
+        self.LLM_CACHE_TTL_SECONDS = env.int("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)  # Default to one week
+        self.LLM_CACHE_MAX_ENTRIES = env.int("LLM_CACHE_MAX_ENTRIES", 100_000)  # LRU eviction above this size
+
+        # Local wordlists checked before word validation is sent to the LLM
+        self.WORDLIST_PREFILTER_ENABLED = env.bool("WORDLIST_PREFILTER_ENABLED", True)
+        self.WORDLIST_DIR = env.str("WORDLIST_DIR", "/app/wordlists")  # <language>.txt, one word per line
+        self.WORDLIST_BLOOM_FP_RATE = env.float("WORDLIST_BLOOM_FP_RATE", 0.001)
+
 @lru_cache()
 def get_settings() -> ModelConfig:
-    return ModelConfig()
\ No newline at end of file
+    return ModelConfig()
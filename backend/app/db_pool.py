@@ -0,0 +1,206 @@
+"""
+File        : db_pool.py
+Description : Instrumented connection pools for the sync and async engines
+
+Both engines use a QueuePool subclass that measures, per process:
+
+  db_pool_wait_seconds         time for ``connect()`` to hand out a connection
+                               (queue wait, opening overflow connections, pre-ping)
+  db_connection_hold_seconds   checkout -> checkin time of each connection
+  db_pool_timeouts_total       checkouts that gave up after DB_POOL_TIMEOUT
+
+Observations are aggregated in memory and flushed to the Redis metrics
+registry every DB_POOL_METRICS_INTERVAL_SECONDS by a daemon thread, together
+with the pool gauges (size, checked out, idle, overflow, waiting) published
+through ``MetricsRegistry.set_gauges``. Flushing never happens on a request
+path, so an unreachable Redis does not slow queries down.
+
+``instrument(engine)`` must be called on both engines. The thread starts
+with the first connection a process opens, so API
+processes, Celery worker processes (after fork) and scripts are covered
+without extra wiring; nothing is published until ``configs["app_config"]``
+is set.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from loguru import logger
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.globals import configs
+from app.metrics import DB_HOLD_BUCKETS, DB_WAIT_BUCKETS
+
+
+class _Histogram:
+    """Cumulative bucket counts since the last flush."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.total += value
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None  # Current pool instance (engines recreate it on dispose)
+        self.waiting = 0
+        self.timeouts = 0
+        self.wait = _Histogram(DB_WAIT_BUCKETS)
+        self.hold = _Histogram(DB_HOLD_BUCKETS)
+        self.lock = threading.Lock()
+
+    def gauges(self) -> Dict[str, float]:
+        pool = self.pool
+        if pool is None:
+            return {}
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "waiting": self.waiting,
+        }
+
+
+# One engine of each kind per process: "sync" (psycopg2) and "async" (asyncpg)
+stats: Dict[str, PoolStats] = {"sync": PoolStats("sync"), "async": PoolStats("async")}
+
+
+class _InstrumentedMixin:
+    pool_name = ""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        stats[self.pool_name].pool = self
+
+    def connect(self):
+        pool_stats = stats[self.pool_name]
+        with pool_stats.lock:
+            pool_stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with pool_stats.lock:
+                pool_stats.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with pool_stats.lock:
+                pool_stats.waiting -= 1
+                pool_stats.wait.observe(elapsed)
+
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    pool_name = "sync"
+
+
+class InstrumentedAsyncPool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    pool_name = "async"
+
+
+def instrument(engine: Engine) -> None:
+    """Record hold times of ``engine``'s connections (the engine keeps its listeners when the pool is recreated)."""
+    pool_stats = stats[engine.pool.pool_name]
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        start_publisher()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            with pool_stats.lock:
+                pool_stats.hold.observe(time.perf_counter() - checked_out_at)
+
+
+def publish() -> None:
+    """Flush this process's pool observations and gauges to the metrics registry."""
+    from app.llm.instrumentation import get_metrics
+
+    metrics = get_metrics()
+    for pool_stats in stats.values():
+        if pool_stats.pool is None:
+            continue
+        with pool_stats.lock:
+            histograms: List[Tuple[str, Dict[float, int], int, float]] = [
+                (name, dict(zip(histogram.buckets, histogram.counts)), histogram.count, histogram.total)
+                for name, histogram in (
+                    ("db_pool_wait_seconds", pool_stats.wait),
+                    ("db_connection_hold_seconds", pool_stats.hold),
+                )
+                if histogram.count
+            ]
+            pool_stats.wait.reset()
+            pool_stats.hold.reset()
+            timeouts, pool_stats.timeouts = pool_stats.timeouts, 0
+        labels = {"pool": pool_stats.name}
+        for name, bucket_counts, count, total in histograms:
+            metrics.add_histogram(name, bucket_counts, count, total, labels)
+        if timeouts:
+            metrics.inc("db_pool_timeouts_total", timeouts, labels)
+        metrics.set_gauges(
+            f"db_pool_{pool_stats.name}",
+            pool_stats.gauges(),
+            ttl_seconds=max(60, 4 * configs["app_config"].DB_POOL_METRICS_INTERVAL_SECONDS),
+        )
+
+
+_publisher_pid = None
+_publisher_lock = threading.Lock()
+
+
+def _publish_forever(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        if "app_config" not in configs:
+            continue
+        try:
+            publish()
+        except Exception as e:
+            logger.warning("Database pool metrics not published: {}", e)
+
+
+def start_publisher() -> None:
+    """Start the flush thread of this process (once per pid, so forked workers get their own)."""
+    global _publisher_pid
+    if _publisher_pid == os.getpid():
+        return
+    with _publisher_lock:
+        if _publisher_pid == os.getpid():
+            return
+        _publisher_pid = os.getpid()
+        # A forked child inherits the parent's counts (they were the parent's to
+        # publish) and possibly a lock held by one of its threads
+        for pool_stats in stats.values():
+            pool_stats.lock = threading.Lock()
+            pool_stats.wait.reset()
+            pool_stats.hold.reset()
+            pool_stats.timeouts = 0
+        from app.config import get_settings
+
+        interval = get_settings().DB_POOL_METRICS_INTERVAL_SECONDS
+        if interval > 0:
+            threading.Thread(target=_publish_forever, args=(interval,), name="db-pool-metrics", daemon=True).start()
@@ -0,0 +1,130 @@
+"""
+File        : dependencies/pagination.py
+Description : Keyset pagination for list endpoints
+
+List endpoints return one page at a time, ordered by primary key. Instead of
+OFFSET (which reads and discards every earlier row), each page continues
+after the last id of the previous one, so fetching any page costs the same
+index range scan however much data there is.
+
+  GET /api/flashcards/all?limit=100
+      -> body: the page, as before
+         X-Next-Cursor: <token>         absent on the last page
+  GET /api/flashcards/all?limit=100&cursor=<token>
+  GET /api/flashcards/all?include_total=true
+      -> X-Total-Estimate: 51230        planner estimate on PostgreSQL
+
+Cursor tokens are opaque to clients (base64 of the endpoint scope and the
+last id); a token from another endpoint, or a mangled one, is rejected with
+400. The page size defaults to ``PAGE_SIZE_DEFAULT`` and is capped at
+``PAGE_SIZE_MAX``.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_ESTIMATE_HEADER = "X-Total-Estimate"
+PAGE_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER]
+
+
+def encode_cursor(scope: str, last_id: int) -> str:
+    payload = json.dumps([scope, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(scope: str, cursor: str) -> int:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_scope, last_id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        cursor_scope, last_id = None, None
+    if cursor_scope != scope or not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return last_id
+
+
+@dataclass
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+    include_total: bool
+
+    def after(self, scope: str) -> Optional[int]:
+        """Last id of the previous page, or None for the first page."""
+        return decode_cursor(scope, self.cursor) if self.cursor else None
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    include_total: bool = Query(False, description=f"Send an estimated total in {TOTAL_ESTIMATE_HEADER}"),
+) -> PageParams:
+    settings = get_settings()
+    return PageParams(
+        cursor=cursor,
+        limit=min(limit or settings.PAGE_SIZE_DEFAULT, settings.PAGE_SIZE_MAX),
+        include_total=include_total,
+    )
+
+
+async def estimate_count(db: AsyncSession, stmt) -> int:
+    """Rows ``stmt`` would return: the planner's estimate on PostgreSQL, an exact count elsewhere."""
+    dialect = db.bind.dialect
+    if dialect.name != "postgresql":
+        return await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    sql = stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    conn = await db.connection()
+    plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def paginate(
+    db: AsyncSession,
+    response: Response,
+    page: PageParams,
+    scope: str,
+    stmt,
+    key,
+    *,
+    descending: bool = False,
+    total_of=None,
+    scalars: bool = True,
+) -> list:
+    """
+    One page of ``stmt`` ordered by ``key`` (a unique column, usually the
+    primary key), setting the next-cursor and total headers on ``response``.
+
+    ``total_of`` is the statement to estimate the total from, when ``stmt``
+    itself is already narrowed to the page (see ``catalog_access``).
+    ``scalars=False`` returns rows instead of ORM objects.
+    """
+    if page.include_total:
+        counted = total_of if total_of is not None else stmt.with_only_columns(key).order_by(None)
+        response.headers[TOTAL_ESTIMATE_HEADER] = str(await estimate_count(db, counted))
+
+    after = page.after(scope)
+    if after is not None:
+        stmt = stmt.where(key < after if descending else key > after)
+    # One extra row tells whether there is a next page
+    stmt = stmt.order_by(None).order_by(key.desc() if descending else key).limit(page.limit + 1)
+    rows = (await (db.scalars(stmt) if scalars else db.execute(stmt))).all()
+
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(scope, getattr(rows[-1], key.key))
+    return rows
@@ -10,12 +10,15 @@ Usage:
 
 The script will:
 1. Create all database tables based on SQLAlchemy models
-2. Initialize reference data (quiz types, languages)
-3. Add sample data if specified
+2. Apply schema migrations (alembic upgrade head) for tables that already existed
+3. Initialize reference data (quiz types, languages)
+4. Add sample data if specified
 """
 
 import os
 
+from alembic import command
+from alembic.config import Config
 from app.database import Base, engine
 from app.dependencies.auth import get_password_hash
 from app.models.catalog import Catalog, CatalogFlashcard
@@ -167,10 +170,12 @@ def init_db() -> None:
 
     This function will:
     1. Create all database tables
-    2. Initialize reference data (quiz types, languages)
-    3. Add sample data for development
+    2. Bring existing tables up to date (migrations are no-ops on new tables)
+    3. Initialize reference data (quiz types, languages)
+    4. Add sample data for development
     """
     Base.metadata.create_all(bind=engine)
+    command.upgrade(Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")), "head")
 
     with Session(engine) as session:
         create_quiz_types(session)
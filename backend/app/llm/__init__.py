@@ -0,0 +1,4 @@
+"""
+File        : llm/__init__.py
+Description : Shared plumbing for LLM calls made by the API and the Celery workers
+"""
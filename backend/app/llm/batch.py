@@ -0,0 +1,212 @@
+"""
+File        : llm/batch.py
+Description : JSONL batch request files and pluggable batch backends
+
+Bulk imports do not need answers within seconds. Their prompts are written
+to a JSONL file in the OpenAI Batch API format (one Responses API request
+per line, keyed by ``custom_id``), submitted in one go, and the output file
+is parsed once the batch finishes. Batches are billed at a discount and do
+not count against the real-time rate limits.
+
+``OpenAIBatchBackend`` uses the OpenAI Files and Batches APIs.
+``LocalBatchBackend`` is an offline stand-in: it answers every request
+with ``FakeProvider`` and writes an output file in the same format.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from openai import OpenAI
+
+from app.llm.providers import FakeProvider, LLMUsage
+
+# Terminal batch states; anything else means "still running"
+FINISHED_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BatchRequest:
+    custom_id: str
+    system_prompt: str
+    user_prompt: str
+    schema_name: str
+    schema: Dict[str, Any]
+
+
+@dataclass
+class BatchResult:
+    custom_id: str
+    data: Optional[Dict[str, Any]]
+    usage: LLMUsage
+    error: Optional[str] = None
+
+
+def _request_body(request: BatchRequest, model: str) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "input": [
+            {"role": "system", "content": request.system_prompt},
+            {"role": "user", "content": request.user_prompt},
+        ],
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": request.schema_name,
+                "schema": request.schema,
+                "strict": True,
+            }
+        },
+    }
+
+
+def write_batch_file(path: str, requests: Iterable[BatchRequest], model: str) -> int:
+    """Write ``requests`` as a Batch API input file and return how many were written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            line = {
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": _request_body(request, model),
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _output_text(body: Dict[str, Any]) -> str:
+    for item in body.get("output", []):
+        for content in item.get("content") or []:
+            if content.get("type") == "output_text":
+                return content["text"]
+    raise ValueError("response has no output_text")
+
+
+def read_batch_results(path: str) -> Iterator[BatchResult]:
+    """Parse a Batch API output (or error) file line by line."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            custom_id = entry["custom_id"]
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code", 200) != 200:
+                error = entry.get("error") or response.get("body", {}).get("error")
+                yield BatchResult(custom_id, None, LLMUsage(), str(error))
+                continue
+            body = response["body"]
+            usage = body.get("usage") or {}
+            usage = LLMUsage(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+            try:
+                yield BatchResult(custom_id, json.loads(_output_text(body)), usage)
+            except (ValueError, KeyError) as e:
+                yield BatchResult(custom_id, None, usage, f"Unparseable output: {e}")
+
+
+class BatchBackend(ABC):
+    """Where batch files are submitted and results collected."""
+
+    @abstractmethod
+    def submit(self, input_path: str) -> str:
+        """Submit a batch input file and return the backend's batch id."""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Current state: one of FINISHED_STATES, or a backend-specific running state."""
+
+    @abstractmethod
+    def download(self, batch_id: str, output_path: str) -> None:
+        """Write the results of a finished batch, failed requests included, to ``output_path``."""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    def __init__(self, api_key: str):
+        self.client = OpenAI(api_key=api_key)
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id, endpoint="/v1/responses", completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, output_path: str) -> None:
+        batch = self.client.batches.retrieve(batch_id)
+        with open(output_path, "wb") as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    f.write(self.client.files.content(file_id).read())
+
+
+class LocalBatchBackend(BatchBackend):
+    """Offline backend: batches are answered by FakeProvider on the first status check."""
+
+    def __init__(self, directory: str, seed: int = 0):
+        self.directory = directory
+        self.seed = seed
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.directory, batch_id, name)
+
+    def submit(self, input_path: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex}"
+        os.makedirs(os.path.join(self.directory, batch_id), exist_ok=True)
+        shutil.copyfile(input_path, self._path(batch_id, "input.jsonl"))
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if not os.path.exists(self._path(batch_id, "input.jsonl")):
+            return "failed"
+        if not os.path.exists(self._path(batch_id, "output.jsonl")):
+            asyncio.run(self._process(batch_id))
+        return "completed"
+
+    async def _process(self, batch_id: str) -> None:
+        provider = FakeProvider(seed=self.seed)
+        lines: List[str] = []
+        with open(self._path(batch_id, "input.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                request = json.loads(line)
+                body = request["body"]
+                text_format = body["text"]["format"]
+                result = await provider.structured(
+                    body["model"], body["input"], text_format["name"], text_format["schema"]
+                )
+                response_body = {
+                    "status": "completed",
+                    "output": [{"type": "message", "content": [
+                        {"type": "output_text", "text": json.dumps(result.data, ensure_ascii=False)}
+                    ]}],
+                    "usage": {"input_tokens": result.usage.input_tokens, "output_tokens": result.usage.output_tokens},
+                }
+                lines.append(json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": response_body},
+                    "error": None,
+                }, ensure_ascii=False))
+        tmp_path = self._path(batch_id, "output.jsonl.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self._path(batch_id, "output.jsonl"))
+
+    def download(self, batch_id: str, output_path: str) -> None:
+        shutil.copyfile(self._path(batch_id, "output.jsonl"), output_path)
+
+
+def create_batch_backend(settings) -> BatchBackend:
+    """Build the backend selected by LLM_BATCH_BACKEND ("openai" or "local")."""
+    if settings.LLM_BATCH_BACKEND == "local":
+        return LocalBatchBackend(os.path.join(settings.LLM_BATCH_DIR, "local_backend"), seed=settings.FAKE_LLM_SEED)
+    return OpenAIBatchBackend(settings.OPENAI_API_KEY)
@@ -0,0 +1,41 @@
+"""
+File        : llm/batching.py
+Description : Pack flashcards into multi-flashcard LLM batches from a token budget
+"""
+
+from typing import Dict, List
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for packing."""
+    return len(text) // 4 + 1
+
+
+def estimate_flashcard_tokens(flashcard: Dict, quiz_type_count: int, output_tokens_per_type: int) -> int:
+    """Estimated prompt + completion tokens one flashcard adds to a quiz batch."""
+    prompt = estimate_tokens(flashcard["front"]) + estimate_tokens(flashcard.get("back") or "") + 10
+    return prompt + quiz_type_count * output_tokens_per_type
+
+
+def plan_quiz_batches(
+    flashcards: List[Dict],
+    quiz_type_count: int,
+    token_budget: int,
+    max_flashcards: int,
+    output_tokens_per_type: int,
+) -> List[List[Dict]]:
+    """Greedily split flashcards into batches that fit the token budget.
+
+    A flashcard that exceeds the budget on its own still gets a batch of one.
+    """
+    batches, current, current_tokens = [], [], 0
+    for flashcard in flashcards:
+        tokens = estimate_flashcard_tokens(flashcard, quiz_type_count, output_tokens_per_type)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_flashcards):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(flashcard)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
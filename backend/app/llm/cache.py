@@ -0,0 +1,219 @@
+"""
+File        : llm/cache.py
+Description : Content-addressed cache for structured LLM responses
+
+Responses are keyed by a hash of (model, messages, schema name, schema body),
+so identical requests coming from different users share one entry. Redis is
+the primary backend; when it cannot be reached, entries go to a local SQLite
+file so a worker keeps its cache across tasks. Both backends apply a TTL and
+evict the least recently used entries once ``max_entries`` is exceeded.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+from loguru import logger
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], schema_name: str, schema: Dict[str, Any]) -> str:
+    """Return a stable hash for a structured LLM request."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "schema_name": schema_name, "schema": schema},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RedisCacheBackend:
+    """Redis backend. A sorted set of access times drives LRU eviction."""
+
+    PREFIX = "llm_cache:"
+    LRU_KEY = "llm_cache:lru"
+    STATS_KEY = "llm_cache:stats"
+
+    def __init__(self, url: str, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def ping(self) -> bool:
+        try:
+            return bool(self.client.ping())
+        except redis.RedisError:
+            return False
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.PREFIX + key)
+        if value is None:
+            self.client.zrem(self.LRU_KEY, key)
+            return None
+        self.client.zadd(self.LRU_KEY, {key: time.time()})
+        return value.decode("utf-8")
+
+    def set(self, key: str, value: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.PREFIX + key, value, ex=self.ttl_seconds)
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.zcard(self.LRU_KEY)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            evicted = self.client.zpopmin(self.LRU_KEY, size - self.max_entries)
+            if evicted:
+                self.client.delete(*(self.PREFIX + k.decode("utf-8") for k, _ in evicted))
+
+    def incr_stat(self, name: str) -> None:
+        self.client.hincrby(self.STATS_KEY, name, 1)
+
+    def stats(self) -> Dict[str, int]:
+        raw = self.client.hgetall(self.STATS_KEY)
+        stats = {k.decode("utf-8"): int(v) for k, v in raw.items()}
+        stats["entries"] = self.client.zcard(self.LRU_KEY)
+        return stats
+
+
+class DiskCacheBackend:
+    """SQLite backend used when Redis is unavailable. Safe across prefork workers."""
+
+    def __init__(self, directory: str, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "llm_cache.sqlite3")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (and per process, since the pid is part of the key)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + self.ttl_seconds, now),
+        )
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        (size,) = conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if size > self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (size - self.max_entries,),
+            )
+
+    def incr_stat(self, name: str) -> None:
+        self._connect().execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        stats = {name: value for name, value in conn.execute("SELECT name, value FROM stats")}
+        stats["entries"] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return stats
+
+
+class LLMCache:
+    """Cache facade choosing Redis when reachable and falling back to disk."""
+
+    REDIS_RECHECK_SECONDS = 30.0
+
+    def __init__(self, settings):
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self.hits = 0
+        self.misses = 0
+        self._redis = RedisCacheBackend(
+            settings.LLM_CACHE_REDIS_URL, settings.LLM_CACHE_TTL_SECONDS, settings.LLM_CACHE_MAX_ENTRIES
+        )
+        self._disk_args = (settings.LLM_CACHE_DIR, settings.LLM_CACHE_TTL_SECONDS, settings.LLM_CACHE_MAX_ENTRIES)
+        self._disk = None
+        self._redis_checked_at = 0.0
+        self._redis_ok = False
+
+    def _backend(self):
+        # Re-check Redis health at most every REDIS_RECHECK_SECONDS
+        now = time.monotonic()
+        if now - self._redis_checked_at > self.REDIS_RECHECK_SECONDS:
+            self._redis_ok = self._redis.ping()
+            self._redis_checked_at = now
+        if self._redis_ok:
+            return self._redis
+        if self._disk is None:
+            logger.warning("LLM cache: Redis unreachable, falling back to {}", self._disk_args[0])
+            self._disk = DiskCacheBackend(*self._disk_args)
+        return self._disk
+
+    def _get_sync(self, key: str) -> Optional[Any]:
+        backend = self._backend()
+        value = backend.get(key)
+        backend.incr_stat("misses" if value is None else "hits")
+        return None if value is None else json.loads(value)
+
+    def _set_sync(self, key: str, value: Any) -> None:
+        self._backend().set(key, json.dumps(value, ensure_ascii=False))
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            value = await asyncio.to_thread(self._get_sync, key)
+        except (redis.RedisError, sqlite3.Error) as e:
+            logger.warning("LLM cache lookup failed: {}", e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._set_sync, key, value)
+        except (redis.RedisError, sqlite3.Error) as e:
+            logger.warning("LLM cache store failed: {}", e)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process plus the shared backend totals."""
+        stats = {"process_hits": self.hits, "process_misses": self.misses}
+        try:
+            stats.update(self._backend().stats())
+        except (redis.RedisError, sqlite3.Error) as e:
+            logger.warning("LLM cache stats unavailable: {}", e)
+        return stats
@@ -0,0 +1,105 @@
+"""
+File        : llm/client.py
+Description : Single entry point for structured (JSON schema) LLM calls
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional
+
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from app.globals import clients, configs
+from app.llm.batching import estimate_tokens
+from app.llm.cache import LLMCache, cache_key
+from app.llm.instrumentation import CallRecord, current_priority, record_call
+from app.llm.providers import ProviderError
+from app.llm.rate_limit import RateLimiter
+
+
+def get_cache() -> LLMCache:
+    """Return the process-wide LLM cache, creating it on first use."""
+    if "llm_cache" not in clients:
+        clients["llm_cache"] = LLMCache(configs["app_config"])
+    return clients["llm_cache"]
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    if "llm_rate_limiter" not in clients:
+        clients["llm_rate_limiter"] = RateLimiter(configs["app_config"])
+    return clients["llm_rate_limiter"]
+
+
+async def structured_response(
+    system_prompt: str,
+    user_prompt: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+    model: Optional[str] = None,
+    label: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Send a strict JSON-schema request and return the parsed JSON output.
+
+    Identical requests (same model, messages and schema) are answered from
+    the LLM cache instead of hitting OpenAI again. Requests that do go out
+    first reserve their estimated tokens from the cluster-wide rate limiter,
+    and 429s or transient provider errors are retried with backoff.
+
+    Each call is recorded by llm.instrumentation under ``schema_name`` and
+    ``label`` (e.g. the quiz type; defaults to the schema name).
+    """
+    app_config = configs["app_config"]
+    model = model or app_config.OPENAI_MODEL
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    cache = get_cache()
+    key = cache_key(model, messages, schema_name, schema)
+    record = CallRecord(schema=schema_name, label=label or schema_name, outcome="ok")
+    cached = await cache.get(key)
+    if cached is not None:
+        record.outcome = "cache_hit"
+        await record_call(record)
+        return cached
+
+    limiter = get_rate_limiter()
+    estimated_tokens = (
+        estimate_tokens(system_prompt + user_prompt + json.dumps(schema)) + app_config.LLM_OUTPUT_TOKENS_ESTIMATE
+    )
+    started = time.perf_counter()
+    try:
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type(ProviderError),
+            stop=stop_after_attempt(app_config.LLM_MAX_RETRIES + 1),
+            wait=wait_random_exponential(multiplier=0.5, max=20),
+            reraise=True,
+        ):
+            with attempt:
+                record.retries = attempt.retry_state.attempt_number - 1
+                # Every attempt, retries included, goes through the rate limiter
+                reservation = await limiter.acquire(estimated_tokens, current_priority.get())
+                record.queue_wait_seconds += reservation.wait_seconds
+                try:
+                    response = await clients["openai"].structured(model, messages, schema_name, schema)
+                except BaseException:
+                    # Failed or cancelled requests do not count against the token budget
+                    await limiter.reconcile(reservation, 0)
+                    raise
+                await limiter.reconcile(reservation, response.usage.total_tokens or reservation.tokens)
+    except BaseException:
+        # Includes cancellation (e.g. DependencyExecutor cancelling sibling nodes);
+        # ``response`` is only bound once the provider call has returned
+        record.outcome = "error"
+        raise
+    finally:
+        record.wall_seconds = time.perf_counter() - started
+        if record.outcome == "ok":
+            record.input_tokens = response.usage.input_tokens
+            record.output_tokens = response.usage.output_tokens
+        await record_call(record)
+
+    result = response.data
+    await cache.set(key, result)
+    return result
@@ -0,0 +1,76 @@
+"""
+File        : llm/executor.py
+Description : Dependency-aware concurrent executor for LLM call graphs
+"""
+
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from app.globals import configs
+
+NodeFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class DependencyExecutor:
+    """Run async nodes as soon as their dependencies have resolved.
+
+    Each node receives a dict holding the results of the nodes it depends on.
+    Bounded nodes (the ones that actually call the LLM) hold the shared
+    semaphore while they run, so the total number of in-flight requests never
+    exceeds its size. If any node raises, the remaining nodes are cancelled
+    and the exception propagates from ``run``.
+    """
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self._nodes: Dict[str, tuple] = {}
+
+    def add(self, name: str, func: NodeFunc, after: Iterable[str] = (), bounded: bool = True) -> None:
+        after = tuple(after)
+        missing = [dep for dep in after if dep not in self._nodes]
+        if missing:
+            raise ValueError(f"Node '{name}' depends on unknown nodes: {missing}")
+        self._nodes[name] = (func, after, bounded)
+
+    async def _run_node(self, name: str, tasks: Dict[str, asyncio.Task]) -> Any:
+        func, after, bounded = self._nodes[name]
+        inputs = {dep: await tasks[dep] for dep in after}
+        if not bounded:
+            return await func(inputs)
+        async with self.semaphore:
+            return await func(inputs)
+
+    async def run(self) -> Dict[str, Any]:
+        tasks: Dict[str, asyncio.Task] = {}
+        for name in self._nodes:
+            tasks[name] = asyncio.create_task(self._run_node(name, tasks))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+
+def bounded_semaphore(limit: Optional[int]) -> asyncio.Semaphore:
+    """Semaphore sized from OPENAI_CONCURRENT_REQUESTS (at least one slot)."""
+    return asyncio.Semaphore(max(1, limit or 1))
+
+
+_shared_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def shared_semaphore() -> asyncio.Semaphore:
+    """Semaphore shared by every LLM call running on the current event loop.
+
+    With the persistent worker loop this caps in-flight requests per process
+    rather than per task.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _shared_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _shared_semaphores[loop] = bounded_semaphore(configs["app_config"].OPENAI_CONCURRENT_REQUESTS)
+    return semaphore
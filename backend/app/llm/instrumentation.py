@@ -0,0 +1,105 @@
+"""
+File        : llm/instrumentation.py
+Description : Per-call LLM metrics (latency, queue wait, tokens, retries, cost)
+
+Every structured_response call reports one CallRecord. Records are labelled
+with the Celery task and schema (plus the quiz type where there is one) and
+go into the shared metrics registry; calls made on behalf of an import are
+also added to that import's summary.
+"""
+
+import asyncio
+import contextvars
+from dataclasses import dataclass
+from typing import Any, Awaitable, Optional
+
+from app.globals import clients, configs
+from app.metrics import MetricsRegistry
+
+current_task = contextvars.ContextVar("llm_current_task", default="api")
+current_import = contextvars.ContextVar("llm_current_import", default=None)
+current_priority = contextvars.ContextVar("llm_current_priority", default="interactive")
+
+
+async def with_call_context(
+    coro: Awaitable[Any], task: str, import_id: Optional[str] = None, priority: str = "interactive"
+) -> Any:
+    """Await ``coro`` with its LLM calls attributed to ``task`` and ``import_id``.
+
+    ``priority`` ("interactive" or "bulk") decides how much of the shared
+    rate-limit budget the calls may use. The variables are set inside the
+    coroutine, so they also apply when it runs on the worker's persistent
+    loop in another thread.
+    """
+    current_task.set(task)
+    current_import.set(import_id)
+    current_priority.set(priority)
+    return await coro
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry, creating it on first use."""
+    if "metrics" not in clients:
+        clients["metrics"] = MetricsRegistry(configs["app_config"].METRICS_REDIS_URL)
+    return clients["metrics"]
+
+
+@dataclass
+class CallRecord:
+    schema: str
+    label: str
+    outcome: str  # ok, error or cache_hit
+    wall_seconds: float = 0.0
+    queue_wait_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+
+    def cost_usd(self) -> float:
+        app_config = configs["app_config"]
+        return (
+            self.input_tokens * app_config.LLM_PRICE_INPUT_PER_1M + self.output_tokens * app_config.LLM_PRICE_OUTPUT_PER_1M
+        ) / 1_000_000
+
+
+def _record_sync(record: CallRecord, task: str, import_id: Optional[str]) -> None:
+    metrics = get_metrics()
+    labels = {"task": task, "schema": record.schema, "label": record.label}
+    metrics.inc("llm_calls_total", 1, {**labels, "outcome": record.outcome})
+    if record.outcome != "cache_hit":
+        metrics.observe("llm_request_seconds", record.wall_seconds, labels)
+        metrics.observe("llm_queue_wait_seconds", record.queue_wait_seconds, labels)
+        metrics.observe("llm_retries", record.retries, labels)
+    if record.outcome == "ok":
+        metrics.observe("llm_input_tokens", record.input_tokens, labels)
+        metrics.observe("llm_output_tokens", record.output_tokens, labels)
+        metrics.inc("llm_cost_usd_total", record.cost_usd(), labels)
+
+    if import_id:
+        prefix = f"{record.schema}:{record.label}:" if record.label != record.schema else f"{record.schema}:"
+        values = {
+            "calls": 1,
+            f"{prefix}calls": 1,
+            f"{record.outcome}_calls": 1,
+        }
+        if record.outcome != "cache_hit":
+            values.update({
+                "llm_seconds": record.wall_seconds,
+                f"{prefix}llm_seconds": record.wall_seconds,
+                "queue_wait_seconds": record.queue_wait_seconds,
+                "retries": record.retries,
+            })
+        if record.outcome == "ok":
+            values.update({
+                "input_tokens": record.input_tokens,
+                "output_tokens": record.output_tokens,
+                "cost_usd": record.cost_usd(),
+                f"{prefix}cost_usd": record.cost_usd(),
+            })
+        metrics.add_to_summary(import_id, values)
+
+
+async def record_call(record: CallRecord) -> None:
+    if not configs["app_config"].LLM_METRICS_ENABLED:
+        return
+    await asyncio.to_thread(_record_sync, record, current_task.get(), current_import.get())
@@ -0,0 +1,208 @@
+"""
+File        : llm/providers.py
+Description : Pluggable LLM providers behind clients["openai"]
+
+``OpenAIProvider`` talks to the OpenAI Responses API. ``FakeProvider`` runs
+fully offline: it returns deterministic, schema-valid output for every
+schema in openai_schemas.py, with configurable latency and injected errors,
+so the ingestion pipeline can be load tested without network or cost.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import openai
+from openai import AsyncOpenAI
+
+
+class ProviderError(Exception):
+    """Base class for provider failures the client may retry."""
+
+
+class ProviderRateLimitError(ProviderError):
+    """The provider answered 429."""
+
+
+class ProviderTransientError(ProviderError):
+    """Timeouts, connection resets and 5xx answers."""
+
+
+@dataclass
+class LLMUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+@dataclass
+class LLMResult:
+    data: Dict[str, Any]
+    usage: LLMUsage
+
+
+class LLMProvider(ABC):
+    """Interface every LLM backend implements."""
+
+    @abstractmethod
+    async def structured(
+        self, model: str, messages: List[Dict[str, str]], schema_name: str, schema: Dict[str, Any]
+    ) -> LLMResult:
+        """Return the parsed JSON output of a strict JSON-schema request."""
+
+    async def close(self) -> None:
+        pass
+
+
+class OpenAIProvider(LLMProvider):
+    def __init__(self, api_key: str, http_client=None):
+        # Retries are handled by llm.client so each attempt goes through the rate limiter
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+    async def structured(self, model, messages, schema_name, schema) -> LLMResult:
+        try:
+            response = await self.client.responses.create(
+                model=model,
+                input=messages,
+                text={
+                    "format": {
+                        "type": "json_schema",
+                        "name": schema_name,
+                        "schema": schema,
+                        "strict": True,
+                    }
+                },
+            )
+        except openai.RateLimitError as e:
+            raise ProviderRateLimitError(str(e)) from e
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            raise ProviderTransientError(str(e)) from e
+        usage = LLMUsage()
+        if response.usage:
+            usage = LLMUsage(response.usage.input_tokens, response.usage.output_tokens)
+        return LLMResult(json.loads(response.output[0].content[0].text), usage)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+_ENTRY_RE = re.compile(r"^\[(\d+)\]\s*Word:\s*(.*?)\s*\|")
+
+
+class FakeProvider(LLMProvider):
+    """Offline provider producing deterministic schema-valid responses.
+
+    Output depends only on the request, so repeated runs are reproducible.
+    Latency and failures are drawn from a separately seeded generator:
+    ``latency`` is "fixed", "uniform" (mean ± jitter) or "lognormal"
+    (median ``latency_ms``, sigma ``jitter``); ``error_rate`` and
+    ``rate_limit_rate`` are per-call probabilities of a transient error or
+    a 429.
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed",
+        latency_ms: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _latency_seconds(self) -> float:
+        if self.latency == "uniform":
+            value = self._rng.uniform(self.latency_ms - self.jitter, self.latency_ms + self.jitter)
+        elif self.latency == "lognormal":
+            value = self._rng.lognormvariate(0.0, self.jitter) * self.latency_ms
+        else:
+            value = self.latency_ms
+        return max(0.0, value) / 1000.0
+
+    async def structured(self, model, messages, schema_name, schema) -> LLMResult:
+        self.calls += 1
+        await asyncio.sleep(self._latency_seconds())
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise ProviderRateLimitError("Injected 429 from FakeProvider")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise ProviderTransientError("Injected error from FakeProvider")
+
+        prompt = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+        rng = random.Random(hashlib.sha256(f"{schema_name}:{prompt}".encode("utf-8")).hexdigest())
+        user_lines = [line for line in messages[-1]["content"].splitlines() if line.strip()]
+        data = self._respond(schema_name, schema, user_lines, rng)
+        output = json.dumps(data, ensure_ascii=False)
+        return LLMResult(data, LLMUsage(input_tokens=len(prompt) // 4 + 1, output_tokens=len(output) // 4 + 1))
+
+    def _respond(self, schema_name: str, schema: Dict, user_lines: List[str], rng: random.Random) -> Dict:
+        if schema_name == "valid_words":
+            return {"valid_words": user_lines}
+        if schema_name == "flashcards":
+            return {"flashcards": [{"front": line, "back": f"meaning of {line}"} for line in user_lines]}
+
+        data = fake_instance(schema, rng)
+        entries = [m for m in (_ENTRY_RE.match(line) for line in user_lines) if m]
+        if entries and "items" in schema.get("properties", {}):
+            # Batch schemas: one item per numbered entry in the prompt
+            item_schema = schema["properties"]["items"]["items"]
+            data["items"] = []
+            for match in entries:
+                item = fake_instance(item_schema, rng)
+                item["index"] = int(match.group(1))
+                data["items"].append(item)
+        return data
+
+
+def fake_instance(schema: Dict[str, Any], rng: random.Random) -> Any:
+    """Generate a value satisfying one of our structured-output schemas.
+
+    Objects holding ``choices`` and a string ``correct_answer`` get an answer
+    taken from the choices, so generated quizzes pass the pipeline checks.
+    """
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type")
+    if kind == "object":
+        value = {key: fake_instance(sub, rng) for key, sub in schema.get("properties", {}).items()}
+        if isinstance(value.get("choices"), list) and isinstance(value.get("correct_answer"), str):
+            value["correct_answer"] = rng.choice(value["choices"])
+        return value
+    if kind == "array":
+        return [fake_instance(schema.get("items", {"type": "string"}), rng) for _ in range(rng.randint(2, 4))]
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if kind == "number":
+        return round(rng.uniform(0, 100), 2)
+    return f"fake-{rng.randrange(16 ** 6):06x}"
+
+
+def create_provider(settings, http_client=None) -> LLMProvider:
+    """Build the provider selected by LLM_PROVIDER ("openai" or "fake")."""
+    if settings.LLM_PROVIDER == "fake":
+        return FakeProvider(
+            latency=settings.FAKE_LLM_LATENCY,
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            jitter=settings.FAKE_LLM_LATENCY_JITTER,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            seed=settings.FAKE_LLM_SEED,
+        )
+    return OpenAIProvider(settings.OPENAI_API_KEY, http_client=http_client)
@@ -0,0 +1,427 @@
+"""
+File        : llm/quizzes.py
+Description : Quiz generation pipeline for a single flashcard
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.globals import configs
+from app.llm.client import structured_response
+from app.llm.executor import DependencyExecutor, shared_semaphore
+from app.llm.schema_check import matches_schema
+from app.services.distractors import DistractorCorpus, build_local_quiz, local_quiz_types
+from app.services.word_type import classify_word_type
+from app.schemas.openai_schemas import (
+    WORD_TYPE_SCHEMA,
+    WORD_RELATIONS_SCHEMA,
+    RELATED_PHRASES_SCHEMA,
+    WORD_ANALYSIS_BATCH_SCHEMA,
+    QUIZ_TYPE_SCHEMAS,
+    build_batch_quiz_schema,
+    build_combined_quiz_schema,
+    quiz_schema_key,
+)
+
+# Quiz types that need extra context gathered for single words
+RELATION_QUIZ_TYPES = ["Synonym Selection (Multiple-Choice)", "Antonym Selection (Multiple-Choice)"]
+PROVERB_QUIZ_TYPES = ["Word to Proverb (Multiple-Choice)", "Proverb to Word (Multiple-Choice)", "Proverb to Word (Cloze)"]
+
+
+def needs_word_info(quiz_type: str) -> bool:
+    return quiz_type in RELATION_QUIZ_TYPES or quiz_type in PROVERB_QUIZ_TYPES
+
+
+def local_word_type(word: str) -> Optional[str]:
+    """Heuristic word type, or None when uncertain or WORD_TYPE_HEURISTIC_ENABLED is off."""
+    if not configs["app_config"].WORD_TYPE_HEURISTIC_ENABLED:
+        return None
+    return classify_word_type(word)
+
+
+async def detect_word_type(word: str, meaning: str, heuristic: bool = True) -> Dict:
+    """Word type of ``word``; the LLM is only asked when the local rules are unsure."""
+    known = local_word_type(word) if heuristic else None
+    if known:
+        return {"type": known}
+    return await structured_response(
+        "You are a language analysis assistant. Determine if the given text is a single word or a phrase.",
+        f"Text: {word}\nMeaning: {meaning}",
+        "word_type",
+        WORD_TYPE_SCHEMA,
+    )
+
+
+async def get_word_relations(word: str, meaning: str) -> Dict:
+    return await structured_response(
+        "You are a language assistant. Generate synonyms and antonyms for the given word.",
+        f"Word: {word}\nMeaning: {meaning}",
+        "word_relations",
+        WORD_RELATIONS_SCHEMA,
+    )
+
+
+async def get_related_phrases(word: str, meaning: str) -> Dict:
+    return await structured_response(
+        "You are a language assistant. Generate phrases or proverbs that share meaning with the given word.",
+        f"Word: {word}\nMeaning: {meaning}",
+        "related_phrases",
+        RELATED_PHRASES_SCHEMA,
+    )
+
+
+def quiz_context(quiz_type: str, word_info: Optional[Dict]) -> Optional[str]:
+    """Extra prompt context for a quiz type, or None when it cannot be generated."""
+    if quiz_type in RELATION_QUIZ_TYPES:
+        if not word_info or "synonyms" not in word_info or "antonyms" not in word_info:
+            return None
+        return f"\nSynonyms: {', '.join(word_info['synonyms'])}\nAntonyms: {', '.join(word_info['antonyms'])}"
+    if quiz_type in PROVERB_QUIZ_TYPES:
+        if not word_info or "phrases" not in word_info:
+            return None
+        return f"\nRelated Phrases: {json.dumps(word_info['phrases'])}"
+    return ""
+
+
+async def generate_quiz(quiz_type: str, word: str, meaning: str, word_info: Dict = None) -> Optional[Dict]:
+    schema = QUIZ_TYPE_SCHEMAS[quiz_type]
+    system_prompt = "You are a quiz generation assistant. Generate a quiz based on the given word and its meaning."
+
+    additional_context = quiz_context(quiz_type, word_info)
+    if additional_context is None:
+        return None
+
+    return await structured_response(
+        system_prompt,
+        f"Word: {word}\nMeaning: {meaning}{additional_context}\nQuiz Type: {quiz_type}",
+        "quiz",
+        schema,
+        label=quiz_type,
+    )
+
+
+def is_valid_quiz(quiz_type: str, content: Any) -> bool:
+    """Schema check plus the sanity rules strict mode cannot express."""
+    if not matches_schema(content, QUIZ_TYPE_SCHEMAS[quiz_type]):
+        return False
+    if "choices" in content:
+        if len(content["choices"]) < 2 or content["correct_answer"] not in content["choices"]:
+            return False
+    return True
+
+
+async def generate_quiz_set(
+    quiz_types: List[str], word: str, meaning: str, word_info: Dict = None
+) -> Dict[str, Optional[Dict]]:
+    """Generate several quiz types for one flashcard in a single request.
+
+    The requested types are merged into one strict schema. Types that come
+    back malformed are retried one by one with ``generate_quiz``; types
+    whose context is unavailable (e.g. proverbs for a phrase) are skipped.
+    """
+    contexts = {qt: quiz_context(qt, word_info) for qt in quiz_types}
+    quiz_types = [qt for qt in quiz_types if contexts[qt] is not None]
+    if not quiz_types:
+        return {}
+    if len(quiz_types) == 1:
+        return {quiz_types[0]: await generate_quiz(quiz_types[0], word, meaning, word_info)}
+
+    # Each context line is only needed once, even if several types share it
+    additional_context = "".join(dict.fromkeys(contexts[qt] for qt in quiz_types if contexts[qt]))
+    requested = "\n".join(f"- {quiz_schema_key(qt)}: {qt}" for qt in quiz_types)
+    result = await structured_response(
+        "You are a quiz generation assistant. Generate one quiz of each requested type based on the given word and its meaning.",
+        f"Word: {word}\nMeaning: {meaning}{additional_context}\nQuiz Types:\n{requested}",
+        "quizzes",
+        build_combined_quiz_schema(quiz_types),
+    )
+
+    quizzes = {}
+    for quiz_type in quiz_types:
+        content = result.get(quiz_schema_key(quiz_type))
+        if not is_valid_quiz(quiz_type, content):
+            # Retry only the malformed type, still inside the caller's semaphore slot
+            content = await generate_quiz(quiz_type, word, meaning, word_info)
+        quizzes[quiz_type] = content
+    return quizzes
+
+
+async def generate_quizzes(
+    flashcard: Dict[str, str], quiz_types: List[str], corpus: Optional[DistractorCorpus] = None
+) -> List[Dict[str, Any]]:
+    """Generate quizzes for one flashcard, running independent LLM calls concurrently.
+
+    Call graph (every node is one LLM request, capped by OPENAI_CONCURRENT_REQUESTS):
+
+        word_type ─┐
+        relations ─┼─> word_info ─> quizzes needing synonyms/antonyms/phrases
+        phrases  ──┘
+        quizzes needing only word + meaning start immediately
+
+    In "combined" mode (QUIZ_GENERATION_MODE) each of the two quiz groups is
+    a single request built by ``generate_quiz_set`` instead of one request
+    per quiz type.
+    Relations and phrases are requested speculatively alongside word_type and
+    discarded when the text turns out to be a phrase, which keeps the
+    critical path at two round trips. When the local classifier already
+    knows the word type, word_type is not requested at all, and for phrases
+    neither are relations and phrases.
+
+    With a distractor ``corpus``, the multiple-choice types it supports are
+    assembled locally after the LLM calls (see services/distractors.py).
+    """
+    word, meaning = flashcard["front"], flashcard["back"]
+    app_config = configs["app_config"]
+    semaphore = shared_semaphore()
+    executor = DependencyExecutor(semaphore)
+    known_type = local_word_type(word)
+    local_types = local_quiz_types(quiz_types, corpus)
+    llm_types = [qt for qt in quiz_types if qt not in local_types]
+
+    async def _word_info(deps: Dict[str, Any]) -> Dict:
+        # Only single words get synonyms, antonyms and phrases
+        word_type = known_type or deps["word_type"]["type"]
+        if word_type != "word":
+            return {}
+        return {**deps["relations"], **deps["phrases"]}
+
+    if known_type == "phrase":
+        executor.add("word_info", _word_info, bounded=False)
+    else:
+        word_info_deps = ("relations", "phrases")
+        if known_type is None:
+            executor.add("word_type", lambda _: detect_word_type(word, meaning, heuristic=False))
+            word_info_deps += ("word_type",)
+        executor.add("relations", lambda _: get_word_relations(word, meaning))
+        executor.add("phrases", lambda _: get_related_phrases(word, meaning))
+        executor.add("word_info", _word_info, after=word_info_deps, bounded=False)
+
+    if app_config.QUIZ_GENERATION_MODE == "combined":
+        basic_types = [qt for qt in llm_types if not needs_word_info(qt)]
+        context_types = [qt for qt in llm_types if needs_word_info(qt)]
+        executor.add("quizzes:basic", lambda _: generate_quiz_set(basic_types, word, meaning))
+        executor.add(
+            "quizzes:context",
+            lambda deps: generate_quiz_set(context_types, word, meaning, deps["word_info"]),
+            after=("word_info",),
+        )
+        results = await executor.run()
+        generated = {**results["quizzes:basic"], **results["quizzes:context"]}
+    else:
+        for quiz_type in llm_types:
+            if needs_word_info(quiz_type):
+                executor.add(
+                    f"quiz:{quiz_type}",
+                    lambda deps, qt=quiz_type: generate_quiz(qt, word, meaning, deps["word_info"]),
+                    after=("word_info",),
+                )
+            else:
+                executor.add(f"quiz:{quiz_type}", lambda _, qt=quiz_type: generate_quiz(qt, word, meaning))
+        results = await executor.run()
+        generated = {qt: results[f"quiz:{qt}"] for qt in llm_types}
+
+    for quiz_type in local_types:
+        generated[quiz_type] = build_local_quiz(quiz_type, flashcard, corpus, generated)
+
+    async def _llm_fallback(quiz_type: str) -> Optional[Dict]:
+        async with semaphore:
+            return await generate_quiz(quiz_type, word, meaning)
+
+    # Local types without enough distractors (or without a cloze sentence) go to the LLM
+    missing = [qt for qt in local_types if not generated[qt]]
+    for quiz_type, content in zip(missing, await asyncio.gather(*(_llm_fallback(qt) for qt in missing))):
+        generated[quiz_type] = content
+
+    quizzes = []
+    for quiz_type in quiz_types:
+        quiz_content = generated.get(quiz_type)
+        if quiz_content:
+            quizzes.append({
+                "type": quiz_type,
+                "content": quiz_content
+            })
+    return quizzes
+
+
+def _batch_line(index: int, flashcard: Dict[str, str], context: str = "") -> str:
+    context = context.replace("\n", " | ")
+    return f"[{index}] Word: {flashcard['front']} | Meaning: {flashcard['back']}{context}"
+
+
+def word_analysis_prompt(flashcards: List[Dict[str, str]]) -> Tuple[str, str, str, Dict]:
+    """(system prompt, user prompt, schema name, schema) of a batch word analysis."""
+    return (
+        "You are a language analysis assistant. For each numbered entry, determine if the text is a single word or a phrase. "
+        "For single words, also list synonyms, antonyms and phrases or proverbs that share its meaning; leave those lists empty for phrases.",
+        "\n".join(_batch_line(i, fc) for i, fc in enumerate(flashcards)),
+        "word_analysis",
+        WORD_ANALYSIS_BATCH_SCHEMA,
+    )
+
+
+def parse_word_analysis(result: Dict, count: int) -> Dict[int, Dict]:
+    """word_info per flashcard index (empty for phrases); indexes the model left out are absent."""
+    analysis = {}
+    for item in result["items"]:
+        if 0 <= item["index"] < count:
+            is_word = item["type"] == "word"
+            analysis[item["index"]] = (
+                {"synonyms": item["synonyms"], "antonyms": item["antonyms"], "phrases": item["phrases"]} if is_word else {}
+            )
+    return analysis
+
+
+async def analyze_words_batch(flashcards: List[Dict[str, str]]) -> Dict[int, Dict]:
+    """Word type, relations and phrases for several flashcards in one request.
+
+    Returns the word_info of each flashcard index found in the response
+    (empty for phrases); indexes the model left out are absent.
+    """
+    result = await structured_response(*word_analysis_prompt(flashcards))
+    return parse_word_analysis(result, len(flashcards))
+
+
+def quiz_set_batch_prompt(
+    flashcards: List[Dict[str, str]], quiz_types: List[str], word_infos: Dict[int, Dict] = None
+) -> Optional[Tuple[str, str, str, Dict]]:
+    """Prompt for ``quiz_types`` of several flashcards, or None if no flashcard qualifies.
+
+    Flashcards for which one of the types has no context (e.g. proverbs for
+    a phrase) are left out.
+    """
+    word_infos = word_infos or {}
+    lines = []
+    for index, flashcard in enumerate(flashcards):
+        contexts = [quiz_context(qt, word_infos.get(index)) for qt in quiz_types]
+        if any(context is None for context in contexts):
+            continue
+        lines.append(_batch_line(index, flashcard, "".join(dict.fromkeys(contexts))))
+    if not lines or not quiz_types:
+        return None
+
+    requested = "\n".join(f"- {quiz_schema_key(qt)}: {qt}" for qt in quiz_types)
+    return (
+        "You are a quiz generation assistant. For each numbered entry, generate one quiz of each requested type "
+        "based on the word and its meaning, and return it with the entry's index.",
+        f"Quiz Types:\n{requested}\n\nEntries:\n" + "\n".join(lines),
+        "quiz_batch",
+        build_batch_quiz_schema(quiz_types),
+    )
+
+
+def parse_quiz_set_batch(result: Dict, quiz_types: List[str], count: int) -> Dict[int, Dict[str, Optional[Dict]]]:
+    return {
+        item["index"]: {qt: item.get(quiz_schema_key(qt)) for qt in quiz_types}
+        for item in result["items"]
+        if 0 <= item["index"] < count
+    }
+
+
+async def generate_quiz_set_batch(
+    flashcards: List[Dict[str, str]], quiz_types: List[str], word_infos: Dict[int, Dict] = None
+) -> Dict[int, Dict[str, Optional[Dict]]]:
+    """Generate ``quiz_types`` for several flashcards in one request.
+
+    Flashcards for which one of the types has no context (e.g. proverbs for
+    a phrase) are left to the caller. Returns the raw per-index quizzes;
+    validation and retries happen in ``generate_quizzes_for_batch``.
+    """
+    prompt = quiz_set_batch_prompt(flashcards, quiz_types, word_infos)
+    if prompt is None:
+        return {}
+    result = await structured_response(*prompt)
+    return parse_quiz_set_batch(result, quiz_types, len(flashcards))
+
+
+async def generate_quizzes_for_batch(
+    flashcards: List[Dict[str, Any]], quiz_types: List[str], corpus: Optional[DistractorCorpus] = None
+) -> List[Dict[str, Any]]:
+    """Generate quizzes for several flashcards using grouped LLM requests.
+
+    Each flashcard dict carries ``flashcard_id``, ``front`` and ``back``. The
+    batch costs three requests: one word analysis for all cards, one for the
+    quiz types that only need word + meaning, and one for the types that need
+    synonyms/antonyms/phrases. Multiple-choice types supported by the
+    distractor ``corpus`` are assembled locally instead. Cards or types
+    missing or malformed in the grouped responses are regenerated one at a
+    time.
+
+    Returns one ``{"flashcard_id": ..., "quizzes": [...]}`` entry per flashcard.
+    """
+    semaphore = shared_semaphore()
+    executor = DependencyExecutor(semaphore)
+    local_types = local_quiz_types(quiz_types, corpus)
+    basic_types = [qt for qt in quiz_types if not needs_word_info(qt) and qt not in local_types]
+    context_types = [qt for qt in quiz_types if needs_word_info(qt) and qt not in local_types]
+
+    # Cards the local classifier knows are phrases need no analysis at all
+    known_phrases = {i for i, fc in enumerate(flashcards) if local_word_type(fc["front"]) == "phrase"}
+    to_analyze = [i for i in range(len(flashcards)) if i not in known_phrases]
+
+    async def _analysis(_) -> Dict[int, Dict]:
+        analysis = dict.fromkeys(known_phrases, {})
+        if to_analyze:
+            subset = await analyze_words_batch([flashcards[i] for i in to_analyze])
+            analysis.update({to_analyze[i]: info for i, info in subset.items()})
+        return analysis
+
+    executor.add("analysis", _analysis)
+    executor.add("quizzes:basic", lambda _: generate_quiz_set_batch(flashcards, basic_types))
+    executor.add(
+        "quizzes:context",
+        lambda deps: generate_quiz_set_batch(flashcards, context_types, deps["analysis"]),
+        after=("analysis",),
+    )
+    results = await executor.run()
+
+    async def _analysis_fallback(index: int) -> Dict:
+        flashcard = flashcards[index]
+        async with semaphore:
+            word_type = await detect_word_type(flashcard["front"], flashcard["back"])
+        if word_type["type"] != "word":
+            return {}
+        async with semaphore:
+            relations = await get_word_relations(flashcard["front"], flashcard["back"])
+        async with semaphore:
+            phrases = await get_related_phrases(flashcard["front"], flashcard["back"])
+        return {**relations, **phrases}
+
+    word_infos = dict(results["analysis"])
+    missing = [i for i in range(len(flashcards)) if i not in word_infos]
+    for index, info in zip(missing, await asyncio.gather(*(_analysis_fallback(i) for i in missing))):
+        word_infos[index] = info
+
+    generated = {
+        i: {**results["quizzes:basic"].get(i, {}), **results["quizzes:context"].get(i, {})}
+        for i in range(len(flashcards))
+    }
+    for i, flashcard in enumerate(flashcards):
+        for quiz_type in local_types:
+            generated[i][quiz_type] = build_local_quiz(quiz_type, flashcard, corpus, generated[i])
+
+    async def _retry(index: int, quiz_type: str) -> Optional[Dict]:
+        flashcard = flashcards[index]
+        async with semaphore:
+            return await generate_quiz(quiz_type, flashcard["front"], flashcard["back"], word_infos[index])
+
+    retries = [
+        (i, qt)
+        for i in range(len(flashcards))
+        for qt in quiz_types
+        if quiz_context(qt, word_infos[i]) is not None and not is_valid_quiz(qt, generated[i].get(qt))
+    ]
+    for (index, quiz_type), content in zip(retries, await asyncio.gather(*(_retry(i, qt) for i, qt in retries))):
+        generated[index][quiz_type] = content
+
+    return [
+        {
+            "flashcard_id": flashcard["flashcard_id"],
+            "quizzes": [
+                {"type": qt, "content": generated[i][qt]}
+                for qt in quiz_types
+                if generated[i].get(qt) and quiz_context(qt, word_infos[i]) is not None
+            ],
+        }
+        for i, flashcard in enumerate(flashcards)
+    ]
@@ -0,0 +1,221 @@
+"""
+File        : llm/rate_limit.py
+Description : Cluster-wide OpenAI rate limiter (requests and tokens per minute)
+
+Every LLM call site acquires from two token buckets kept in Redis, one for
+requests per minute and one for tokens per minute, before it sends anything.
+Tokens are reserved from an estimate and reconciled against the usage in
+the response, so the shared budget tracks what OpenAI actually counts. When
+Redis is unreachable the limiter falls back to an in-process bucket.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import redis
+from loguru import logger
+
+# Both buckets refill continuously at capacity / 60 per second. A caller may
+# only take from a bucket while its level stays above ``reserve`` (a fraction
+# of capacity); bulk work passes a non-zero reserve so interactive calls always
+# find headroom. Returns 0 when the reservation was taken, otherwise the
+# seconds to wait before retrying.
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + (now - ts) * capacity / 60.0)
+    return level
+end
+local rpm, tpm, tokens = tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local reserve = tonumber(ARGV[5])
+local requests_level = refill(KEYS[1], rpm)
+local tokens_level = refill(KEYS[2], tpm)
+local wait = 0
+local requests_needed = math.min(rpm, 1 + rpm * reserve)
+local tokens_needed = math.min(tpm, tokens + tpm * reserve)
+if requests_level < requests_needed then
+    wait = math.max(wait, (requests_needed - requests_level) * 60.0 / rpm)
+end
+if tokens_level < tokens_needed then
+    wait = math.max(wait, (tokens_needed - tokens_level) * 60.0 / tpm)
+end
+if wait == 0 then
+    requests_level = requests_level - 1
+    tokens_level = tokens_level - tokens
+end
+redis.call('HSET', KEYS[1], 'level', requests_level, 'ts', now)
+redis.call('HSET', KEYS[2], 'level', tokens_level, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+return tostring(wait)
+"""
+
+# Adds (refund) or removes (debit) tokens after the real usage is known
+_RECONCILE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tpm, delta = tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'level', 'ts')
+local level = tonumber(state[1]) or tpm
+local ts = tonumber(state[2]) or now
+level = math.min(tpm, level + (now - ts) * tpm / 60.0 + delta)
+redis.call('HSET', KEYS[1], 'level', level, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(level)
+"""
+
+
+@dataclass
+class Reservation:
+    tokens: int
+    wait_seconds: float
+
+
+class LocalBuckets:
+    """In-process equivalent of the Redis scripts, used when Redis is down."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm, self.tpm = rpm, tpm
+        self._lock = threading.Lock()
+        now = time.time()
+        self._levels = {"requests": (float(rpm), now), "tokens": (float(tpm), now)}
+
+    def _level(self, name: str, capacity: int, now: float) -> float:
+        level, ts = self._levels[name]
+        return min(capacity, level + (now - ts) * capacity / 60.0)
+
+    def acquire(self, tokens: int, reserve: float = 0.0) -> float:
+        with self._lock:
+            now = time.time()
+            requests_level = self._level("requests", self.rpm, now)
+            tokens_level = self._level("tokens", self.tpm, now)
+            requests_needed = min(self.rpm, 1 + self.rpm * reserve)
+            tokens_needed = min(self.tpm, tokens + self.tpm * reserve)
+            wait = 0.0
+            if requests_level < requests_needed:
+                wait = max(wait, (requests_needed - requests_level) * 60.0 / self.rpm)
+            if tokens_level < tokens_needed:
+                wait = max(wait, (tokens_needed - tokens_level) * 60.0 / self.tpm)
+            if wait == 0:
+                requests_level -= 1
+                tokens_level -= tokens
+            self._levels = {"requests": (requests_level, now), "tokens": (tokens_level, now)}
+            return wait
+
+    def reconcile(self, delta: int) -> None:
+        with self._lock:
+            now = time.time()
+            self._levels["tokens"] = (min(self.tpm, self._level("tokens", self.tpm, now) + delta), now)
+
+
+class RateLimiter:
+    """Redis-backed token-bucket limiter shared by the API and the workers."""
+
+    REQUESTS_KEY = "llm_rl:requests"
+    TOKENS_KEY = "llm_rl:tokens"
+    STATS_KEY = "llm_rl:stats"
+    MAX_SLEEP_SECONDS = 1.0
+
+    def __init__(self, settings):
+        self.enabled = settings.LLM_RATE_LIMIT_ENABLED
+        self.rpm = max(1, settings.OPENAI_RPM_LIMIT)
+        self.tpm = max(1, settings.OPENAI_TPM_LIMIT)
+        # Share of each budget bulk work may use; the rest is kept for interactive calls
+        self.bulk_reserve = 1.0 - min(1.0, max(0.0, settings.LLM_BULK_BUDGET_FRACTION))
+        self.client = redis.Redis.from_url(
+            settings.LLM_RATE_LIMIT_REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+        self._acquire = self.client.register_script(_ACQUIRE_SCRIPT)
+        self._reconcile = self.client.register_script(_RECONCILE_SCRIPT)
+        self._local = LocalBuckets(self.rpm, self.tpm)
+        # Queue-wait metrics for this process
+        self.acquisitions = 0
+        self.waited_acquisitions = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.waiting = 0
+
+    def _try_acquire(self, tokens: int, reserve: float) -> float:
+        try:
+            wait = self._acquire(
+                keys=[self.REQUESTS_KEY, self.TOKENS_KEY],
+                args=[time.time(), self.rpm, self.tpm, tokens, reserve],
+            )
+            return float(wait)
+        except redis.RedisError as e:
+            logger.warning("Rate limiter: Redis unavailable, using local buckets: {}", e)
+            return self._local.acquire(tokens, reserve)
+
+    async def acquire(self, estimated_tokens: int, priority: str = "interactive") -> Reservation:
+        """Wait until one request and ``estimated_tokens`` tokens are available.
+
+        ``priority="bulk"`` callers leave the last (1 - LLM_BULK_BUDGET_FRACTION)
+        of each budget untouched for interactive callers.
+        """
+        tokens = min(max(1, estimated_tokens), self.tpm)
+        reserve = self.bulk_reserve if priority == "bulk" else 0.0
+        if not self.enabled:
+            return Reservation(tokens=0, wait_seconds=0.0)
+
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            while True:
+                wait = await asyncio.to_thread(self._try_acquire, tokens, reserve)
+                if wait <= 0:
+                    break
+                # Jitter keeps waiting callers from retrying in lockstep
+                await asyncio.sleep(min(wait, self.MAX_SLEEP_SECONDS) * random.uniform(0.8, 1.2))
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        await asyncio.to_thread(self._record_wait, waited)
+        return Reservation(tokens=tokens, wait_seconds=waited)
+
+    async def reconcile(self, reservation: Reservation, actual_tokens: int) -> None:
+        """Refund or debit the difference between the reservation and real usage."""
+        if not self.enabled or reservation.tokens == actual_tokens:
+            return
+        delta = reservation.tokens - actual_tokens
+        try:
+            await asyncio.to_thread(self._reconcile, keys=[self.TOKENS_KEY], args=[time.time(), self.tpm, delta])
+        except redis.RedisError:
+            self._local.reconcile(delta)
+
+    def _record_wait(self, waited: float) -> None:
+        self.acquisitions += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        if waited > 0.001:
+            self.waited_acquisitions += 1
+        try:
+            pipe = self.client.pipeline()
+            pipe.hincrby(self.STATS_KEY, "acquisitions", 1)
+            pipe.hincrbyfloat(self.STATS_KEY, "wait_seconds_total", waited)
+            if waited > 0.001:
+                pipe.hincrby(self.STATS_KEY, "waited_acquisitions", 1)
+            pipe.execute()
+        except redis.RedisError:
+            pass
+
+    def stats(self) -> Dict[str, float]:
+        """Queue-wait metrics for this process plus cluster-wide totals."""
+        stats = {
+            "process_acquisitions": self.acquisitions,
+            "process_waited_acquisitions": self.waited_acquisitions,
+            "process_wait_seconds_total": self.wait_seconds_total,
+            "process_wait_seconds_max": self.wait_seconds_max,
+            "process_waiting": self.waiting,
+        }
+        try:
+            stats.update({k.decode("utf-8"): float(v) for k, v in self.client.hgetall(self.STATS_KEY).items()})
+        except redis.RedisError:
+            pass
+        return stats
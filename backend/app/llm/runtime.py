@@ -0,0 +1,66 @@
+"""
+File        : llm/runtime.py
+Description : Persistent per-process event loop for running async LLM work from Celery tasks
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+
+class AsyncRuntime:
+    """Event loop that lives for the whole worker process.
+
+    The loop runs in a daemon thread; Celery tasks (executed by the threads
+    pool) submit coroutines to it and block on the result. Many tasks can
+    therefore wait on LLM I/O at the same time while sharing one loop, one
+    ``AsyncOpenAI`` client and its keep-alive connection pool.
+
+    ``concurrency`` caps how many submitted coroutines run at once. The loop
+    is (re)created lazily, so a runtime inherited through fork starts a fresh
+    loop in the child.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+                self._slots = None
+            return self._loop
+
+    async def _bounded(self, coro: Awaitable[Any]) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            return await coro
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run ``coro`` on the persistent loop and block until it finishes."""
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._bounded(coro), loop)
+        return future.result(timeout)
+
+    def stop(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None) -> None:
+        """Run an optional cleanup coroutine function, then stop the loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            if cleanup is not None:
+                asyncio.run_coroutine_threadsafe(cleanup(), loop).result(10)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(10)
+            loop.close()
+            self._loop = self._thread = None
@@ -0,0 +1,38 @@
+"""
+File        : llm/schema_check.py
+Description : Minimal JSON schema checks for the schemas in openai_schemas.py
+"""
+
+from typing import Any, Dict
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+def matches_schema(instance: Any, schema: Dict[str, Any]) -> bool:
+    """Return True if ``instance`` satisfies ``schema``.
+
+    Only covers the keywords our structured-output schemas use: type,
+    properties, required, additionalProperties, items and enum.
+    """
+    expected = schema.get("type")
+    if expected and not _TYPE_CHECKS[expected](instance):
+        return False
+    if "enum" in schema and instance not in schema["enum"]:
+        return False
+    if expected == "object":
+        properties = schema.get("properties", {})
+        if any(key not in instance for key in schema.get("required", [])):
+            return False
+        if schema.get("additionalProperties") is False and any(key not in properties for key in instance):
+            return False
+        return all(matches_schema(instance[key], sub) for key, sub in properties.items() if key in instance)
+    if expected == "array" and "items" in schema:
+        return all(matches_schema(item, schema["items"]) for item in instance)
+    return True
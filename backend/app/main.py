@@ -6,11 +6,16 @@ Description : FastAPI application entry point
 import contextlib
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from openai import AsyncOpenAI
+from fastapi.responses import PlainTextResponse
 
 from app.routes import api_router, auth, words, quizzes, flashcards
 from app.config import ModelConfig
+from app.database import async_engine
+from app.dependencies.pagination import PAGE_HEADERS
 from app.globals import clients, configs
+from app.llm.client import get_cache, get_rate_limiter
+from app.llm.instrumentation import get_metrics
+from app.llm.providers import create_provider
 
 
 @contextlib.asynccontextmanager
@@ -22,14 +27,15 @@ async def lifespan(app: FastAPI):
     configs["app_config"] = ModelConfig()
     app_config = configs["app_config"]
 
-    # Initialize OpenAI client
-    clients["openai"] = AsyncOpenAI(api_key=app_config.OPENAI_API_KEY)
+    # Initialize LLM provider (OpenAI, or the offline fake for load tests)
+    clients["openai"] = create_provider(app_config)
 
     yield
 
     # Cleanup clients
     if "openai" in clients:
         await clients["openai"].close()
+    await async_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -41,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGE_HEADERS,  # Pagination headers, readable by the frontend
 )
 
 # Include the centralized router
@@ -54,4 +61,14 @@ app.include_router(flashcards.router, prefix="/api/flashcards", tags=["flashcard
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to the Cerego API"}
\ No newline at end of file
+    return {"message": "Welcome to the Cerego API"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: LLM call histograms, cache and rate limiter counters, database pool gauges"""
+    gauges = [
+        (f"llm_cache_{name}", {}, value) for name, value in get_cache().stats().items()
+    ] + [
+        (f"llm_rate_limiter_{name}", {}, value) for name, value in get_rate_limiter().stats().items()
+    ]
+    return get_metrics().render_prometheus(gauges)
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+File        : metrics.py
+Description : Redis-backed counters and histograms with a Prometheus text export
+
+API and worker processes all record into the same Redis hashes, so any API
+process can serve cluster-wide numbers on /metrics.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import redis
+from loguru import logger
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKENS_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10)
+DB_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_HOLD_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name -> (type, help, buckets)
+METRICS: Dict[str, Tuple[str, str, Optional[Tuple[float, ...]]]] = {
+    "llm_request_seconds": ("histogram", "Wall time of LLM calls including retries", SECONDS_BUCKETS),
+    "llm_queue_wait_seconds": ("histogram", "Time spent waiting on the rate limiter", SECONDS_BUCKETS),
+    "llm_input_tokens": ("histogram", "Input tokens per LLM call", TOKENS_BUCKETS),
+    "llm_output_tokens": ("histogram", "Output tokens per LLM call", TOKENS_BUCKETS),
+    "llm_retries": ("histogram", "Retries per LLM call", COUNT_BUCKETS),
+    "llm_calls_total": ("counter", "LLM calls by outcome (ok, error, cache_hit)", None),
+    "llm_cost_usd_total": ("counter", "Estimated LLM spend in USD", None),
+    "wordlist_prefilter_total": ("counter", "Words settled before validation (accepted, rejected, ambiguous)", None),
+    "db_pool_wait_seconds": ("histogram", "Time to check out a database connection from the pool", DB_WAIT_BUCKETS),
+    "db_connection_hold_seconds": ("histogram", "Time database connections stay checked out", DB_HOLD_BUCKETS),
+    "db_pool_timeouts_total": ("counter", "Connection checkouts that timed out on a full pool", None),
+}
+
+IMPORT_SUMMARY_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _label_key(labels: Dict[str, str]) -> str:
+    return ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in sorted(labels.items()))
+
+
+class MetricsRegistry:
+    PREFIX = "metrics:"
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def observe(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        """Add one observation to a histogram."""
+        _, _, buckets = METRICS[name]
+        key = _label_key(labels)
+        pipe = self.client.pipeline()
+        for bound in buckets:
+            if value <= bound:
+                pipe.hincrby(self.PREFIX + name, f"{key}|le={bound}", 1)
+        pipe.hincrby(self.PREFIX + name, f"{key}|count", 1)
+        pipe.hincrbyfloat(self.PREFIX + name, f"{key}|sum", value)
+        self._execute(pipe)
+
+    def add_histogram(
+        self, name: str, bucket_counts: Dict[float, int], count: int, total: float, labels: Dict[str, str]
+    ) -> None:
+        """Merge observations aggregated in-process (cumulative bucket counts) into a histogram."""
+        key = _label_key(labels)
+        pipe = self.client.pipeline()
+        for bound, bucket_count in bucket_counts.items():
+            if bucket_count:
+                pipe.hincrby(self.PREFIX + name, f"{key}|le={bound}", bucket_count)
+        pipe.hincrby(self.PREFIX + name, f"{key}|count", count)
+        pipe.hincrbyfloat(self.PREFIX + name, f"{key}|sum", total)
+        self._execute(pipe)
+
+    def inc(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        self._execute(self.client.pipeline().hincrbyfloat(self.PREFIX + name, _label_key(labels), value))
+
+    def add_to_summary(self, import_id: str, values: Dict[str, float]) -> None:
+        """Accumulate values into a per-import summary hash."""
+        key = f"{self.PREFIX}import:{import_id}"
+        pipe = self.client.pipeline()
+        for field, value in values.items():
+            pipe.hincrbyfloat(key, field, value)
+        pipe.expire(key, IMPORT_SUMMARY_TTL_SECONDS)
+        self._execute(pipe)
+
+    def set_summary_fields(self, import_id: str, fields: Dict[str, str]) -> None:
+        key = f"{self.PREFIX}import:{import_id}"
+        self._execute(self.client.pipeline().hset(key, mapping=fields).expire(key, IMPORT_SUMMARY_TTL_SECONDS))
+
+    def summary(self, import_id: str) -> Dict[str, str]:
+        raw = self.client.hgetall(f"{self.PREFIX}import:{import_id}")
+        return {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+
+    def set_gauges(self, component: str, values: Dict[str, float], ttl_seconds: int = 60) -> None:
+        """Publish this process's gauges; they disappear if the process stops reporting."""
+        key = f"{self.PREFIX}gauges:{component}:{os.uname().nodename}:{os.getpid()}"
+        fields = {name: value for name, value in values.items()}
+        fields["_updated_at"] = time.time()
+        self._execute(self.client.pipeline().hset(key, mapping=fields).expire(key, ttl_seconds))
+
+    def _execute(self, pipe) -> None:
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Metrics not recorded: {}", e)
+
+    def render_prometheus(self, extra_gauges: Iterable[Tuple[str, Dict[str, str], float]] = ()) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            raw = {k.decode("utf-8"): float(v) for k, v in self.client.hgetall(self.PREFIX + name).items()}
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                lines.extend(f"{name}{{{key}}} {value}" for key, value in sorted(raw.items()))
+                continue
+            for key in sorted({field.split("|")[0] for field in raw}):
+                sep = "," if key else ""
+                for bound in buckets:
+                    lines.append(f'{name}_bucket{{{key}{sep}le="{bound}"}} {raw.get(f"{key}|le={bound}", 0)}')
+                lines.append(f'{name}_bucket{{{key}{sep}le="+Inf"}} {raw.get(f"{key}|count", 0)}')
+                lines.append(f"{name}_sum{{{key}}} {raw.get(f'{key}|sum', 0)}")
+                lines.append(f"{name}_count{{{key}}} {raw.get(f'{key}|count', 0)}")
+
+        gauges = list(extra_gauges)
+        for key in self.client.scan_iter(match=f"{self.PREFIX}gauges:*"):
+            _, _, component, host, pid = key.decode("utf-8").split(":")
+            for field, value in self.client.hgetall(key).items():
+                field = field.decode("utf-8")
+                if not field.startswith("_"):
+                    gauges.append((f"{component}_{field}", {"host": host, "pid": pid}, float(value)))
+        for name, labels, value in sorted(gauges, key=lambda g: g[0]):
+            lines.append(f"{name}{{{_label_key(labels)}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
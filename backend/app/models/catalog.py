@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -32,6 +32,8 @@ class Catalog(Base):
     # Add unique constraint for name per user
     __table_args__ = (
         UniqueConstraint('name', 'owner_id', name='uq_catalog_name_owner'),
+        Index('ix_catalogs_owner_id', 'owner_id'),
+        Index('ix_catalogs_visibility_id', 'visibility', 'id'),  # Public listing, in keyset order
     )
 
 class CatalogFlashcard(Base):
@@ -41,6 +43,12 @@ class CatalogFlashcard(Base):
     catalog_id = Column(Integer, ForeignKey("catalogs.id", ondelete="CASCADE"), nullable=False)
     flashcard_id = Column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (
+        # A flashcard is in a catalog once; also serves lookups by catalog
+        Index('uq_catalog_flashcards_catalog_flashcard', 'catalog_id', 'flashcard_id', unique=True),
+        Index('ix_catalog_flashcards_flashcard_id', 'flashcard_id'),
+    )
+
 class UserCatalogCollection(Base):
     __tablename__ = "user_catalog_collections"
     
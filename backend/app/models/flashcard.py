@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -14,4 +14,11 @@ class Flashcard(Base):
     # Relationships
     owner = relationship("User", back_populates="owned_flashcards")
     catalogs = relationship("Catalog", secondary="catalog_flashcards", back_populates="flashcards")
-    language = relationship("Language")
\ No newline at end of file
+    language = relationship("Language")
+
+    __table_args__ = (
+        # Duplicate checks (owner, language, front)
+        Index('ix_flashcards_owner_language_front', 'owner_id', 'language_id', 'front'),
+        # Flashcard listings, in keyset order
+        Index('ix_flashcards_owner_id_id', 'owner_id', 'id'),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -24,4 +24,10 @@ class Quiz(Base):
     completed_at = Column(DateTime(timezone=True), server_default=func.now())
 
     quiz_type = relationship("QuizType", back_populates="quizzes")
-    language = relationship("Language")
\ No newline at end of file
+    language = relationship("Language")
+
+    __table_args__ = (
+        Index('ix_quizzes_user_flashcard', 'user_id', 'flashcard_id'),
+        Index('ix_quizzes_flashcard_id', 'flashcard_id'),  # ON DELETE CASCADE from flashcards
+        Index('ix_quizzes_user_id_id', 'user_id', 'id'),  # Quiz history, in keyset order
+    )
\ No newline at end of file
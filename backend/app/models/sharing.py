@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -9,9 +9,18 @@ class FlashcardShare(Base):
     shared_with_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index('ix_flashcard_shares_shared_with_id', 'shared_with_id'),
+    )
+
 class CatalogShare(Base):
     __tablename__ = "catalog_shares"
 
     catalog_id = Column(Integer, ForeignKey("catalogs.id", ondelete="CASCADE"), primary_key=True)
     shared_with_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    # The primary key (catalog_id, shared_with_id) does not cover lookups by recipient
+    __table_args__ = (
+        Index('ix_catalog_shares_shared_with_id', 'shared_with_id'),
+    )
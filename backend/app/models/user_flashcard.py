@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class UserFlashcard(Base):
     __tablename__ = "user_flashcards"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Due-card counts and review queues
+        Index('ix_user_flashcards_user_next_review', 'user_id', 'next_review'),
+        Index('ix_user_flashcards_flashcard_id', 'flashcard_id'),  # ON DELETE CASCADE from flashcards
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, FastAPI, Form
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Response, status, FastAPI, Form
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 from app.database import get_db
 from app.models.user import User
@@ -13,22 +15,24 @@ from app.dependencies.auth import (
     get_current_user,
     get_current_user_optional
 )
+from app.dependencies.pagination import PageParams, page_params, paginate
 from app.models.waitlist import Waitlist
 from pydantic import BaseModel
 
 router = APIRouter()
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, db: Session = Depends(get_db), current_user: User | None = Depends(get_current_user_optional)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_db), current_user: User | None = Depends(get_current_user_optional)):
     # Check if email exists
-    if db.query(User).filter(User.email == user.email).first():
+    if await db.scalar(select(User).where(User.email == user.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    # bcrypt is deliberately slow; keep it off the event loop
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
     db_user = User(
         email=user.email,
         username=user.username,  # Username is optional
@@ -36,18 +40,18 @@ def signup(user: UserCreate, db: Session = Depends(get_db), current_user: User |
         is_admin=user.is_admin
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == username).first()  # Use 'username' field to pass email
-    if not user or not verify_password(password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == username))  # Use 'username' field to pass email
+    if not user or not await asyncio.to_thread(verify_password, password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -57,24 +61,29 @@ def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 @router.get("/me/is_admin")
-def check_admin_status(current_user: User = Depends(get_current_user)) -> bool:
+async def check_admin_status(current_user: User = Depends(get_current_user)) -> bool:
     return current_user.is_admin
 
 @router.get("/users", response_model=list[UserResponse])
-def list_users(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can list all users"
         )
-    return db.query(User).all()
+    return await paginate(db, response, page, "users", select(User), User.id)
 
 @router.delete("/users/{user_id}")
-def remove_user(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def remove_user(user_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -87,7 +96,7 @@ def remove_user(user_id: int, current_user: User = Depends(get_current_user), db
             detail="Cannot remove your own account"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,7 +106,7 @@ def remove_user(user_id: int, current_user: User = Depends(get_current_user), db
     # Perform soft delete
     user.is_active = False
     user.deleted_at = func.now()
-    db.commit()
+    await db.commit()
 
     return {"message": "User deactivated successfully"}
 
@@ -108,35 +117,40 @@ class WaitlistEntry(BaseModel):
     reason: str | None = None
 
 @router.post("/waitlist", status_code=status.HTTP_201_CREATED)
-def submit_waitlist_entry(
+async def submit_waitlist_entry(
     entry: WaitlistEntry,  # Parse JSON body into this model
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Allow users to submit a waitlist entry."""
-    if db.query(Waitlist).filter(Waitlist.email == entry.email).first():
+    if await db.scalar(select(Waitlist).where(Waitlist.email == entry.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already on the waitlist."
         )
-    hashed_password = get_password_hash(entry.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, entry.password)
     waitlist_entry = Waitlist(name=entry.name, email=entry.email, reason=entry.reason, password=hashed_password)
     db.add(waitlist_entry)
-    db.commit()
-    db.refresh(waitlist_entry)
+    await db.commit()
+    await db.refresh(waitlist_entry)
     return {"message": "Waitlist entry submitted successfully."}
 
 @router.get("/waitlist", response_model=list[WaitlistSchema], dependencies=[Depends(get_current_user)])
-def get_waitlist(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Allow admins to fetch the waitlist."""
+async def get_waitlist(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Allow admins to fetch the waitlist, a page at a time."""
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can access the waitlist."
         )
-    return db.query(Waitlist).all()
+    return await paginate(db, response, page, "waitlist", select(Waitlist), Waitlist.id)
 
 @router.post("/waitlist/{entry_id}/approve")
-def approve_waitlist_entry(entry_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def approve_waitlist_entry(entry_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     """Allow admins to approve a waitlist entry."""
     if not current_user.is_admin:
         raise HTTPException(
@@ -144,7 +158,7 @@ def approve_waitlist_entry(entry_id: int, db: Session = Depends(get_db), current
             detail="Only admins can approve waitlist entries."
         )
 
-    entry = db.query(Waitlist).filter(Waitlist.id == entry_id).first()
+    entry = await db.scalar(select(Waitlist).where(Waitlist.id == entry_id))
     if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -168,13 +182,13 @@ def approve_waitlist_entry(entry_id: int, db: Session = Depends(get_db), current
 
     # Mark waitlist entry as approved
     entry.approved = True
-    db.commit()
+    await db.commit()
     return {"message": "Waitlist entry approved and user created."}
 
 @router.get("/waitlist/status/{email}")
-def get_waitlist_status(email: str, db: Session = Depends(get_db)):
+async def get_waitlist_status(email: str, db: AsyncSession = Depends(get_db)):
     """Public endpoint to check the status of a waitlist entry by email."""
-    entry = db.query(Waitlist).filter(Waitlist.email == email).first()
+    entry = await db.scalar(select(Waitlist).where(Waitlist.email == email))
     if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,7 +197,7 @@ def get_waitlist_status(email: str, db: Session = Depends(get_db)):
     return {"email": entry.email, "approved": entry.approved}
 
 @router.delete("/waitlist/{entry_id}")
-def delete_waitlist_entry(entry_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_waitlist_entry(entry_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     """Allow admins to delete a waitlist entry."""
     if not current_user.is_admin:
         raise HTTPException(
@@ -191,15 +205,15 @@ def delete_waitlist_entry(entry_id: int, db: Session = Depends(get_db), current_
             detail="Only admins can delete waitlist entries."
         )
 
-    entry = db.query(Waitlist).filter(Waitlist.id == entry_id).first()
+    entry = await db.scalar(select(Waitlist).where(Waitlist.id == entry_id))
     if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Waitlist entry not found."
         )
 
-    db.delete(entry)
-    db.commit()
+    await db.delete(entry)
+    await db.commit()
     return {"message": "Waitlist entry deleted successfully."}
 
 app = FastAPI()
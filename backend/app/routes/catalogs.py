@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import or_
-from sqlalchemy.orm import Session, joinedload
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
 from app.database import get_db
 from app.models.catalog import Catalog, CatalogFlashcard, CatalogVisibility, UserCatalogCollection
@@ -9,6 +12,11 @@ from app.models.sharing import CatalogShare
 from app.models.chat import Language
 from app.models.user import User
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import PageParams, page_params, paginate
+from app.services.catalog_access import accessible_catalog_ids, collection_catalog_ids, shared_catalog_ids
+from app.services.catalog_listing import catalog_listing_query, list_catalogs, listing_row
+from app.services.catalog_export import EXPORT_FORMATS, catalog_query, stream_export
+from app.services.near_duplicates import normalize_front, record_removed
 from app.schemas.catalog import CatalogCreate, CatalogResponse, CatalogBase, CatalogVisibilityUpdate, CatalogDetailResponse
 from typing import List, Dict
 
@@ -16,243 +24,112 @@ router = APIRouter()
 
 @router.get("/owned", response_model=List[CatalogBase])
 async def get_owned_catalogs(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get catalogs owned by the current user"""
-    catalogs = db.query(Catalog)\
-        .options(
-            joinedload(Catalog.owner),
-            joinedload(Catalog.target_language)
-        )\
-        .filter(Catalog.owner_id == current_user.id)\
-        .all()
-    
-    return [
-        {
-            "id": catalog.id,
-            "name": catalog.name,
-            "description": catalog.description,
-            "visibility": catalog.visibility,
-            "created_at": catalog.created_at,
-            "owner": {
-                "username": catalog.owner.username,
-                "email": catalog.owner.email
-            },
-            "target_language": catalog.target_language.name
-        }
-        for catalog in catalogs
-    ]
+    return await list_catalogs(db, current_user.id, Catalog.owner_id == current_user.id)
 
 @router.get("/public", response_model=List[CatalogBase])
 async def get_public_catalogs(
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get all public catalogs"""
-    catalogs = db.query(Catalog)\
-        .options(
-            joinedload(Catalog.owner),
-            joinedload(Catalog.target_language)
-        )\
-        .filter(Catalog.visibility == CatalogVisibility.PUBLIC)\
-        .all()
-    return [
-        {
-            "id": catalog.id,
-            "name": catalog.name,
-            "description": catalog.description,
-            "visibility": catalog.visibility,
-            "created_at": catalog.created_at,
-            "owner": {
-                "username": catalog.owner.username,
-                "email": catalog.owner.email
-            },
-            "target_language": catalog.target_language.name,
-            "is_in_collection": db.query(UserCatalogCollection)\
-                .filter(
-                    UserCatalogCollection.user_id == current_user.id,
-                    UserCatalogCollection.catalog_id == catalog.id
-                ).first() is not None
-        }
-        for catalog in catalogs
-    ]
+    """Get a page of the public catalogs"""
+    rows = await paginate(
+        db, response, page, "catalogs_public",
+        catalog_listing_query(current_user.id, Catalog.visibility == CatalogVisibility.PUBLIC),
+        Catalog.id,
+        scalars=False,
+    )
+    return [listing_row(row) for row in rows]
 
 @router.get("/shared", response_model=List[CatalogBase])
 async def get_shared_catalogs(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get catalogs shared with the current user"""
-    catalogs = db.query(Catalog)\
-        .options(
-            joinedload(Catalog.owner),
-            joinedload(Catalog.target_language)
-        )\
-        .filter(
-            Catalog.id.in_(
-                db.query(CatalogShare.catalog_id)
-                .filter(CatalogShare.shared_with_id == current_user.id)
-            )
-        )\
-        .all()
-    return [
-        {
-            "id": catalog.id,
-            "name": catalog.name,
-            "description": catalog.description,
-            "visibility": catalog.visibility,
-            "created_at": catalog.created_at,
-            "owner": {
-                "username": catalog.owner.username,
-                "email": catalog.owner.email
-            },
-            "target_language": catalog.target_language.name
-        }
-        for catalog in catalogs
-    ]
+    return await list_catalogs(db, current_user.id, Catalog.id.in_(shared_catalog_ids(current_user.id)))
 
 @router.get("/collection", response_model=List[CatalogBase])
 async def get_user_collection(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get all catalogs in user's collection (owned + shared + added public)"""
-    catalogs = db.query(Catalog)\
-        .options(
-            joinedload(Catalog.owner),
-            joinedload(Catalog.target_language)
-        )\
-        .filter(
-            or_(
-                Catalog.owner_id == current_user.id,  # Owned catalogs
-                Catalog.id.in_(  # Shared catalogs
-                    db.query(CatalogShare.catalog_id)
-                    .filter(CatalogShare.shared_with_id == current_user.id)
-                ),
-                Catalog.id.in_(  # Added public catalogs
-                    db.query(UserCatalogCollection.catalog_id)
-                    .filter(UserCatalogCollection.user_id == current_user.id)
-                )
-            )
-        ).all()
-    return [
-        {
-            "id": catalog.id,
-            "name": catalog.name,
-            "description": catalog.description,
-            "visibility": catalog.visibility,
-            "created_at": catalog.created_at,
-            "owner": {
-                "username": catalog.owner.username,
-                "email": catalog.owner.email
-            },
-            "target_language": catalog.target_language.name
-        }
-        for catalog in catalogs
-    ]
+    return await list_catalogs(db, current_user.id, Catalog.id.in_(collection_catalog_ids(current_user.id)))
 
 @router.get("/accessible", response_model=List[CatalogBase])
 async def get_accessible_catalogs(
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get all catalogs the user can access (owned + shared + public)"""
-    catalogs = db.query(Catalog)\
-        .options(
-            joinedload(Catalog.owner),
-            joinedload(Catalog.target_language)
-        )\
-        .filter(
-            or_(
-                Catalog.owner_id == current_user.id,  # Owned catalogs
-                Catalog.visibility == CatalogVisibility.PUBLIC,  # Public catalogs
-                Catalog.id.in_(  # Shared catalogs
-                    db.query(CatalogShare.catalog_id)
-                    .filter(CatalogShare.shared_with_id == current_user.id)
-                )
-            )
-        ).all()
-    
-    return [
-        {
-            "id": catalog.id,
-            "name": catalog.name,
-            "description": catalog.description,
-            "visibility": catalog.visibility,
-            "created_at": catalog.created_at,
-            "owner": {
-                "username": catalog.owner.username,
-                "email": catalog.owner.email
-            },
-            "target_language": catalog.target_language.name
-        }
-        for catalog in catalogs
-    ]
+    """Get a page of the catalogs the user can access (owned + shared + public)"""
+    after_id = page.after("catalogs_accessible")
+    rows = await paginate(
+        db, response, page, "catalogs_accessible",
+        catalog_listing_query(
+            current_user.id,
+            Catalog.id.in_(accessible_catalog_ids(current_user.id, after_id, page.limit + 1))
+        ),
+        Catalog.id,
+        total_of=accessible_catalog_ids(current_user.id),
+        scalars=False,
+    )
+    return [listing_row(row) for row in rows]
 
 @router.get("/accessible-flashcards/{language_id}")
 async def get_accessible_flashcards(
     language_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get all flashcards the user owns for a specific language"""
-    flashcards = db.query(Flashcard)\
-        .filter(
+    flashcards = (await db.scalars(
+        select(Flashcard)
+        .where(
             Flashcard.language_id == language_id,
             Flashcard.owner_id == current_user.id  # Only return owned flashcards
-        ).all()
+        )
+    )).all()
     
     return flashcards
 
 @router.get("/accessible-by-language/{language_id}", response_model=List[CatalogBase])
 async def get_accessible_catalogs_by_language(
     language_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Get all catalogs the user owns (can edit) that contain flashcards in the specified language"""
-    catalogs = db.query(Catalog)\
-        .options(
-            joinedload(Catalog.owner),
-            joinedload(Catalog.target_language)
-        )\
-        .filter(
-            Catalog.owner_id == current_user.id,  # Only return owned catalogs
-            # Filter by catalogs that have at least one flashcard in the specified language
-            Catalog.id.in_(
-                db.query(CatalogFlashcard.catalog_id)
-                .join(Flashcard)
-                .filter(Flashcard.language_id == language_id)
-                .distinct()
-            )
-        ).all()
-    
-    return [
-        {
-            "id": catalog.id,
-            "name": catalog.name,
-            "description": catalog.description,
-            "visibility": catalog.visibility,
-            "created_at": catalog.created_at,
-            "owner": {
-                "username": catalog.owner.username,
-                "email": catalog.owner.email
-            },
-            "target_language": catalog.target_language.name
-        }
-        for catalog in catalogs
-    ]
+    return await list_catalogs(
+        db,
+        current_user.id,
+        Catalog.owner_id == current_user.id,  # Only return owned catalogs
+        # Filter by catalogs that have at least one flashcard in the specified language
+        select(CatalogFlashcard.id)
+        .join(Flashcard, Flashcard.id == CatalogFlashcard.flashcard_id)
+        .where(
+            CatalogFlashcard.catalog_id == Catalog.id,
+            Flashcard.language_id == language_id
+        )
+        .exists()
+    )
 
 @router.post("/create", response_model=CatalogResponse)
 async def create_catalog(
     catalog: CatalogCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Create a new catalog"""
     # Verify target language exists
-    language = db.query(Language).filter(Language.id == catalog.target_language_id).first()
+    language = await db.scalar(select(Language).where(Language.id == catalog.target_language_id))
     if not language:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -260,11 +137,11 @@ async def create_catalog(
         )
 
     # Verify user has access to all flashcards and they are in the correct language
-    flashcards = db.query(Flashcard).filter(
+    flashcards = (await db.scalars(select(Flashcard).where(
         Flashcard.id.in_(catalog.flashcard_ids),
         Flashcard.language_id == catalog.target_language_id,
         Flashcard.owner_id == current_user.id  # Only allow adding owned flashcards
-    ).all()
+    ))).all()
 
     if len(flashcards) != len(catalog.flashcard_ids):
         raise HTTPException(
@@ -272,13 +149,14 @@ async def create_catalog(
             detail="Invalid flashcards selection. Make sure you own all selected flashcards and they match the target language."
         )
 
-    # Check for word uniqueness using front values
+    # Check for word uniqueness using normalized front values
     word_counts = {}
     for f in flashcards:
-        if f.front in word_counts:
-            word_counts[f.front].append(f.id)
+        key = normalize_front(f.front)
+        if key in word_counts:
+            word_counts[key].append(f.id)
         else:
-            word_counts[f.front] = [f.id]
+            word_counts[key] = [f.id]
 
     duplicates = {word: ids for word, ids in word_counts.items() if len(ids) > 1}
     if duplicates:
@@ -301,7 +179,7 @@ async def create_catalog(
             visibility=catalog.visibility,
         )
         db.add(new_catalog)
-        db.flush()
+        await db.flush()
 
         # Add flashcards to catalog
         for flashcard_id in catalog.flashcard_ids:
@@ -311,8 +189,14 @@ async def create_catalog(
             )
             db.add(catalog_flashcard)
 
-        db.commit()
-        db.refresh(new_catalog)
+        await db.commit()
+        # Load the flashcards eagerly: there is no lazy loading on an async session
+        new_catalog = await db.scalar(
+            select(Catalog)
+            .options(selectinload(Catalog.flashcards).selectinload(Flashcard.language))
+            .where(Catalog.id == new_catalog.id)
+            .execution_options(populate_existing=True)
+        )
 
         # Format response
         response = {
@@ -345,7 +229,7 @@ async def create_catalog(
         return response
 
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"A catalog with the name '{catalog.name}' already exists"
@@ -354,15 +238,15 @@ async def create_catalog(
 @router.post("/{catalog_id}/add-to-collection")
 async def add_to_collection(
     catalog_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Add a public catalog to user's collection"""
     # Verify catalog exists and is public
-    catalog = db.query(Catalog).filter(
+    catalog = await db.scalar(select(Catalog).where(
         Catalog.id == catalog_id,
         Catalog.visibility == CatalogVisibility.PUBLIC
-    ).first()
+    ))
 
     if not catalog:
         raise HTTPException(
@@ -371,10 +255,10 @@ async def add_to_collection(
         )
 
     # Check if already in collection
-    existing = db.query(UserCatalogCollection).filter(
+    existing = await db.scalar(select(UserCatalogCollection).where(
         UserCatalogCollection.user_id == current_user.id,
         UserCatalogCollection.catalog_id == catalog_id
-    ).first()
+    ))
 
     if existing:
         return {"message": "Catalog already in collection"}
@@ -387,10 +271,10 @@ async def add_to_collection(
     db.add(collection_entry)
 
     try:
-        db.commit()
+        await db.commit()
         return {"message": "Catalog added to collection"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail="Failed to add catalog to collection"
@@ -399,27 +283,27 @@ async def add_to_collection(
 @router.delete("/{catalog_id}/remove-from-collection")
 async def remove_from_collection(
     catalog_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Remove a catalog from user's collection"""
     # Delete collection entry if exists
-    result = db.query(UserCatalogCollection).filter(
+    result = await db.execute(delete(UserCatalogCollection).where(
         UserCatalogCollection.user_id == current_user.id,
         UserCatalogCollection.catalog_id == catalog_id
-    ).delete()
+    ))
 
-    if result == 0:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=404,
             detail="Catalog not found in collection"
         )
 
     try:
-        db.commit()
+        await db.commit()
         return {"message": "Catalog removed from collection"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail="Failed to remove catalog from collection"
@@ -429,15 +313,15 @@ async def remove_from_collection(
 async def update_catalog_visibility(
     catalog_id: int,
     visibility_update: CatalogVisibilityUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update catalog visibility (public/private)"""
     # Verify catalog exists and is owned by current user
-    catalog = db.query(Catalog).filter(
+    catalog = await db.scalar(select(Catalog).where(
         Catalog.id == catalog_id,
         Catalog.owner_id == current_user.id
-    ).first()
+    ))
 
     if not catalog:
         raise HTTPException(
@@ -447,10 +331,10 @@ async def update_catalog_visibility(
 
     catalog.visibility = visibility_update.visibility
     try:
-        db.commit()
+        await db.commit()
         return {"message": f"Catalog visibility updated to {visibility_update.visibility}"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail="Failed to update catalog visibility"
@@ -459,27 +343,29 @@ async def update_catalog_visibility(
 @router.get("/{catalog_id}", response_model=CatalogDetailResponse)
 async def get_catalog_by_id(
     catalog_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a catalog by ID if user has access to it"""
-    catalog = db.query(Catalog)\
+    catalog = await db.scalar(
+        select(Catalog)
         .options(
-            joinedload(Catalog.flashcards).joinedload(Flashcard.language),
+            selectinload(Catalog.flashcards).selectinload(Flashcard.language),
             joinedload(Catalog.owner),
             joinedload(Catalog.target_language)
-        )\
-        .filter(
+        )
+        .where(
             Catalog.id == catalog_id,
             or_(
                 Catalog.owner_id == current_user.id,  # User owns the catalog
                 Catalog.visibility == CatalogVisibility.PUBLIC,  # Catalog is public
                 Catalog.id.in_(  # Catalog is shared with user
-                    db.query(CatalogShare.catalog_id)
-                    .filter(CatalogShare.shared_with_id == current_user.id)
+                    select(CatalogShare.catalog_id)
+                    .where(CatalogShare.shared_with_id == current_user.id)
                 )
             )
-        ).first()
+        )
+    )
 
     if not catalog:
         raise HTTPException(
@@ -510,19 +396,60 @@ async def get_catalog_by_id(
         ]
     }
 
+@router.get("/{catalog_id}/export")
+async def export_catalog(
+    catalog_id: int,
+    format: str = Query("csv", pattern="^(csv|jsonl|anki)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream a catalog's flashcards and generated quizzes as CSV, JSONL or Anki text"""
+    catalog = (await db.execute(
+        select(Catalog.id, Catalog.name)
+        .where(
+            Catalog.id == catalog_id,
+            or_(
+                Catalog.owner_id == current_user.id,
+                Catalog.visibility == CatalogVisibility.PUBLIC,
+                Catalog.id.in_(
+                    select(CatalogShare.catalog_id)
+                    .where(CatalogShare.shared_with_id == current_user.id)
+                )
+            )
+        )
+    )).first()
+
+    if not catalog:
+        raise HTTPException(
+            status_code=404,
+            detail="Catalog not found or you don't have permission to access it"
+        )
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = "".join(ch if ch.isalnum() else "_" for ch in catalog.name) or f"catalog_{catalog.id}"
+    return StreamingResponse(
+        stream_export(catalog_query(catalog.id), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
+
 @router.delete("/{catalog_id}")
 async def delete_catalog(
     catalog_id: int,
     delete_flashcards: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a catalog and optionally its associated flashcards"""
     # Verify catalog exists and is owned by current user
-    catalog = db.query(Catalog).filter(
-        Catalog.id == catalog_id,
-        Catalog.owner_id == current_user.id
-    ).first()
+    catalog = await db.scalar(
+        select(Catalog)
+        .options(selectinload(Catalog.flashcards))
+        .where(
+            Catalog.id == catalog_id,
+            Catalog.owner_id == current_user.id
+        )
+    )
 
     if not catalog:
         raise HTTPException(
@@ -530,23 +457,32 @@ async def delete_catalog(
             detail="Catalog not found or you don't have permission to delete it"
         )
 
+    removed_fronts = {}
     try:
         if delete_flashcards:
             # Delete flashcards owned by the user in this catalog
-            flashcard_ids = [f.id for f in catalog.flashcards if f.owner_id == current_user.id]
+            owned = [f for f in catalog.flashcards if f.owner_id == current_user.id]
+            flashcard_ids = [f.id for f in owned]
+            for flashcard in owned:
+                removed_fronts.setdefault(flashcard.language_id, []).append(flashcard.front)
             if flashcard_ids:
-                db.query(Flashcard).filter(Flashcard.id.in_(flashcard_ids)).delete(synchronize_session=False)
+                await db.execute(
+                    delete(Flashcard).where(Flashcard.id.in_(flashcard_ids)),
+                    execution_options={"synchronize_session": False},
+                )
         
         # Delete the catalog (this will automatically delete catalog_flashcards entries due to CASCADE)
-        db.delete(catalog)
-        db.commit()
-        
+        await db.delete(catalog)
+        await db.commit()
+        for language_id, fronts in removed_fronts.items():
+            await asyncio.to_thread(record_removed, current_user.id, language_id, fronts)
+
         return {
             "message": f"Catalog '{catalog.name}' deleted successfully" + 
                       (f" along with {len(flashcard_ids)} flashcards" if delete_flashcards else "")
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail="Failed to delete catalog"
@@ -556,15 +492,15 @@ async def delete_catalog(
 async def remove_flashcard_from_catalog(
     catalog_id: int,
     flashcard_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Remove a flashcard from a catalog (owner only)"""
     # Verify catalog exists and is owned by current user
-    catalog = db.query(Catalog).filter(
+    catalog = await db.scalar(select(Catalog).where(
         Catalog.id == catalog_id,
         Catalog.owner_id == current_user.id
-    ).first()
+    ))
 
     if not catalog:
         raise HTTPException(
@@ -573,22 +509,22 @@ async def remove_flashcard_from_catalog(
         )
 
     # Remove the flashcard from the catalog
-    result = db.query(CatalogFlashcard).filter(
+    result = await db.execute(delete(CatalogFlashcard).where(
         CatalogFlashcard.catalog_id == catalog_id,
         CatalogFlashcard.flashcard_id == flashcard_id
-    ).delete()
+    ))
 
-    if result == 0:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=404,
             detail="Flashcard not found in this catalog"
         )
 
     try:
-        db.commit()
+        await db.commit()
         return {"message": "Flashcard removed from catalog successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail="Failed to remove flashcard from catalog"
@@ -1,43 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import or_, func, distinct, and_
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, distinct, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.database import get_db
 from app.models import Flashcard, UserFlashcard, User
-from app.models.catalog import CatalogFlashcard, Catalog, UserCatalogCollection, CatalogVisibility
-from app.models.sharing import CatalogShare
+from app.models.catalog import CatalogFlashcard, Catalog
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import PageParams, page_params, paginate
+from app.services.catalog_access import (
+    accessible_flashcard_ids,
+    collection_flashcard_ids,
+    public_catalog_ids,
+    shared_catalog_ids,
+)
+from app.services.catalog_export import EXPORT_FORMATS, collection_query, stream_export
+from app.services.near_duplicates import record_removed
 from typing import List
 
 router = APIRouter()
 
 @router.get("/all")
 async def get_all_flashcards(
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all flashcards the user has access to (owned + from accessible catalogs)"""
-    # Get accessible catalog IDs
-    accessible_catalog_ids = db.query(Catalog.id).filter(
-        or_(
-            Catalog.owner_id == current_user.id,  # Owned catalogs
-            Catalog.visibility == "public",  # Public catalogs
-            Catalog.id.in_(  # Shared catalogs
-                db.query(CatalogShare.catalog_id)
-                .filter(CatalogShare.shared_with_id == current_user.id)
-            )
-        )
-    ).all()
-    accessible_catalog_ids = [c[0] for c in accessible_catalog_ids]
-
-    # Get all flashcards from accessible catalogs
-    flashcards = db.query(Flashcard)\
-        .outerjoin(CatalogFlashcard)\
-        .filter(
-            or_(
-                Flashcard.owner_id == current_user.id,  # Owned flashcards
-                CatalogFlashcard.catalog_id.in_(accessible_catalog_ids)  # Flashcards from accessible catalogs
-            )
-        ).distinct().all()
+    """Get a page of the flashcards the user has access to (owned + from accessible catalogs)"""
+    after_id = page.after("flashcards_all")
+    flashcards = await paginate(
+        db, response, page, "flashcards_all",
+        select(Flashcard)
+        .options(selectinload(Flashcard.language), selectinload(Flashcard.owner))
+        .where(Flashcard.id.in_(accessible_flashcard_ids(current_user.id, after_id, page.limit + 1))),
+        Flashcard.id,
+        total_of=accessible_flashcard_ids(current_user.id),
+    )
 
     return [
         {
@@ -56,58 +56,45 @@ async def get_all_flashcards(
 
 @router.get("/stats")
 async def get_user_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get user's flashcard statistics"""
     # Count owned flashcards
-    owned_count = db.query(func.count(Flashcard.id)).filter(
+    owned_count = await db.scalar(select(func.count(Flashcard.id)).where(
         Flashcard.owner_id == current_user.id
-    ).scalar()
+    ))
 
     # Count owned catalogs
-    owned_catalogs = db.query(func.count(Catalog.id)).filter(
+    owned_catalogs = await db.scalar(select(func.count(Catalog.id)).where(
         Catalog.owner_id == current_user.id
-    ).scalar()
+    ))
 
     # Count shared catalogs (catalogs shared with current user)
-    shared_catalogs = db.query(func.count(Catalog.id)).filter(
-        Catalog.id.in_(
-            db.query(CatalogShare.catalog_id)
-            .filter(CatalogShare.shared_with_id == current_user.id)
-        )
-    ).scalar()
-
-    # Get accessible catalog IDs (public + shared)
-    accessible_catalog_ids = db.query(Catalog.id).filter(
-        or_(
-            Catalog.visibility == "public",
-            Catalog.id.in_(
-                db.query(CatalogShare.catalog_id)
-                .filter(CatalogShare.shared_with_id == current_user.id)
-            )
-        )
-    ).all()
-    accessible_catalog_ids = [c[0] for c in accessible_catalog_ids]
-
-    # Count shared flashcards (cards from accessible catalogs that user doesn't own)
-    shared_count = db.query(func.count(distinct(Flashcard.id)))\
-        .join(CatalogFlashcard)\
-        .filter(
+    shared_catalogs = await db.scalar(select(func.count(Catalog.id)).where(
+        Catalog.id.in_(shared_catalog_ids(current_user.id))
+    ))
+
+    # Count shared flashcards (cards from public or shared catalogs that user doesn't own)
+    shared_count = await db.scalar(
+        select(func.count(distinct(Flashcard.id)))
+        .join(CatalogFlashcard, CatalogFlashcard.flashcard_id == Flashcard.id)
+        .where(
             Flashcard.owner_id != current_user.id,
-            CatalogFlashcard.catalog_id.in_(accessible_catalog_ids)
-        ).scalar()
+            CatalogFlashcard.catalog_id.in_(union(public_catalog_ids(), shared_catalog_ids(current_user.id)))
+        )
+    )
 
     # Get cards due for review 
-    cards_to_review = db.query(func.count(UserFlashcard.id)).filter(
+    cards_to_review = await db.scalar(select(func.count(UserFlashcard.id)).where(
         UserFlashcard.user_id == current_user.id,
         UserFlashcard.next_review <= func.now()
-    ).scalar()
+    ))
 
     # Calculate average memory strength
-    avg_level = db.query(func.avg(UserFlashcard.memory_strength)).filter(
+    avg_level = await db.scalar(select(func.avg(UserFlashcard.memory_strength)).where(
         UserFlashcard.user_id == current_user.id
-    ).scalar()
+    ))
 
     return {
         "totalCards": owned_count + shared_count,
@@ -123,53 +110,39 @@ async def get_user_stats(
 
 @router.get("/collection/count")
 async def get_collection_flashcard_count(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get total number of unique flashcards from user's collection"""
     # Get count of all flashcards that are either:
     # 1. Owned by the user (regardless of catalog membership)
     # 2. From public catalogs in user's collection
-    count = db.query(func.count(distinct(Flashcard.id)))\
-        .outerjoin(CatalogFlashcard)\
-        .outerjoin(Catalog)\
-        .outerjoin(UserCatalogCollection)\
-        .filter(
-            or_(
-                Flashcard.owner_id == current_user.id,  # All owned flashcards
-                and_(
-                    Catalog.visibility == CatalogVisibility.PUBLIC,  # From public catalogs
-                    UserCatalogCollection.user_id == current_user.id  # That are in user's collection
-                )
-            )
-        ).scalar()
+    count = await db.scalar(
+        select(func.count()).select_from(collection_flashcard_ids(current_user.id).subquery())
+    )
 
     return {"count": count or 0}
 
 @router.get("/collection")
 async def get_collection_flashcards(
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all owned flashcards plus unique flashcards from user's collection"""
-    # Query all flashcards that are either:
+    """Get a page of the owned flashcards plus unique flashcards from user's collection"""
+    # Query flashcards that are either:
     # 1. Owned by the user (regardless of catalog membership)
     # 2. In catalogs that are in user's collection
-    flashcards = db.query(Flashcard)\
-        .outerjoin(CatalogFlashcard)\
-        .outerjoin(Catalog)\
-        .outerjoin(UserCatalogCollection)\
-        .filter(
-            or_(
-                Flashcard.owner_id == current_user.id,  # All owned flashcards
-                and_(
-                    Catalog.visibility == CatalogVisibility.PUBLIC,  # From public catalogs
-                    UserCatalogCollection.user_id == current_user.id  # That are in user's collection
-                )
-            )
-        )\
-        .distinct()\
-        .all()
+    after_id = page.after("flashcards_collection")
+    flashcards = await paginate(
+        db, response, page, "flashcards_collection",
+        select(Flashcard)
+        .options(selectinload(Flashcard.language), selectinload(Flashcard.owner))
+        .where(Flashcard.id.in_(collection_flashcard_ids(current_user.id, after_id, page.limit + 1))),
+        Flashcard.id,
+        total_of=collection_flashcard_ids(current_user.id),
+    )
 
     return [
         {
@@ -186,10 +159,23 @@ async def get_collection_flashcards(
         for f in flashcards
     ]
 
+@router.get("/collection/export")
+async def export_collection(
+    format: str = Query("csv", pattern="^(csv|jsonl|anki)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all owned flashcards plus those from the user's collection, with their quizzes"""
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(collection_query(current_user.id), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="collection.{extension}"'},
+    )
+
 @router.post("/delete")
 async def delete_flashcards(
     request: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete owned flashcards only"""
@@ -198,19 +184,25 @@ async def delete_flashcards(
         raise HTTPException(status_code=400, detail="No flashcard IDs provided")
 
     # Get all relevant flashcards that user owns
-    flashcards = db.query(Flashcard).filter(
+    flashcards = (await db.scalars(select(Flashcard).where(
         Flashcard.id.in_(flashcard_ids),
         Flashcard.owner_id == current_user.id
-    ).all()
+    ))).all()
 
     if not flashcards:
         raise HTTPException(status_code=404, detail="No flashcards found or you don't have permission to delete them")
 
+    removed_fronts = {}
+    for flashcard in flashcards:
+        removed_fronts.setdefault(flashcard.language_id, []).append(flashcard.front)
+
     try:
         for flashcard in flashcards:
-            db.delete(flashcard)
-        db.commit()
+            await db.delete(flashcard)
+        await db.commit()
+        for language_id, fronts in removed_fronts.items():
+            await asyncio.to_thread(record_removed, current_user.id, language_id, fronts)
         return {"message": "Flashcards deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete flashcards")
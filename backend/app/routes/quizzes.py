@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.quiz import Quiz, QuizType
 from app.models.flashcard import Flashcard
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import PageParams, page_params, paginate
 from datetime import datetime
 
 router = APIRouter()
@@ -12,16 +14,16 @@ router = APIRouter()
 @router.post("/")
 async def create_quiz(
     quiz_data: Dict[str, Any],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Create a new quiz attempt"""
     try:
         # Validate flashcard exists and user has access
-        flashcard = db.query(Flashcard).filter(
+        flashcard = await db.scalar(select(Flashcard).where(
             Flashcard.id == quiz_data["flashcard_id"],
             Flashcard.owner_id == current_user.id
-        ).first()
+        ))
         
         if not flashcard:
             raise HTTPException(status_code=404, detail="Flashcard not found or access denied")
@@ -35,19 +37,19 @@ async def create_quiz(
             score=quiz_data.get("score")
         )
         db.add(quiz)
-        db.commit()
-        db.refresh(quiz)
+        await db.commit()
+        await db.refresh(quiz)
         
         return {"message": "Quiz created successfully", "quiz_id": quiz.id}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/types")
-async def get_quiz_types(db: Session = Depends(get_db)):
+async def get_quiz_types(db: AsyncSession = Depends(get_db)):
     """Get list of available quiz types"""
     try:
-        quiz_types = db.query(QuizType).all()
+        quiz_types = (await db.scalars(select(QuizType))).all()
         return {
             "quiz_types": [{"id": qt.id, "name": qt.name} for qt in quiz_types]
         }
@@ -56,12 +58,20 @@ async def get_quiz_types(db: Session = Depends(get_db)):
 
 @router.get("/history")
 async def get_quiz_history(
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get user's quiz history"""
+    """Get a page of the user's quiz history, most recent first"""
+    page.after("quiz_history")  # Reject a bad cursor with 400, not the 500 below
     try:
-        quizzes = db.query(Quiz).filter(Quiz.user_id == current_user.id).all()
+        quizzes = await paginate(
+            db, response, page, "quiz_history",
+            select(Quiz).where(Quiz.user_id == current_user.id),
+            Quiz.id,
+            descending=True,
+        )
         return {
             "quizzes": [{
                 "id": q.id,
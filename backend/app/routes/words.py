@@ -1,16 +1,37 @@
-import json
-import httpx
-from typing import Any, Dict, List
+import asyncio
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies.auth import get_current_user
-from app.models.catalog import Catalog
 from app.models.flashcard import Flashcard
 from app.models.chat import Language
-from app.models.quiz import Quiz, QuizType
+from app.models.quiz import QuizType
 from app.config import get_settings
-from app.celery_app import validate_words_batch, generate_flashcards_batch, generate_quizzes_batch
+from app.celery_app import (
+    validate_words_batch,
+    generate_flashcards_batch,
+    generate_quizzes_for_flashcards,
+    start_bulk_quiz_generation,
+)
+from app.llm.batching import plan_quiz_batches
+from app.llm.instrumentation import get_metrics
+from app.services.flashcard_import import duplicate_policy, insert_flashcards
+from app.services.import_jobs import (
+    FAILED,
+    add_flashcards,
+    create_job,
+    flashcards_in_state,
+    get_job,
+    record_progress,
+)
+from app.services.near_duplicates import find_duplicates, record_added
+from app.services.upload_stream import UploadStats, iter_batches, iter_records, upload_format
+from app.services.word_jobs import job_state, load_job, stream_job_events, submit_job, wait_for_job
+from app.services.wordlists import prefilter_words
 from app.schemas.openai_schemas import (
     VALIDATE_SCHEMA,
     FLASHCARD_SCHEMA,
@@ -19,58 +40,78 @@ from app.schemas.openai_schemas import (
     RELATED_PHRASES_SCHEMA,
     QUIZ_TYPE_SCHEMAS,
 )
-from celery import group
 
 router = APIRouter()
 
 configs = {"app_config": get_settings()}
-clients = {
-    "openai": httpx.AsyncClient(
-        base_url="https://api.openai.com/v1",
-        headers={"Authorization": f"Bearer {configs['app_config'].OPENAI_API_KEY}"},
-        timeout=60.0
-    )
-}
-
-# Store import tasks in memory (in production, use Redis/database)
-import_tasks = {}
 
 @router.post("/txt/extract")
 async def extract_words_from_txt(file: UploadFile = File(...)):
-    if not file.filename.endswith(".txt"):
-        raise HTTPException(status_code=400, detail="Only .txt files are supported")
-    content = await file.read()
-    words = content.decode().splitlines()
-    words = list(set([w.strip() for w in words if w.strip()]))
+    fmt = upload_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Supported files: .txt, .csv, .tsv, .ndjson, .jsonl")
+    # Parsed chunk by chunk; duplicates are dropped on their normalized form
+    words = [front async for front, _ in iter_records(file, fmt, UploadStats())]
     return {"words": words}
 
+async def _language_or_400(db: AsyncSession, language_id: int) -> Language:
+    language = await db.scalar(select(Language).where(Language.id == language_id))
+    if not language:
+        raise HTTPException(status_code=400, detail="Invalid language ID")
+    # Callers go on to wait for LLM jobs or read an upload: give the connection
+    # back to the pool meanwhile (loaded attributes stay readable)
+    await db.close()
+    return language
+
+
+def _batches(words: List[str], size: int = 10) -> List[List[str]]:
+    return [words[i:i+size] for i in range(0, len(words), size)]
+
+
+async def _submit_validate(words: List[str], language: Language, owner_id: int) -> Dict[str, Any]:
+    """Settle what the wordlist can locally and dispatch the rest in batches of 10."""
+    prefiltered = await asyncio.to_thread(prefilter_words, words, language.name)
+    if configs["app_config"].LLM_METRICS_ENABLED:
+        metrics = get_metrics()
+        for outcome in ("accepted", "rejected", "ambiguous"):
+            count = len(getattr(prefiltered, outcome))
+            if count:
+                await asyncio.to_thread(
+                    metrics.inc, "wordlist_prefilter_total", count,
+                    {"language": language.name, "outcome": outcome},
+                )
+
+    signatures = [validate_words_batch.s(batch, language.name) for batch in _batches(prefiltered.ambiguous)]
+    return await asyncio.to_thread(submit_job, "validate", owner_id, signatures, prefiltered.accepted)
+
+
+async def _submit_flashcards(words: List[str], language: Language, owner_id: int) -> Dict[str, Any]:
+    signatures = [generate_flashcards_batch.s(batch, language.name) for batch in _batches(words)]
+    return await asyncio.to_thread(submit_job, "flashcards", owner_id, signatures)
+
+
 @router.post("/validate")
 async def validate_words(
     words: List[str], 
     language_id: int = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
 ):
-    """Validate words using LLM in batches with Celery tasks."""
+    """Validate words using LLM in batches with Celery tasks.
+
+    Words found in the language's wordlist are accepted and obvious garbage
+    is rejected locally; only the remaining words are sent to the LLM. The
+    request waits for the job without blocking the event loop; use
+    /validate/jobs to get results incrementally instead.
+    """
     try:
-        # Get language name
-        language = db.query(Language).filter(Language.id == language_id).first()
-        if not language:
-            raise HTTPException(status_code=400, detail="Invalid language ID")
-
-        # Split words into batches of 10
-        batches = [words[i:i+10] for i in range(0, len(words), 10)]
-        
-        # Create group of tasks
-        job = group(validate_words_batch.s(batch, language.name) for batch in batches)
-        result = job.apply_async()
-        
-        # Wait for all tasks to complete
-        batch_results = result.get(timeout=300)  # 5 minutes timeout
-        
-        # Combine results
-        valid_words = [word for batch in batch_results for word in batch]
-        return {"valid_words": valid_words}
+        language = await _language_or_400(db, language_id)
+        job = await _submit_validate(words, language, current_user.id)
+        state = await wait_for_job(job["job_id"], current_user.id, configs["app_config"].WORD_JOB_TIMEOUT_SECONDS)
+        return {"valid_words": state["valid_words"]}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error validating words: {str(e)}")
 
@@ -78,61 +119,133 @@ async def validate_words(
 async def generate_flashcards(
     words: List[str], 
     language_id: int = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
 ):
-    """Generate flashcards using LLM in batches with Celery tasks."""
+    """Generate flashcards using LLM in batches with Celery tasks.
+
+    Waits for the job without blocking the event loop; use
+    /generate-flashcards/jobs to get results incrementally instead.
+    """
     try:
-        # Get language name
-        language = db.query(Language).filter(Language.id == language_id).first()
-        if not language:
-            raise HTTPException(status_code=400, detail="Invalid language ID")
-
-        # Split words into batches of 10
-        batches = [words[i:i+10] for i in range(0, len(words), 10)]
-        
-        # Create group of tasks
-        job = group(generate_flashcards_batch.s(batch, language.name) for batch in batches)
-        result = job.apply_async()
-        
-        # Wait for all tasks to complete
-        batch_results = result.get(timeout=300)  # 5 minutes timeout
-        
-        # Combine results
-        flashcards = [card for batch in batch_results for card in batch]
-        return {"flashcards": flashcards}
+        language = await _language_or_400(db, language_id)
+        job = await _submit_flashcards(words, language, current_user.id)
+        state = await wait_for_job(job["job_id"], current_user.id, configs["app_config"].WORD_JOB_TIMEOUT_SECONDS)
+        return {"flashcards": state["flashcards"]}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating flashcards: {str(e)}")
 
+@router.post("/validate/jobs", status_code=202)
+async def submit_validate_job(
+    words: List[str],
+    language_id: int = Query(...),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Start validating words and return a job id immediately."""
+    language = await _language_or_400(db, language_id)
+    return await _submit_validate(words, language, current_user.id)
+
+@router.post("/generate-flashcards/jobs", status_code=202)
+async def submit_flashcards_job(
+    words: List[str],
+    language_id: int = Query(...),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Start generating flashcards and return a job id immediately."""
+    language = await _language_or_400(db, language_id)
+    return await _submit_flashcards(words, language, current_user.id)
+
+@router.get("/jobs/{job_id}")
+async def get_word_job(job_id: str, current_user=Depends(get_current_user)):
+    """Job status with the results of every batch finished so far."""
+    state = await asyncio.to_thread(job_state, job_id, current_user.id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return state
+
+@router.get("/jobs/{job_id}/events")
+async def stream_word_job(job_id: str, current_user=Depends(get_current_user)):
+    """Server-Sent Events with each batch's results as soon as it finishes."""
+    job = await asyncio.to_thread(load_job, job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        stream_job_events(job_id, job, configs["app_config"].WORD_JOB_TIMEOUT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/check-duplicates")
 async def check_duplicates(
     words: List[str],
-    db: Session = Depends(get_db),
+    language_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    existing_words = (
-        db.query(Flashcard.front)
-        .filter(Flashcard.owner_id == current_user.id)
-        .filter(Flashcard.front.in_(words))
-        .all()
+    """Words the user already has (ignoring case, spacing and punctuation), and near duplicates.
+
+    Without ``language_id`` every language the user has flashcards in is checked.
+    """
+    if language_id is not None:
+        language_ids = [language_id]
+    else:
+        language_ids = (await db.scalars(
+            select(Flashcard.language_id)
+            .where(Flashcard.owner_id == current_user.id)
+            .distinct()
+        )).all()
+    # The index services are synchronous; run_sync hands them the session's sync facade
+    duplicates, near_duplicates = await db.run_sync(
+        lambda session: find_duplicates(session, current_user.id, language_ids, words)
     )
-    duplicates = [word[0] for word in existing_words]
-    return {"duplicates": duplicates, "has_duplicates": len(duplicates) > 0}
+    return {
+        "duplicates": duplicates,
+        "near_duplicates": near_duplicates,
+        "has_duplicates": len(duplicates) > 0,
+    }
 
 @router.get("/languages")
-async def get_languages(db: Session = Depends(get_db)):
+async def get_languages(db: AsyncSession = Depends(get_db)):
     """Get list of available languages"""
     try:
-        languages = db.query(Language).order_by(Language.name).all()
+        languages = (await db.scalars(select(Language).order_by(Language.name))).all()
         return {"languages": [{"id": lang.id, "name": lang.name} for lang in languages]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching languages: {str(e)}")
 
+def _dispatch_quiz_batches(
+    flashcards: List[Dict[str, Any]], quiz_types: List[str], task_id: str, user_id: int, language_id: int
+) -> None:
+    """Queue real-time quiz generation, several flashcards per task."""
+    app_config = configs["app_config"]
+    quiz_batches = plan_quiz_batches(
+        flashcards,
+        len(quiz_types),
+        app_config.QUIZ_BATCH_TOKEN_BUDGET,
+        app_config.QUIZ_BATCH_MAX_FLASHCARDS,
+        app_config.QUIZ_OUTPUT_TOKENS_PER_TYPE,
+    )
+    for batch in quiz_batches:
+        generate_quizzes_for_flashcards.delay(
+            flashcards=batch,
+            quiz_types=quiz_types,
+            import_id=task_id,
+            user_id=user_id,
+            language_id=language_id,
+        )
+
 @router.post("/import")
 async def import_words(
     language_id: int = Query(...),
+    mode: str = Query("auto", pattern="^(auto|realtime|bulk)$"),
+    on_duplicate: Optional[str] = Query(None, pattern="^(allow|skip)$"),
     body: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     words = body.get("words")
@@ -142,128 +255,212 @@ async def import_words(
         raise HTTPException(status_code=400, detail="No words provided in request body")
 
     try:
-        imported_words = []
-        quiz_types = [quiz_type.name for quiz_type in db.query(QuizType).all()]
-        
-        # Create flashcards first
-        flashcard_quiz_tasks = []
-        for word in words:
-            front = word["front"]
-            back = word["back"]
-            
-            # Create flashcard
-            flashcard = Flashcard(
-                front=front,
-                back=back,
+        quiz_types = (await db.scalars(select(QuizType.name))).all()
+
+        # Flashcards and catalog links go in with a fixed number of statements
+        imported = await db.run_sync(lambda session: insert_flashcards(
+            session,
+            current_user.id,
+            language_id,
+            words,
+            catalog_ids,
+            on_duplicate=duplicate_policy(session, current_user.id, on_duplicate),
+        ))
+        new_flashcards = imported.flashcards
+        imported_words = [flashcard["front"] for flashcard in new_flashcards]
+        if not new_flashcards:
+            return {
+                "status": "completed",
+                "message": "All words already exist. Nothing was imported.",
+                "imported_words": [],
+                "skipped_words": imported.skipped,
+            }
+
+        # Large imports trade latency for cost: their prompts go through batch files
+        app_config = configs["app_config"]
+        bulk = mode == "bulk" or (
+            mode == "auto"
+            and app_config.QUIZ_BULK_MODE_MIN_FLASHCARDS > 0
+            and len(new_flashcards) >= app_config.QUIZ_BULK_MODE_MIN_FLASHCARDS
+        )
+
+        await db.commit()  # Commit flashcards and catalog links before workers reference them
+        await asyncio.to_thread(record_added, current_user.id, language_id, imported_words)
+
+        # The job is registered before any worker can report progress on it
+        task_id = await asyncio.to_thread(
+            create_job,
+            current_user.id,
+            language_id,
+            [flashcard["flashcard_id"] for flashcard in new_flashcards],
+            "bulk" if bulk else "realtime",
+        )
+        await asyncio.to_thread(get_metrics().set_summary_fields, task_id, {"user_id": str(current_user.id)})
+
+        # Workers store the quizzes themselves and update the progress counters
+        if bulk:
+            await asyncio.to_thread(
+                start_bulk_quiz_generation.delay,
+                flashcards=new_flashcards,
+                quiz_types=quiz_types,
+                import_id=task_id,
+                user_id=current_user.id,
                 language_id=language_id,
-                owner_id=current_user.id,
             )
-            db.add(flashcard)
-            db.flush()  # Get flashcard ID
-            
-            # Link to catalogs if any
-            if catalog_ids:
-                for catalog_id in catalog_ids:
-                    catalog = (
-                        db.query(Catalog)
-                        .filter(
-                            Catalog.id == catalog_id,
-                            Catalog.owner_id == current_user.id,
-                        )
-                        .first()
-                    )
-                    if catalog:
-                        flashcard.catalogs.append(catalog)
-            
-            # Start quiz generation task
-            task = generate_quizzes_batch.delay(
-                flashcard={"front": front, "back": back},
-                quiz_types=quiz_types
+        else:
+            await asyncio.to_thread(
+                _dispatch_quiz_batches, new_flashcards, quiz_types, task_id, current_user.id, language_id
             )
-            flashcard_quiz_tasks.append((flashcard.id, task))
-            imported_words.append(front)
-
-        db.commit()  # Commit flashcards and catalog links immediately
-
-        # Store tasks for status checking
-        task_id = f"import_{current_user.id}_{language_id}_{len(import_tasks)}"
-        import_tasks[task_id] = {
-            "tasks": flashcard_quiz_tasks,
-            "total": len(flashcard_quiz_tasks),
-            "completed": 0,
-            "user_id": current_user.id,
-            "language_id": language_id  # Store language_id in task info
-        }
 
         return {
             "status": "processing",
             "task_id": task_id,
+            "mode": "bulk" if bulk else "realtime",
             "message": f"Started importing {len(imported_words)} words. Quizzes are being generated.",
             "imported_words": imported_words,
+            "skipped_words": imported.skipped,
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/upload")
+async def upload_words(
+    file: UploadFile = File(...),
+    language_id: int = Query(...),
+    action: str = Query("import", pattern="^(validate|import)$"),
+    catalog_ids: List[int] = Query([]),
+    on_duplicate: Optional[str] = Query(None, pattern="^(allow|skip)$"),
+    quizzes: bool = Query(True),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Stream a .txt, .csv, .tsv or .ndjson vocabulary file into validation or import.
+
+    The file is parsed chunk by chunk and handled in UPLOAD_BATCH_SIZE batches
+    as it arrives, so memory does not grow with the file:
+
+    - ``action=validate``: every batch of fronts becomes a validation job
+      (see /validate/jobs); the job ids are returned for polling.
+    - ``action=import``: front/back pairs are inserted and committed batch by
+      batch under one import task, whose quizzes are generated as usual.
+      Records without a back are counted in ``missing_back``.
+    """
+    fmt = upload_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Supported files: .txt, .csv, .tsv, .ndjson, .jsonl")
+    language = await _language_or_400(db, language_id)
+    stats = UploadStats()
+    records = iter_records(file, fmt, stats)
+
+    try:
+        if action == "validate":
+            job_ids = []
+            async for batch in iter_batches(records, configs["app_config"].UPLOAD_BATCH_SIZE):
+                job = await _submit_validate([front for front, _ in batch], language, current_user.id)
+                job_ids.append(job["job_id"])
+            return {"jobs": job_ids, "stats": asdict(stats)}
+
+        quiz_types = (await db.scalars(select(QuizType.name))).all() if quizzes else []
+        policy = await db.run_sync(lambda session: duplicate_policy(session, current_user.id, on_duplicate))
+        await db.close()  # Not held while the first batch is read; each batch commits on its own
+        task_id, imported, skipped, missing_back = None, 0, 0, 0
+        async for batch in iter_batches(records, configs["app_config"].UPLOAD_BATCH_SIZE):
+            words = [{"front": front, "back": back} for front, back in batch if back]
+            missing_back += len(batch) - len(words)
+            if not words:
+                continue
+            result = await db.run_sync(
+                lambda session: insert_flashcards(session, current_user.id, language_id, words, catalog_ids, on_duplicate=policy)
+            )
+            await db.commit()
+            skipped += len(result.skipped)
+            if not result.flashcards:
+                continue
+            await asyncio.to_thread(
+                record_added, current_user.id, language_id, [flashcard["front"] for flashcard in result.flashcards]
+            )
+            imported += len(result.flashcards)
+
+            flashcard_ids = [flashcard["flashcard_id"] for flashcard in result.flashcards]
+            if task_id is None:
+                task_id = await asyncio.to_thread(create_job, current_user.id, language_id, flashcard_ids, "realtime")
+                await asyncio.to_thread(get_metrics().set_summary_fields, task_id, {"user_id": str(current_user.id)})
+            else:
+                await asyncio.to_thread(add_flashcards, task_id, flashcard_ids)
+            if quiz_types:
+                await asyncio.to_thread(
+                    _dispatch_quiz_batches, result.flashcards, quiz_types, task_id, current_user.id, language_id
+                )
+            else:
+                await asyncio.to_thread(record_progress, task_id, completed_ids=flashcard_ids)
+
+        return {
+            "status": "processing" if task_id and quiz_types else "completed",
+            "task_id": task_id,
+            "imported": imported,
+            "skipped": skipped,
+            "missing_back": missing_back,
+            "stats": asdict(stats),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Batches committed before the error stay imported
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/import/{task_id}/status")
 async def get_import_status(
     task_id: str,
-    db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     """Check the status of an import task"""
-    if task_id not in import_tasks:
+    # Workers persist quizzes themselves; this only reads the job's counters
+    try:
+        job = await asyncio.to_thread(get_job, task_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if job is None:
         raise HTTPException(status_code=404, detail="Import task not found")
-    
-    task_info = import_tasks[task_id]
-    if task_info["user_id"] != current_user.id:
+    if job["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to check this import task")
 
-    # Check task status and save completed quizzes
-    try:
-        # Get quiz type IDs mapping
-        quiz_type_map = {
-            qt.name: qt.id 
-            for qt in db.query(QuizType).all()
-        }
-        
-        completed = 0
-        for flashcard_id, task in task_info["tasks"]:
-            if task.ready():
-                if not task.failed():
-                    # Save quizzes if not already saved
-                    quizzes = task.get()
-                    for quiz_data in quizzes:
-                        quiz = Quiz(
-                            flashcard_id=flashcard_id,
-                            quiz_type_id=quiz_type_map[quiz_data["type"]],
-                            content=json.dumps(quiz_data["content"]),
-                            user_id=current_user.id,
-                            language_id=task_info["language_id"]
-                        )
-                        db.add(quiz)
-                completed += 1
-
-        task_info["completed"] = completed
-        progress = (completed / task_info["total"]) * 100
-
-        if completed == task_info["total"]:
-            db.commit()
-            # Clean up completed task
-            del import_tasks[task_id]
-            return {
-                "status": "completed",
-                "progress": 100,
-                "message": "Import completed successfully"
-            }
-        
+    completed = job["completed"] + job["failed"]
+    progress = (completed / job["total"]) * 100 if job["total"] else 100
+
+    if completed >= job["total"]:
+        failed_ids = await asyncio.to_thread(flashcards_in_state, task_id, FAILED) if job["failed"] else []
         return {
-            "status": "processing",
-            "progress": progress,
-            "message": f"Processing... {completed}/{task_info['total']} words completed"
+            "status": "completed",
+            "progress": 100,
+            "failed": job["failed"],
+            "failed_flashcard_ids": failed_ids,
+            "quizzes": job["quizzes"],
+            "message": "Import completed successfully"
         }
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "processing",
+        "progress": progress,
+        "failed": job["failed"],
+        "quizzes": job["quizzes"],
+        "message": f"Processing... {completed}/{job['total']} words completed"
+    }
+
+
+@router.get("/import/{task_id}/metrics")
+async def get_import_metrics(
+    task_id: str,
+    current_user=Depends(get_current_user),
+):
+    """LLM latency, token and cost summary of an import"""
+    summary = await asyncio.to_thread(get_metrics().summary, task_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="No metrics recorded for this import")
+    if summary.pop("user_id", None) != str(current_user.id):
+        raise HTTPException(status_code=403, detail="Not authorized to view this import")
+    return {"task_id": task_id, "metrics": {key: float(value) for key, value in sorted(summary.items())}}
@@ -37,7 +37,10 @@ class CatalogBase(BaseModel):
     created_at: datetime
     owner: CatalogOwner
     target_language: str
+    is_owner: Optional[bool] = None
+    is_shared: Optional[bool] = None
     is_in_collection: Optional[bool] = None
+    flashcard_count: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -60,6 +60,30 @@ RELATED_PHRASES_SCHEMA = {
     "additionalProperties": False,
 }
 
+# Schema for analysing several flashcards at once (word type + relations + phrases)
+WORD_ANALYSIS_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "type": {"type": "string", "enum": ["word", "phrase"]},
+                    "synonyms": {"type": "array", "items": {"type": "string"}},
+                    "antonyms": {"type": "array", "items": {"type": "string"}},
+                    "phrases": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["index", "type", "synonyms", "antonyms", "phrases"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["items"],
+    "additionalProperties": False,
+}
+
 # Schemas for different quiz types
 QUIZ_TYPE_SCHEMAS = {
     "Definition-to-Word (Multiple-Choice)": {
@@ -180,4 +204,48 @@ QUIZ_TYPE_SCHEMAS = {
         "required": ["statement", "correct_answer"],
         "additionalProperties": False,
     },
-}
\ No newline at end of file
+}
+
+def quiz_schema_key(quiz_type: str) -> str:
+    """Property name used for a quiz type inside a combined schema,
+    e.g. "Open-Ended Cloze (Cloze)" -> "open_ended_cloze_cloze"."""
+    return "_".join("".join(c.lower() if c.isalnum() else " " for c in quiz_type).split())
+
+
+def build_combined_quiz_schema(quiz_types):
+    """Build a strict schema holding one quiz per requested type.
+
+    Each quiz type becomes a required property (keyed by ``quiz_schema_key``)
+    whose value follows that type's schema from QUIZ_TYPE_SCHEMAS.
+    """
+    return {
+        "type": "object",
+        "properties": {quiz_schema_key(qt): QUIZ_TYPE_SCHEMAS[qt] for qt in quiz_types},
+        "required": [quiz_schema_key(qt) for qt in quiz_types],
+        "additionalProperties": False,
+    }
+
+
+def build_batch_quiz_schema(quiz_types):
+    """Build a strict schema holding the combined quizzes of several flashcards.
+
+    Every item carries the ``index`` of its flashcard in the prompt so the
+    results can be mapped back regardless of the order they come back in.
+    """
+    combined = build_combined_quiz_schema(quiz_types)
+    return {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"index": {"type": "integer"}, **combined["properties"]},
+                    "required": ["index", *combined["required"]],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["items"],
+        "additionalProperties": False,
+    }
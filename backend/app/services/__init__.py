@@ -0,0 +1,4 @@
+"""
+File        : services/__init__.py
+Description : Domain services shared by the API routes and the Celery workers
+"""
@@ -0,0 +1,245 @@
+"""
+File        : services/bulk_quizzes.py
+Description : Quiz generation for large imports through batch files
+
+Runs the same grouped prompts as ``generate_quizzes_for_batch`` in two
+batch stages instead of real-time requests:
+
+    stage 1: word analysis + quiz types that need only word and meaning
+    stage 2: quiz types that need synonyms/antonyms/phrases from stage 1
+
+Job files live in ``LLM_BATCH_DIR/<import_id>/``, which must be shared by
+the workers. Malformed or missing answers are dropped rather than retried
+in real time; ``generate_quizzes_for_flashcards`` remains the path for
+imports that need every quiz type. When a whole stage 2 batch fails, its
+quiz types are generated in real time instead, since stage 1 is saved.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.globals import clients, configs
+from app.llm.batch import (
+    FINISHED_STATES,
+    BatchBackend,
+    BatchRequest,
+    create_batch_backend,
+    read_batch_results,
+    write_batch_file,
+)
+from app.llm.batching import plan_quiz_batches
+from app.llm.providers import LLMUsage
+from app.llm.quizzes import (
+    is_valid_quiz,
+    local_word_type,
+    needs_word_info,
+    parse_quiz_set_batch,
+    parse_word_analysis,
+    quiz_context,
+    quiz_set_batch_prompt,
+    word_analysis_prompt,
+)
+from app.services.distractors import build_local_quiz, get_corpus, local_quiz_types
+
+
+def get_batch_backend() -> BatchBackend:
+    if "batch_backend" not in clients:
+        clients["batch_backend"] = create_batch_backend(configs["app_config"])
+    return clients["batch_backend"]
+
+
+def _job_dir(import_id: str) -> str:
+    return os.path.join(configs["app_config"].LLM_BATCH_DIR, import_id)
+
+
+def _load(import_id: str, name: str) -> Any:
+    with open(os.path.join(_job_dir(import_id), name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(import_id: str, name: str, value: Any) -> None:
+    path = os.path.join(_job_dir(import_id), name)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _to_analyze(chunk: List[Dict[str, Any]]) -> List[int]:
+    # Known phrases need no analysis, as in generate_quizzes_for_batch
+    return [i for i, fc in enumerate(chunk) if local_word_type(fc["front"]) != "phrase"]
+
+
+def _prompt_request(custom_id: str, prompt: Tuple[str, str, str, Dict]) -> BatchRequest:
+    return BatchRequest(custom_id, *prompt)
+
+
+def _submit(import_id: str, stage: int, requests: List[BatchRequest]) -> Optional[str]:
+    """Write and submit one stage; None when the stage has no requests."""
+    if not requests:
+        return None
+    path = os.path.join(_job_dir(import_id), f"stage{stage}.input.jsonl")
+    write_batch_file(path, requests, configs["app_config"].OPENAI_MODEL)
+    return get_batch_backend().submit(path)
+
+
+def start_bulk_job(
+    import_id: str, flashcards: List[Dict[str, Any]], quiz_types: List[str], user_id: int, language_id: int
+) -> Dict[str, Any]:
+    """Write the stage 1 batch file for ``flashcards``, submit it and return the job state."""
+    app_config = configs["app_config"]
+    os.makedirs(_job_dir(import_id), exist_ok=True)
+    chunks = plan_quiz_batches(
+        flashcards,
+        len(quiz_types),
+        app_config.QUIZ_BATCH_TOKEN_BUDGET,
+        app_config.QUIZ_BATCH_MAX_FLASHCARDS,
+        app_config.QUIZ_OUTPUT_TOKENS_PER_TYPE,
+    )
+    # Types the distractor corpus covers are assembled locally in stage 1
+    local_types = local_quiz_types(quiz_types, get_corpus(user_id, language_id))
+    basic_types = [qt for qt in quiz_types if not needs_word_info(qt) and qt not in local_types]
+    _save(import_id, "chunks.json", chunks)
+
+    requests = []
+    for index, chunk in enumerate(chunks):
+        to_analyze = _to_analyze(chunk)
+        if to_analyze:
+            requests.append(_prompt_request(f"analysis:{index}", word_analysis_prompt([chunk[i] for i in to_analyze])))
+        prompt = quiz_set_batch_prompt(chunk, basic_types)
+        if prompt:
+            requests.append(_prompt_request(f"basic:{index}", prompt))
+
+    state = {
+        "import_id": import_id,
+        "user_id": user_id,
+        "language_id": language_id,
+        "quiz_types": quiz_types,
+        "local_types": local_types,
+        "total": len(flashcards),
+        "flashcard_ids": [flashcard["flashcard_id"] for flashcard in flashcards],
+        "stage": 1,
+        "batch_id": _submit(import_id, 1, requests),
+    }
+    _save(import_id, "state.json", state)
+    return state
+
+
+def _read_stage(import_id: str, stage: int, batch_id: str) -> Dict[str, Any]:
+    """Download a finished stage and return its answers keyed by custom_id, plus usage."""
+    path = os.path.join(_job_dir(import_id), f"stage{stage}.output.jsonl")
+    get_batch_backend().download(batch_id, path)
+    answers, usage, errors = {}, LLMUsage(), 0
+    for result in read_batch_results(path):
+        usage.input_tokens += result.usage.input_tokens
+        usage.output_tokens += result.usage.output_tokens
+        if result.data is None:
+            errors += 1
+        else:
+            answers[result.custom_id] = result.data
+    return {"answers": answers, "usage": usage, "errors": errors}
+
+
+def _valid_quizzes(
+    chunks: List[List[Dict[str, Any]]],
+    generated: Dict[int, Dict[int, Dict]],
+    word_infos: Optional[Dict[int, Dict[int, Dict]]] = None,
+) -> List[Dict[str, Any]]:
+    """Quizzes that pass ``is_valid_quiz`` (and have their context), in save format."""
+    results = []
+    for index, chunk in enumerate(chunks):
+        per_card = generated.get(index, {})
+        for i, flashcard in enumerate(chunk):
+            info = word_infos[index].get(i, {}) if word_infos is not None else None
+            quizzes = [
+                {"type": qt, "content": content}
+                for qt, content in per_card.get(i, {}).items()
+                if is_valid_quiz(qt, content) and (info is None or quiz_context(qt, info) is not None)
+            ]
+            if quizzes:
+                results.append({"flashcard_id": flashcard["flashcard_id"], "quizzes": quizzes})
+    return results
+
+
+def job_chunks(import_id: str) -> List[List[Dict[str, Any]]]:
+    """The job's flashcards, grouped as in its batch files."""
+    return _load(import_id, "chunks.json")
+
+
+def start_stage_two(import_id: str, step: Dict[str, Any]) -> None:
+    """Submit stage 2 of a "stage_done" ``step``; call once its results are committed."""
+    state = step["state"]
+    state.update({"stage": 2, "batch_id": _submit(import_id, 2, step["stage_two_requests"])})
+    _save(import_id, "state.json", state)
+
+
+def advance_bulk_job(import_id: str) -> Dict[str, Any]:
+    """Check the job's current batch and move it forward.
+
+    Returns ``{"status", "results", "usage", "failed_requests", "state"}`` where status is
+    "running" (poll again later), "stage_done" (results to save, then
+    ``start_stage_two``), "done" (results to save, finished) or "failed".
+
+    Stage 1 does not move the job on by itself: until ``start_stage_two``
+    runs, every poll replays the finished stage 1 batch, so its quizzes are
+    not lost if the worker dies before they are committed.
+    """
+    state = _load(import_id, "state.json")
+    quiz_types = state["quiz_types"]
+    result = {"status": "running", "results": [], "usage": LLMUsage(), "failed_requests": 0, "state": state}
+
+    if state["batch_id"]:
+        status = get_batch_backend().status(state["batch_id"])
+        if status not in FINISHED_STATES:
+            return result
+        if status != "completed":
+            result["status"] = "failed"
+            result["error"] = f"Batch {state['batch_id']} ended as {status}"
+            return result
+        stage = _read_stage(import_id, state["stage"], state["batch_id"])
+        answers, result["usage"], result["failed_requests"] = stage["answers"], stage["usage"], stage["errors"]
+    else:
+        answers = {}
+
+    chunks = _load(import_id, "chunks.json")
+    if state["stage"] == 1:
+        local_types = state["local_types"]
+        corpus = get_corpus(state["user_id"], state["language_id"]) if local_types else None
+        basic_types = [qt for qt in quiz_types if not needs_word_info(qt) and qt not in local_types]
+        context_types = [qt for qt in quiz_types if needs_word_info(qt)]
+        word_infos, generated, requests = {}, {}, []
+        for index, chunk in enumerate(chunks):
+            to_analyze = _to_analyze(chunk)
+            infos = dict.fromkeys(set(range(len(chunk))) - set(to_analyze), {})
+            if f"analysis:{index}" in answers:
+                subset = parse_word_analysis(answers[f"analysis:{index}"], len(to_analyze))
+                infos.update({to_analyze[i]: info for i, info in subset.items()})
+            word_infos[index] = infos
+            if f"basic:{index}" in answers:
+                generated[index] = parse_quiz_set_batch(answers[f"basic:{index}"], basic_types, len(chunk))
+            if corpus is not None:
+                for i, flashcard in enumerate(chunk):
+                    card = generated.setdefault(index, {}).setdefault(i, {})
+                    for quiz_type in local_types:
+                        card[quiz_type] = build_local_quiz(quiz_type, flashcard, corpus, card)
+            prompt = quiz_set_batch_prompt(chunk, context_types, infos)
+            if prompt:
+                requests.append(_prompt_request(f"context:{index}", prompt))
+
+        result["results"] = _valid_quizzes(chunks, generated)
+        _save(import_id, "word_infos.json", [
+            [word_infos[index].get(i, {}) for i in range(len(chunk))] for index, chunk in enumerate(chunks)
+        ])
+        result["stage_two_requests"] = requests
+        result["status"] = "stage_done"
+        return result
+
+    context_types = [qt for qt in quiz_types if needs_word_info(qt)]
+    generated = {}
+    for custom_id, data in answers.items():
+        index = int(custom_id.split(":", 1)[1])
+        generated[index] = parse_quiz_set_batch(data, context_types, len(chunks[index]))
+    word_infos = {index: dict(enumerate(infos)) for index, infos in enumerate(_load(import_id, "word_infos.json"))}
+    result["results"] = _valid_quizzes(chunks, generated, word_infos)
+    result["status"] = "done"
+    return result
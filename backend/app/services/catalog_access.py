@@ -0,0 +1,105 @@
+"""
+File        : services/catalog_access.py
+Description : Id subqueries for the catalogs and flashcards a user can reach
+
+A filter like ``owner_id = :user OR visibility = 'public' OR id IN (shares)``
+cannot use an index for any of its branches, so Postgres scans the whole
+table. Each helper here returns one indexed lookup per access path, combined
+with UNION, to be used as ``Model.id.in_(...)``:
+
+  accessible  owned + public + shared with the user
+  collection  owned + shared + public catalogs the user added to their collection
+
+For keyset pagination, ``after_id``/``limit`` narrow every branch to its
+first ``limit`` ids after ``after_id``: the first ``limit`` ids of the union
+are among them, so a page never has to collect every id the user can reach.
+"""
+
+from typing import Optional
+
+from sqlalchemy import CompoundSelect, Select, select, union
+
+from app.models.catalog import Catalog, CatalogFlashcard, CatalogVisibility, UserCatalogCollection
+from app.models.flashcard import Flashcard
+from app.models.sharing import CatalogShare
+
+
+def _keyset(stmt: Select, key, after_id: Optional[int], limit: Optional[int]) -> Select:
+    """``stmt`` (selecting ``key``) restricted to its first ``limit`` distinct keys after ``after_id``."""
+    if after_id is not None:
+        stmt = stmt.where(key > after_id)
+    if limit is None:
+        return stmt
+    # Wrapped, as SQLite does not allow LIMIT inside a UNION branch
+    page = stmt.distinct().order_by(key).limit(limit).subquery()
+    return select(page.c[0])
+
+
+def owned_catalog_ids(user_id: int) -> Select:
+    return select(Catalog.id).where(Catalog.owner_id == user_id)
+
+
+def public_catalog_ids() -> Select:
+    return select(Catalog.id).where(Catalog.visibility == CatalogVisibility.PUBLIC)
+
+
+def shared_catalog_ids(user_id: int) -> Select:
+    return select(CatalogShare.catalog_id).where(CatalogShare.shared_with_id == user_id)
+
+
+def collected_catalog_ids(user_id: int) -> Select:
+    return select(UserCatalogCollection.catalog_id).where(UserCatalogCollection.user_id == user_id)
+
+
+def accessible_catalog_ids(
+    user_id: int, after_id: Optional[int] = None, limit: Optional[int] = None
+) -> CompoundSelect:
+    return union(
+        _keyset(owned_catalog_ids(user_id), Catalog.id, after_id, limit),
+        _keyset(public_catalog_ids(), Catalog.id, after_id, limit),
+        _keyset(shared_catalog_ids(user_id), CatalogShare.catalog_id, after_id, limit),
+    )
+
+
+def collection_catalog_ids(user_id: int) -> CompoundSelect:
+    return union(owned_catalog_ids(user_id), shared_catalog_ids(user_id), collected_catalog_ids(user_id))
+
+
+def owned_flashcard_ids(user_id: int) -> Select:
+    return select(Flashcard.id).where(Flashcard.owner_id == user_id)
+
+
+def public_flashcard_ids() -> Select:
+    """Flashcards of public catalogs."""
+    return select(CatalogFlashcard.flashcard_id).where(CatalogFlashcard.catalog_id.in_(public_catalog_ids()))
+
+
+def accessible_flashcard_ids(
+    user_id: int, after_id: Optional[int] = None, limit: Optional[int] = None
+) -> CompoundSelect:
+    """Owned flashcards plus those of every catalog the user can access."""
+    return union(
+        _keyset(owned_flashcard_ids(user_id), Flashcard.id, after_id, limit),
+        _keyset(
+            select(CatalogFlashcard.flashcard_id).where(CatalogFlashcard.catalog_id.in_(accessible_catalog_ids(user_id))),
+            CatalogFlashcard.flashcard_id, after_id, limit,
+        ),
+    )
+
+
+def collection_flashcard_ids(
+    user_id: int, after_id: Optional[int] = None, limit: Optional[int] = None
+) -> CompoundSelect:
+    """Owned flashcards plus those of public catalogs in the user's collection."""
+    return union(
+        _keyset(owned_flashcard_ids(user_id), Flashcard.id, after_id, limit),
+        _keyset(
+            select(CatalogFlashcard.flashcard_id)
+            .join(Catalog, Catalog.id == CatalogFlashcard.catalog_id)
+            .where(
+                Catalog.visibility == CatalogVisibility.PUBLIC,
+                Catalog.id.in_(collected_catalog_ids(user_id)),
+            ),
+            CatalogFlashcard.flashcard_id, after_id, limit,
+        ),
+    )
@@ -0,0 +1,143 @@
+"""
+File        : services/catalog_export.py
+Description : Streaming export of catalogs and collections as CSV, JSONL or Anki text
+
+Rows come from one query (flashcards left-joined to the quizzes their
+owner generated, ordered by flashcard) read through a server-side cursor
+(``yield_per``), and output is written in EXPORT_CHUNK_BYTES pieces, so
+memory does not depend on the number of flashcards.
+
+The generators open their own session: the request's session is closed
+before a streaming response starts sending.
+
+Formats:
+  csv    id, front, back, language, quizzes (JSON object keyed by quiz type)
+  jsonl  one {"id", "front", "back", "language", "quizzes"} object per line
+  anki   Anki's tab-separated text import format (File > Import) with
+         Front, Back and Quizzes (HTML) fields and the language as tag
+"""
+
+import csv
+import html
+import io
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import Select, and_, select
+
+from app.database import SessionLocal
+from app.globals import configs
+from app.models.catalog import CatalogFlashcard
+from app.models.chat import Language
+from app.models.flashcard import Flashcard
+from app.models.quiz import Quiz, QuizType
+from app.services.catalog_access import collection_flashcard_ids
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "anki": ("text/tab-separated-values; charset=utf-8", "txt"),
+}
+
+
+def _export_query(flashcard_filter) -> Select:
+    return (
+        select(
+            Flashcard.id,
+            Flashcard.front,
+            Flashcard.back,
+            Language.name,
+            QuizType.name,
+            Quiz.content,
+        )
+        .join(Language, Language.id == Flashcard.language_id)
+        .outerjoin(Quiz, and_(Quiz.flashcard_id == Flashcard.id, Quiz.user_id == Flashcard.owner_id))
+        .outerjoin(QuizType, QuizType.id == Quiz.quiz_type_id)
+        .where(flashcard_filter)
+        .order_by(Flashcard.id, Quiz.id)
+    )
+
+
+def catalog_query(catalog_id: int) -> Select:
+    return _export_query(Flashcard.id.in_(
+        select(CatalogFlashcard.flashcard_id).where(CatalogFlashcard.catalog_id == catalog_id)
+    ))
+
+
+def collection_query(user_id: int) -> Select:
+    """Owned flashcards plus those of public catalogs in the user's collection."""
+    return _export_query(Flashcard.id.in_(collection_flashcard_ids(user_id)))
+
+
+def _quiz_content(content: str) -> Any:
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content
+
+
+def iter_flashcards(query: Select) -> Iterator[Dict[str, Any]]:
+    """One dict per flashcard with its quizzes, grouped from the streamed rows."""
+    current: Optional[Dict[str, Any]] = None
+    with SessionLocal() as db:
+        rows = db.execute(query.execution_options(yield_per=configs["app_config"].EXPORT_YIELD_PER))
+        for flashcard_id, front, back, language, quiz_type, content in rows:
+            if current is None or current["id"] != flashcard_id:
+                if current is not None:
+                    yield current
+                current = {"id": flashcard_id, "front": front, "back": back, "language": language, "quizzes": {}}
+            if quiz_type is not None:
+                # Keep the first quiz of each type
+                current["quizzes"].setdefault(quiz_type, _quiz_content(content))
+    if current is not None:
+        yield current
+
+
+def _anki_quizzes(quizzes: Dict[str, Any]) -> str:
+    items = []
+    for quiz_type, content in quizzes.items():
+        if isinstance(content, dict):
+            prompt = content.get("question") or content.get("sentence") or ""
+            answer = content.get("correct_answer") or ""
+            items.append(f"<li><b>{_anki_field(quiz_type)}</b>: {_anki_field(str(prompt))} "
+                         f"&rarr; {_anki_field(str(answer))}</li>")
+    return f"<ul>{''.join(items)}</ul>" if items else ""
+
+
+def _anki_field(value: str) -> str:
+    # Tabs and line breaks would start a new field or note
+    return html.escape(value or "").replace("\t", " ").replace("\r", "").replace("\n", "<br>")
+
+
+def stream_export(query: Select, fmt: str) -> Iterator[bytes]:
+    """Encoded export of ``query`` in EXPORT_CHUNK_BYTES chunks."""
+    chunk_bytes = configs["app_config"].EXPORT_CHUNK_BYTES
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(["id", "front", "back", "language", "quizzes"])
+    elif fmt == "anki":
+        buffer.write("#separator:tab\n#html:true\n#columns:Front\tBack\tQuizzes\tTags\n#tags column:4\n")
+
+    for flashcard in iter_flashcards(query):
+        if fmt == "csv":
+            writer.writerow([
+                flashcard["id"], flashcard["front"], flashcard["back"] or "", flashcard["language"],
+                json.dumps(flashcard["quizzes"], ensure_ascii=False),
+            ])
+        elif fmt == "jsonl":
+            buffer.write(json.dumps(flashcard, ensure_ascii=False) + "\n")
+        else:
+            tag = "".join(ch if ch.isalnum() else "_" for ch in flashcard["language"])
+            buffer.write("\t".join([
+                _anki_field(flashcard["front"]),
+                _anki_field(flashcard["back"]),
+                _anki_quizzes(flashcard["quizzes"]),
+                tag,
+            ]) + "\n")
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
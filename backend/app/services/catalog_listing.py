@@ -0,0 +1,87 @@
+"""
+File        : services/catalog_listing.py
+Description : Catalog list rows with per-user flags, in one query
+
+Every catalog listing endpoint returns the same row shape: the catalog, its
+owner and target language, whether the current user owns it, has it shared
+with them or has it in their collection, and how many flashcards it holds.
+``list_catalogs`` computes all of it in a single statement (joins for owner
+and language, correlated EXISTS/COUNT subqueries on the primary keys of the
+share, collection and catalog_flashcards tables) instead of a lookup per
+catalog.
+"""
+
+from typing import List
+
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.catalog import Catalog, CatalogFlashcard, UserCatalogCollection
+from app.models.chat import Language
+from app.models.sharing import CatalogShare
+from app.models.user import User
+
+
+def catalog_listing_query(user_id: int, *conditions: ColumnElement[bool]):
+    """Listing rows for the catalogs matching ``conditions``, ordered by id."""
+    is_shared = (
+        select(CatalogShare.catalog_id)
+        .where(CatalogShare.catalog_id == Catalog.id, CatalogShare.shared_with_id == user_id)
+        .exists()
+    )
+    is_in_collection = (
+        select(UserCatalogCollection.catalog_id)
+        .where(UserCatalogCollection.user_id == user_id, UserCatalogCollection.catalog_id == Catalog.id)
+        .exists()
+    )
+    flashcard_count = (
+        select(func.count(CatalogFlashcard.id))
+        .where(CatalogFlashcard.catalog_id == Catalog.id)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Catalog.id,
+            Catalog.name,
+            Catalog.description,
+            Catalog.visibility,
+            Catalog.created_at,
+            User.username,
+            User.email,
+            Language.name.label("target_language"),
+            (Catalog.owner_id == user_id).label("is_owner"),
+            is_shared.label("is_shared"),
+            is_in_collection.label("is_in_collection"),
+            flashcard_count.label("flashcard_count"),
+        )
+        .join(User, User.id == Catalog.owner_id)
+        .join(Language, Language.id == Catalog.target_language_id)
+        .where(*conditions)
+        .order_by(Catalog.id)
+    )
+
+
+def listing_row(row) -> dict:
+    """A ``catalog_listing_query`` row in the ``CatalogBase`` response shape."""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "visibility": row.visibility,
+        "created_at": row.created_at,
+        "owner": {
+            "username": row.username,
+            "email": row.email
+        },
+        "target_language": row.target_language,
+        "is_owner": row.is_owner,
+        "is_shared": row.is_shared,
+        "is_in_collection": row.is_in_collection,
+        "flashcard_count": row.flashcard_count,
+    }
+
+
+async def list_catalogs(db: AsyncSession, user_id: int, *conditions: ColumnElement[bool]) -> List[dict]:
+    """Catalogs matching ``conditions`` as listed to ``user_id``."""
+    result = await db.execute(catalog_listing_query(user_id, *conditions))
+    return [listing_row(row) for row in result]
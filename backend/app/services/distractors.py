@@ -0,0 +1,206 @@
+"""
+File        : services/distractors.py
+Description : Multiple-choice distractors drawn from existing flashcards
+
+Wrong choices for Definition-to-Word, Word-to-Definition and
+Multiple-Choice Cloze quizzes are picked from flashcards of the same
+language instead of being invented by the LLM: the user's own flashcards
+and those of public catalogs, never another user's private ones. Candidates are ranked by
+cosine similarity of hashed character n-gram vectors (numpy), with
+penalties for length and word/phrase mismatches, so distractors look like
+the answer without being a near-duplicate of it.
+
+Definition-to-Word and Word-to-Definition need no LLM call at all.
+Multiple-Choice Cloze reuses the sentence of the Open-Ended Cloze quiz
+generated for the same flashcard.
+"""
+
+import random
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import union
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import SessionLocal
+from app.globals import configs
+from app.models.flashcard import Flashcard
+from app.services.catalog_access import owned_flashcard_ids, public_flashcard_ids
+from app.services.word_type import classify_word_type
+
+DEFINITION_TO_WORD = "Definition-to-Word (Multiple-Choice)"
+WORD_TO_DEFINITION = "Word-to-Definition (Multiple-Choice)"
+MULTIPLE_CHOICE_CLOZE = "Multiple-Choice Cloze (Multiple-Choice)"
+OPEN_ENDED_CLOZE = "Open-Ended Cloze (Cloze)"
+LOCAL_QUIZ_TYPES = (DEFINITION_TO_WORD, WORD_TO_DEFINITION, MULTIPLE_CHOICE_CLOZE)
+
+NUM_DISTRACTORS = 3
+VECTOR_DIM = 512
+NGRAM_SIZES = (2, 3)
+# Candidates closer than this are variants of the answer (plurals, typos)
+MAX_SIMILARITY = 0.7
+LENGTH_PENALTY = 0.3
+WORD_TYPE_PENALTY = 0.2
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+def ngram_vectors(texts: Sequence[str]) -> np.ndarray:
+    """L2-normalized hashed character n-gram counts, one row per text."""
+    matrix = np.zeros((len(texts), VECTOR_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        padded = f" {_normalize(text)} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                matrix[row, zlib.crc32(padded[i:i + n].encode("utf-8")) % VECTOR_DIM] += 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+class _TextIndex:
+    def __init__(self, texts: List[str], with_word_type: bool):
+        self.texts = texts
+        self.keys = [_normalize(t) for t in texts]
+        self.vectors = ngram_vectors(texts)
+        self.lengths = np.array([len(k) for k in self.keys], dtype=np.float32)
+        self.phrase = (
+            np.array([classify_word_type(t) == "phrase" for t in texts], dtype=bool) if with_word_type else None
+        )
+
+    def nearest(self, query: str, k: int, exclude: Sequence[str] = ()) -> List[str]:
+        """The ``k`` best distractors for ``query``; fewer if the index runs out."""
+        if not self.texts:
+            return []
+        query_key = _normalize(query)
+        similarity = self.vectors @ ngram_vectors([query])[0]
+        length = max(1, len(query_key))
+        score = similarity - LENGTH_PENALTY * np.abs(self.lengths - length) / np.maximum(self.lengths, length)
+        if self.phrase is not None:
+            score -= WORD_TYPE_PENALTY * (self.phrase != (classify_word_type(query) == "phrase"))
+        score[similarity >= MAX_SIMILARITY] = -np.inf
+
+        seen = {query_key, *(_normalize(e) for e in exclude)}
+        chosen: List[str] = []
+        # Look at a few more than k candidates so duplicates can be skipped cheaply
+        top = min(len(score), k * 4 + len(seen))
+        candidates = np.argpartition(-score, top - 1)[:top] if top < len(score) else np.arange(len(score))
+        for index in candidates[np.argsort(-score[candidates])]:
+            if not np.isfinite(score[index]) or self.keys[index] in seen:
+                continue
+            seen.add(self.keys[index])
+            chosen.append(self.texts[index])
+            if len(chosen) == k:
+                break
+        return chosen
+
+
+class DistractorCorpus:
+    """Fronts and backs of one language's flashcards, indexed for distractor lookup."""
+
+    def __init__(self, entries: List[Tuple[str, str]]):
+        entries = [(front, back) for front, back in entries if front and back]
+        self.fronts = _TextIndex(list(dict.fromkeys(front for front, _ in entries)), with_word_type=True)
+        self.backs = _TextIndex(list(dict.fromkeys(back for _, back in entries)), with_word_type=False)
+
+    def __len__(self) -> int:
+        return len(self.fronts.texts)
+
+
+def _choices(answer: str, distractors: List[str], seed: str) -> Optional[List[str]]:
+    if len(distractors) < NUM_DISTRACTORS:
+        return None
+    choices = [answer, *distractors]
+    random.Random(seed).shuffle(choices)
+    return choices
+
+
+def build_local_quiz(
+    quiz_type: str, flashcard: Dict[str, Any], corpus: DistractorCorpus, generated: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Assemble a multiple-choice quiz locally, or None if there are not enough distractors.
+
+    ``generated`` holds the flashcard's LLM quizzes; Multiple-Choice Cloze
+    needs its Open-Ended Cloze entry.
+    """
+    front, back = flashcard["front"], flashcard["back"]
+    if not front or not back:
+        return None
+    if quiz_type == DEFINITION_TO_WORD:
+        choices = _choices(front, corpus.fronts.nearest(front, NUM_DISTRACTORS), front)
+        if choices:
+            return {"question": f'Which word means "{back}"?', "choices": choices, "correct_answer": front}
+    elif quiz_type == WORD_TO_DEFINITION:
+        choices = _choices(back, corpus.backs.nearest(back, NUM_DISTRACTORS), front)
+        if choices:
+            return {"question": f'What does "{front}" mean?', "choices": choices, "correct_answer": back}
+    elif quiz_type == MULTIPLE_CHOICE_CLOZE:
+        cloze = generated.get(OPEN_ENDED_CLOZE)
+        if isinstance(cloze, dict) and cloze.get("sentence") and cloze.get("correct_answer"):
+            answer = cloze["correct_answer"]
+            choices = _choices(answer, corpus.fronts.nearest(answer, NUM_DISTRACTORS, exclude=(front,)), front)
+            if choices:
+                return {"sentence": cloze["sentence"], "choices": choices, "correct_answer": answer}
+    return None
+
+
+def local_quiz_types(quiz_types: List[str], corpus: Optional[DistractorCorpus]) -> List[str]:
+    """The requested types that will be assembled locally with ``corpus``."""
+    if corpus is None or len(corpus) < configs["app_config"].DISTRACTOR_MIN_CORPUS:
+        return []
+    local = [qt for qt in quiz_types if qt in LOCAL_QUIZ_TYPES]
+    # The cloze sentence comes from the Open-Ended Cloze quiz
+    if MULTIPLE_CHOICE_CLOZE in local and OPEN_ENDED_CLOZE not in quiz_types:
+        local.remove(MULTIPLE_CHOICE_CLOZE)
+    return local
+
+
+# (user_id, language_id) -> (expiry, corpus)
+_corpora: Dict[Tuple[Optional[int], int], Tuple[float, DistractorCorpus]] = {}
+_corpora_lock = threading.Lock()
+
+
+def get_corpus(user_id: Optional[int], language_id: Optional[int]) -> Optional[DistractorCorpus]:
+    """Cached corpus of the latest DISTRACTOR_CORPUS_SIZE flashcards of a language that
+    ``user_id`` owns or that are in public catalogs (public ones only without a user)."""
+    app_config = configs["app_config"]
+    if language_id is None or not app_config.DISTRACTORS_ENABLED:
+        return None
+    key = (user_id, language_id)
+    cached = _corpora.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    with _corpora_lock:
+        cached = _corpora.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        visible = public_flashcard_ids() if user_id is None else union(owned_flashcard_ids(user_id), public_flashcard_ids())
+        try:
+            with SessionLocal() as db:
+                rows = (
+                    db.query(Flashcard.front, Flashcard.back)
+                    .filter(
+                        Flashcard.language_id == language_id,
+                        Flashcard.back.isnot(None),
+                        Flashcard.id.in_(visible),
+                    )
+                    .order_by(Flashcard.id.desc())
+                    .limit(app_config.DISTRACTOR_CORPUS_SIZE)
+                    .all()
+                )
+        except SQLAlchemyError as e:
+            logger.warning("Distractor corpus for language {} unavailable: {}", language_id, e)
+            return None
+        corpus = DistractorCorpus([(front, back) for front, back in rows])
+        now = time.monotonic()
+        # Corpora are per user: drop the expired ones so the cache stays bounded
+        for stale in [k for k, (expiry, _) in _corpora.items() if expiry <= now]:
+            del _corpora[stale]
+        _corpora[key] = (now + app_config.DISTRACTOR_CORPUS_TTL_SECONDS, corpus)
+        return corpus
@@ -0,0 +1,102 @@
+"""
+File        : services/flashcard_import.py
+Description : Set-based insert of imported flashcards and their catalog links
+
+An import costs a fixed number of statements whatever its size: one query
+for the target catalogs the user owns, one multi-row
+``INSERT ... RETURNING id`` for the flashcards (SQLAlchemy pages it into
+1000-row statements) and one multi-row insert for the catalog links.
+
+There is no unique constraint on (owner, language, front) since users may
+allow duplicates, so duplicates are skipped before the insert rather than
+with ON CONFLICT. The check uses the owner's near-duplicate index, so
+"Casa" and "casa " count as the same front.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.catalog import Catalog, CatalogFlashcard
+from app.models.flashcard import Flashcard
+from app.models.user_settings import UserSettings
+from app.services.near_duplicates import get_index, normalize_front
+
+ON_DUPLICATE_POLICIES = ("allow", "skip")
+
+
+@dataclass
+class ImportResult:
+    flashcards: List[Dict[str, Any]] = field(default_factory=list)  # {"flashcard_id", "front", "back"}
+    skipped: List[str] = field(default_factory=list)
+    catalog_ids: List[int] = field(default_factory=list)
+
+
+def duplicate_policy(db: Session, owner_id: int, requested: Optional[str]) -> str:
+    """The requested policy, else the user's allow_duplicates setting.
+
+    Users without a settings row get the column default (False), i.e. skip.
+    """
+    if requested:
+        return requested
+    allow = db.execute(
+        select(UserSettings.allow_duplicates).where(UserSettings.user_id == owner_id)
+    ).scalar_one_or_none()
+    return "allow" if allow else "skip"
+
+
+def insert_flashcards(
+    db: Session,
+    owner_id: int,
+    language_id: int,
+    words: List[Dict[str, Any]],
+    catalog_ids: List[int],
+    on_duplicate: str = "allow",
+) -> ImportResult:
+    """Insert ``words`` ({"front", "back"}) for the owner and link them to the owned catalogs.
+
+    Flushes but does not commit. Catalog ids the owner does not own are ignored.
+    """
+    result = ImportResult()
+    if catalog_ids:
+        result.catalog_ids = list(db.execute(
+            select(Catalog.id).where(Catalog.id.in_(catalog_ids), Catalog.owner_id == owner_id)
+        ).scalars())
+
+    rows = []
+    seen = set()
+    index = get_index(db, owner_id, language_id) if on_duplicate == "skip" else None
+    for word in words:
+        if index is not None:
+            key = normalize_front(word["front"])
+            if key in seen or index.contains(word["front"]):
+                result.skipped.append(word["front"])
+                continue
+            seen.add(key)
+        rows.append({
+            "front": word["front"],
+            "back": word["back"],
+            "language_id": language_id,
+            "owner_id": owner_id,
+        })
+    if not rows:
+        return result
+
+    inserted = db.execute(
+        insert(Flashcard).returning(Flashcard.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    result.flashcards = [
+        {"flashcard_id": flashcard_id, "front": row["front"], "back": row["back"]}
+        for flashcard_id, row in zip(inserted, rows)
+    ]
+
+    if result.catalog_ids:
+        db.execute(insert(CatalogFlashcard), [
+            {"catalog_id": catalog_id, "flashcard_id": flashcard_id}
+            for flashcard_id in inserted
+            for catalog_id in result.catalog_ids
+        ])
+    db.flush()
+    return result
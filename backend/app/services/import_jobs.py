@@ -0,0 +1,127 @@
+"""
+File        : services/import_jobs.py
+Description : Import jobs and their progress, shared by the API and the workers
+
+Every import is a Redis hash ``import_job:{id}`` (owner, language, total,
+mode and the completed/failed/quizzes counters) plus ``import_cards:{id}``
+holding each flashcard's state: pending, done or failed. Any API process
+can answer status polls, and jobs survive restarts until
+IMPORT_JOB_TTL_SECONDS after their last update.
+
+Flashcard states change in a Lua script, so the counters stay consistent
+when a task is retried: a flashcard is counted once, and a failed
+flashcard that later succeeds moves from ``failed`` to ``completed``.
+"""
+
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+
+from app.globals import clients, configs
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+_TRANSITION_SCRIPT = """
+local state, ttl = ARGV[1], tonumber(ARGV[2])
+local counter = state == "done" and "completed" or "failed"
+for i = 3, #ARGV do
+    local previous = redis.call("HGET", KEYS[2], ARGV[i])
+    if previous ~= "done" and previous ~= state then
+        redis.call("HSET", KEYS[2], ARGV[i], state)
+        redis.call("HINCRBY", KEYS[1], counter, 1)
+        if previous == "failed" then
+            redis.call("HINCRBY", KEYS[1], "failed", -1)
+        end
+    end
+end
+redis.call("EXPIRE", KEYS[1], ttl)
+redis.call("EXPIRE", KEYS[2], ttl)
+"""
+
+
+def _redis() -> redis.Redis:
+    if "import_jobs_redis" not in clients:
+        clients["import_jobs_redis"] = redis.Redis.from_url(configs["app_config"].IMPORT_JOBS_REDIS_URL)
+    return clients["import_jobs_redis"]
+
+
+def _transition(flashcard_ids: Iterable[int], import_id: str, state: str) -> None:
+    if "import_jobs_transition" not in clients:
+        clients["import_jobs_transition"] = _redis().register_script(_TRANSITION_SCRIPT)
+    ids = [str(i) for i in flashcard_ids]
+    if ids:
+        clients["import_jobs_transition"](
+            keys=[f"import_job:{import_id}", f"import_cards:{import_id}"],
+            args=[state, configs["app_config"].IMPORT_JOB_TTL_SECONDS, *ids],
+        )
+
+
+def create_job(user_id: int, language_id: int, flashcard_ids: List[int], mode: str) -> str:
+    """Register a new import with all its flashcards pending and return its id."""
+    import_id = f"import_{uuid.uuid4().hex}"
+    ttl = configs["app_config"].IMPORT_JOB_TTL_SECONDS
+    pipe = _redis().pipeline()
+    pipe.hset(f"import_job:{import_id}", mapping={
+        "user_id": user_id,
+        "language_id": language_id,
+        "mode": mode,
+        "total": len(flashcard_ids),
+        "created_at": int(time.time()),
+        "completed": 0,
+        "failed": 0,
+        "quizzes": 0,
+    })
+    pipe.expire(f"import_job:{import_id}", ttl)
+    if flashcard_ids:
+        pipe.hset(f"import_cards:{import_id}", mapping=dict.fromkeys(map(str, flashcard_ids), PENDING))
+        pipe.expire(f"import_cards:{import_id}", ttl)
+    pipe.execute()
+    return import_id
+
+
+def add_flashcards(import_id: str, flashcard_ids: List[int]) -> None:
+    """Add pending flashcards to a job that is still being filled (streaming uploads)."""
+    ttl = configs["app_config"].IMPORT_JOB_TTL_SECONDS
+    pipe = _redis().pipeline()
+    pipe.hset(f"import_cards:{import_id}", mapping=dict.fromkeys(map(str, flashcard_ids), PENDING))
+    pipe.hincrby(f"import_job:{import_id}", "total", len(flashcard_ids))
+    pipe.expire(f"import_cards:{import_id}", ttl)
+    pipe.expire(f"import_job:{import_id}", ttl)
+    pipe.execute()
+
+
+def record_progress(
+    import_id: str,
+    completed_ids: Iterable[int] = (),
+    failed_ids: Iterable[int] = (),
+    quizzes: int = 0,
+) -> None:
+    """Mark flashcards done or failed and add to the import's quiz count."""
+    _transition(completed_ids, import_id, DONE)
+    _transition(failed_ids, import_id, FAILED)
+    if quizzes:
+        pipe = _redis().pipeline()
+        pipe.hincrby(f"import_job:{import_id}", "quizzes", quizzes)
+        pipe.expire(f"import_job:{import_id}", configs["app_config"].IMPORT_JOB_TTL_SECONDS)
+        pipe.execute()
+
+
+def get_job(import_id: str) -> Optional[Dict[str, Any]]:
+    """The import's owner, language, mode and counters, or None if unknown or expired."""
+    raw = _redis().hgetall(f"import_job:{import_id}")
+    if not raw:
+        return None
+    job = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    for field in ("user_id", "language_id", "total", "created_at", "completed", "failed", "quizzes"):
+        job[field] = int(job.get(field, 0))
+    return job
+
+
+def flashcards_in_state(import_id: str, state: str) -> List[int]:
+    return sorted(
+        int(flashcard_id)
+        for flashcard_id, value in _redis().hgetall(f"import_cards:{import_id}").items()
+        if value.decode("utf-8") == state
+    )
@@ -0,0 +1,253 @@
+"""
+File        : services/near_duplicates.py
+Description : Per-owner, per-language near-duplicate index for flashcard fronts
+
+Fronts are normalized (NFC, case-folded, whitespace collapsed, surrounding
+punctuation stripped), so "Rain" and "rain " are the same word. Near
+duplicates such as "rain" / "raining" are found with MinHash signatures
+over character 2- and 3-gram shingles, bucketed in an LSH table (banded
+signatures), and confirmed by comparing the actual shingle sets.
+
+Each process keeps the indexes it has used in memory. A generation counter
+per (owner, language) in Redis is bumped on every import and delete: the
+process making the change updates a copy of its own index and swaps it in
+(readers hold no lock, so a published index is never modified), the others
+rebuild theirs from the database on their next query. At most
+``NEAR_DUPLICATE_MAX_INDEXES`` indexes are kept, least recently used first out.
+"""
+
+import threading
+import unicodedata
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import redis
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.globals import clients, configs
+from app.models.flashcard import Flashcard
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 32  # 2 rows per band: pairs with Jaccard similarity ~0.2+ share a bucket
+# Pairs sharing a single bucket are mostly chance (a common first letter); real
+# candidates, even "rain" / "raining" at Jaccard 0.4, share several
+MIN_BAND_HITS = 2
+_ROWS = NUM_PERMUTATIONS // NUM_BANDS
+# Largest prime below 2**32: (a * x + b) on 32-bit shingle hashes stays within uint64
+_PRIME = np.uint64(4294967291)
+_rng = np.random.RandomState(20240501)
+_A = _rng.randint(1, 4294967291, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+_B = _rng.randint(0, 4294967291, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+
+# Shorter words only match on Jaccard similarity, longer ones also on containment
+MIN_CONTAINMENT_LENGTH = 4
+
+
+def normalize_front(text: str) -> str:
+    text = " ".join(unicodedata.normalize("NFC", text).casefold().split())
+    return text.strip(".,;:!?¡¿\"'()[]{}…。！？，、")
+
+
+def shingles(key: str) -> Set[str]:
+    padded = f" {key} "
+    return {padded[i:i + n] for n in (2, 3) for i in range(len(padded) - n + 1)}
+
+
+def minhash(shingle_set: Set[str]) -> np.ndarray:
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingle_set], dtype=np.uint64)
+    # (a * x + b) mod p for every permutation and shingle, minimum per permutation
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a: Set[str], b: Set[str], length: int) -> float:
+    """Jaccard similarity, or containment of the shorter set for longer words."""
+    overlap = len(a & b)
+    jaccard = overlap / len(a | b)
+    if length < MIN_CONTAINMENT_LENGTH:
+        return jaccard
+    return max(jaccard, overlap / min(len(a), len(b)))
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over one owner's fronts in one language."""
+
+    def __init__(self):
+        self._fronts: Dict[str, List[str]] = {}  # normalized key -> original fronts
+        self._shingles: Dict[str, Set[str]] = {}
+        self._bands: List[Dict[bytes, Set[str]]] = [{} for _ in range(NUM_BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._fronts)
+
+    def copy(self) -> "NearDuplicateIndex":
+        """An independent copy, to be changed while readers keep using this one."""
+        clone = NearDuplicateIndex()
+        clone._fronts = {key: list(fronts) for key, fronts in self._fronts.items()}
+        clone._shingles = dict(self._shingles)  # Shingle sets are never modified
+        clone._bands = [{bucket: set(keys) for bucket, keys in band.items()} for band in self._bands]
+        return clone
+
+    def contains(self, front: str) -> bool:
+        """Whether a front equal to ``front`` after normalization is indexed."""
+        return normalize_front(front) in self._fronts
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> Iterable[bytes]:
+        return (signature[b * _ROWS:(b + 1) * _ROWS].tobytes() for b in range(NUM_BANDS))
+
+    def add(self, front: str) -> None:
+        key = normalize_front(front)
+        if not key:
+            return
+        if key in self._fronts:
+            self._fronts[key].append(front)
+            return
+        self._fronts[key] = [front]
+        self._shingles[key] = shingles(key)
+        for band, bucket in zip(self._bands, self._band_keys(minhash(self._shingles[key]))):
+            band.setdefault(bucket, set()).add(key)
+
+    def remove(self, front: str) -> None:
+        key = normalize_front(front)
+        fronts = self._fronts.get(key)
+        if not fronts:
+            return
+        if front in fronts:
+            fronts.remove(front)
+        else:
+            fronts.pop()
+        if fronts:
+            return
+        del self._fronts[key]
+        for band, bucket in zip(self._bands, self._band_keys(minhash(self._shingles.pop(key)))):
+            members = band.get(bucket)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del band[bucket]
+
+    def query(self, front: str, threshold: float) -> Tuple[List[str], List[str]]:
+        """(fronts equal after normalization, near-duplicate fronts) for ``front``."""
+        key = normalize_front(front)
+        if not key:
+            return [], []
+        exact = list(self._fronts.get(key, []))
+        query_shingles = shingles(key)
+        hits = Counter()
+        for band, bucket in zip(self._bands, self._band_keys(minhash(query_shingles))):
+            hits.update(band.get(bucket, ()))
+        hits.pop(key, None)
+        scored = []
+        for candidate, count in hits.items():
+            if count < MIN_BAND_HITS:
+                continue
+            score = similarity(query_shingles, self._shingles[candidate], min(len(key), len(candidate)))
+            if score >= threshold:
+                scored.append((score, candidate))
+        near = [f for _, candidate in sorted(scored, reverse=True) for f in self._fronts[candidate][:1]]
+        return exact, near
+
+
+# (owner_id, language_id) -> (generation, index), least recently used first
+_indexes: "OrderedDict[Tuple[int, int], Tuple[Optional[int], NearDuplicateIndex]]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _store(key: Tuple[int, int], generation: Optional[int], index: NearDuplicateIndex) -> None:
+    """Cache an index, evicting the least recently used ones. Call with ``_indexes_lock`` held."""
+    _indexes[key] = (generation, index)
+    _indexes.move_to_end(key)
+    while len(_indexes) > configs["app_config"].NEAR_DUPLICATE_MAX_INDEXES:
+        _indexes.popitem(last=False)
+
+
+def _redis() -> redis.Redis:
+    if "near_duplicates_redis" not in clients:
+        clients["near_duplicates_redis"] = redis.Redis.from_url(
+            configs["app_config"].IMPORT_JOBS_REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+    return clients["near_duplicates_redis"]
+
+
+def _generation_key(owner_id: int, language_id: int) -> str:
+    return f"near_dup_generation:{owner_id}:{language_id}"
+
+
+def _current_generation(owner_id: int, language_id: int) -> Optional[int]:
+    try:
+        return int(_redis().get(_generation_key(owner_id, language_id)) or 0)
+    except redis.RedisError as e:
+        logger.warning("Near-duplicate index: Redis unavailable, rebuilding from the database: {}", e)
+        return None
+
+
+def get_index(db: Session, owner_id: int, language_id: int) -> NearDuplicateIndex:
+    """The owner's index for a language, rebuilt if another process changed it."""
+    generation = _current_generation(owner_id, language_id)
+    key = (owner_id, language_id)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached and generation is not None and cached[0] == generation:
+            _indexes.move_to_end(key)
+            return cached[1]
+    index = NearDuplicateIndex()
+    rows = db.query(Flashcard.front).filter(
+        Flashcard.owner_id == owner_id, Flashcard.language_id == language_id
+    ).all()
+    for (front,) in rows:
+        index.add(front)
+    with _indexes_lock:
+        _store(key, generation, index)
+    return index
+
+
+def _apply(owner_id: int, language_id: int, added: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+    with _indexes_lock:
+        cached = _indexes.pop((owner_id, language_id), None)
+        try:
+            generation = _redis().incr(_generation_key(owner_id, language_id))
+        except redis.RedisError as e:
+            logger.warning("Near-duplicate index: could not bump generation: {}", e)
+            return
+        # Only an index that was current before this change can be updated in place
+        if cached is None or cached[0] != generation - 1:
+            return
+        index = cached[1].copy()
+        for front in added:
+            index.add(front)
+        for front in removed:
+            index.remove(front)
+        _store((owner_id, language_id), generation, index)
+
+
+def record_added(owner_id: int, language_id: int, fronts: Iterable[str]) -> None:
+    """Call after committing new flashcards."""
+    _apply(owner_id, language_id, added=list(fronts))
+
+
+def record_removed(owner_id: int, language_id: int, fronts: Iterable[str]) -> None:
+    """Call after committing deleted flashcards."""
+    _apply(owner_id, language_id, removed=list(fronts))
+
+
+def find_duplicates(
+    db: Session, owner_id: int, language_ids: Iterable[int], words: List[str]
+) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Words that already exist (after normalization) and near duplicates of the others."""
+    threshold = configs["app_config"].NEAR_DUPLICATE_THRESHOLD
+    indexes = [get_index(db, owner_id, language_id) for language_id in language_ids]
+    duplicates, near_duplicates = [], {}
+    for word in words:
+        exact, near = [], []
+        for index in indexes:
+            found_exact, found_near = index.query(word, threshold)
+            exact += found_exact
+            near += found_near
+        if exact:
+            duplicates.append(word)
+        elif near:
+            near_duplicates[word] = near
+    return duplicates, near_duplicates
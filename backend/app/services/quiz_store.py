@@ -0,0 +1,55 @@
+"""
+File        : services/quiz_store.py
+Description : Bulk persistence of generated quizzes, called by the workers
+"""
+
+import json
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.quiz import Quiz, QuizType
+
+
+def save_generated_quizzes(
+    db: Session, results: List[Dict[str, Any]], user_id: int, language_id: int
+) -> int:
+    """Insert the quizzes of a generation batch in one statement.
+
+    ``results`` holds {"flashcard_id", "quizzes"} entries as returned by the
+    quiz pipeline. Quiz types a flashcard already has for this user are
+    skipped, so a retried task does not duplicate rows. Returns the number
+    of rows inserted; the caller commits.
+    """
+    flashcard_ids = [result["flashcard_id"] for result in results]
+    if not flashcard_ids:
+        return 0
+
+    quiz_type_map = dict(db.execute(select(QuizType.name, QuizType.id)).all())
+    existing = set(
+        db.execute(
+            select(Quiz.flashcard_id, Quiz.quiz_type_id).where(
+                Quiz.user_id == user_id,
+                Quiz.flashcard_id.in_(flashcard_ids),
+            )
+        ).all()
+    )
+
+    rows = []
+    for result in results:
+        for quiz_data in result["quizzes"]:
+            quiz_type_id = quiz_type_map.get(quiz_data["type"])
+            if quiz_type_id is None or (result["flashcard_id"], quiz_type_id) in existing:
+                continue
+            existing.add((result["flashcard_id"], quiz_type_id))
+            rows.append({
+                "flashcard_id": result["flashcard_id"],
+                "quiz_type_id": quiz_type_id,
+                "content": json.dumps(quiz_data["content"]),
+                "user_id": user_id,
+                "language_id": language_id,
+            })
+    if rows:
+        db.execute(insert(Quiz), rows)
+    return len(rows)
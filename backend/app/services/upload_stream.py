@@ -0,0 +1,195 @@
+"""
+File        : services/upload_stream.py
+Description : Chunk-by-chunk parsing of uploaded vocabulary files
+
+Uploads are read in UPLOAD_CHUNK_BYTES pieces and never held in memory
+as a whole:
+
+    bytes -> StreamDecoder -> lines -> records (front, back) -> dedup -> batches
+
+The encoding is detected incrementally: a BOM selects UTF-8 or UTF-16,
+otherwise the stream is decoded as UTF-8 until the first invalid byte and
+as cp1252 from there on. Fronts are deduplicated on their normalized form
+with a fixed-size Bloom filter (``SeenFilter``).
+
+Supported formats, chosen by file extension:
+  .txt            one front per line
+  .csv / .tsv     front[,back]; a "front,back" or "word,meaning" header row is skipped
+  .ndjson/.jsonl  {"front": ..., "back": ...} objects (or "word"/"meaning"), or plain strings
+"""
+
+import codecs
+import csv
+import json
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.globals import configs
+from app.services.near_duplicates import normalize_front
+from app.services.wordlists import SeenFilter
+
+FORMATS = {".txt": "txt", ".csv": "csv", ".tsv": "tsv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+MAX_FRONT_LENGTH = 255  # Longer fronts are counted as invalid
+# Longest accepted back; longer ones are truncated
+MAX_BACK_LENGTH = 1_000
+# Lines are cut here so a file without line breaks cannot fill memory
+MAX_LINE_LENGTH = 64 * 1024
+
+_HEADERS = (["front", "back"], ["word", "meaning"], ["front"], ["word"])
+
+Record = Tuple[str, Optional[str]]
+
+
+def upload_format(filename: Optional[str]) -> Optional[str]:
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+class StreamDecoder:
+    """Incremental bytes -> text decoder with BOM sniffing and a cp1252 fallback."""
+
+    def __init__(self):
+        self.encoding: Optional[str] = None
+        self._decoder = None
+        self._head = b""
+
+    def decode(self, chunk: bytes, final: bool = False) -> str:
+        if self._decoder is None:
+            self._head += chunk
+            if len(self._head) < 3 and not final:
+                return ""
+            chunk, self._head = self._head, b""
+            self.encoding = next((enc for bom, enc in _BOMS if chunk.startswith(bom)), "utf-8")
+            self._decoder = codecs.getincrementaldecoder(self.encoding)()
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            if self.encoding != "utf-8":
+                raise
+            # e.object is the decoder's buffered bytes followed by this chunk
+            valid = e.object[:e.start].decode("utf-8")
+            self.encoding = "cp1252"
+            self._decoder = codecs.getincrementaldecoder("cp1252")(errors="replace")
+            return valid + self._decoder.decode(e.object[e.start:], final)
+
+
+async def iter_lines(upload: UploadFile, decoder: StreamDecoder) -> AsyncIterator[List[str]]:
+    """Lines of ``upload`` without their line endings, one list per chunk read."""
+    chunk_bytes = configs["app_config"].UPLOAD_CHUNK_BYTES
+    pending = ""
+    while True:
+        chunk = await upload.read(chunk_bytes)
+        lines = (pending + decoder.decode(chunk, final=not chunk)).splitlines(keepends=True)
+        pending = ""
+        # The last line may continue in the next chunk, unless it is already too long to matter
+        if chunk and lines and not lines[-1].endswith("\n") and len(lines[-1]) <= MAX_LINE_LENGTH:
+            pending = lines.pop()
+        yield [line.rstrip("\r\n") for line in lines]
+        if not chunk:
+            return
+
+
+def _csv_records(lines: List[str], delimiter: str) -> Iterator[Record]:
+    for row in csv.reader(lines, delimiter=delimiter):
+        if row:
+            yield row[0], row[1] if len(row) > 1 else None
+
+
+def _ndjson_record(line: str) -> Optional[Record]:
+    try:
+        value = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(value, str):
+        return value, None
+    if isinstance(value, dict):
+        front = value.get("front", value.get("word"))
+        back = value.get("back", value.get("meaning"))
+        if isinstance(front, str):
+            return front, back if isinstance(back, str) else None
+    return None
+
+
+@dataclass
+class UploadStats:
+    lines: int = 0
+    records: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    encoding: Optional[str] = None
+
+
+async def iter_records(upload: UploadFile, fmt: str, stats: UploadStats) -> AsyncIterator[Record]:
+    """Distinct, cleaned (front, back) records of ``upload``; ``stats`` is updated as it goes."""
+    app_config = configs["app_config"]
+    seen = SeenFilter(app_config.UPLOAD_DEDUP_CAPACITY, app_config.UPLOAD_DEDUP_FP_RATE)
+    delimiter = "\t" if fmt == "tsv" else ","
+    quoted: List[str] = []  # CSV lines of a quoted field spanning several lines
+    first = True
+
+    decoder = StreamDecoder()
+    async for lines in iter_lines(upload, decoder):
+        stats.encoding = decoder.encoding
+        stats.lines += len(lines)
+        records: List[Record] = []
+        for line in lines:
+            if fmt in ("csv", "tsv"):
+                if '"' not in line and not quoted:
+                    fields = line.split(delimiter)
+                    row = [(fields[0], fields[1] if len(fields) > 1 else None)]
+                else:
+                    quoted.append(line)
+                    text = "\n".join(quoted)
+                    if text.count('"') % 2 and len(text) <= MAX_LINE_LENGTH:
+                        continue
+                    quoted = []
+                    try:
+                        row = list(_csv_records([text], delimiter))
+                    except csv.Error:
+                        stats.invalid += 1
+                        continue
+                if first and row and [r.strip().lower() for r in row[0] if r] in _HEADERS:
+                    row = []
+                records += row
+            elif fmt == "ndjson":
+                if line.strip():
+                    record = _ndjson_record(line)
+                    if record:
+                        records.append(record)
+                    else:
+                        stats.invalid += 1
+            else:
+                records.append((line, None))
+            first = False
+
+        for front, back in records:
+            front = front.strip()
+            back = back.strip()[:MAX_BACK_LENGTH] if back and back.strip() else None
+            if not front:
+                continue
+            if len(front) > MAX_FRONT_LENGTH:
+                stats.invalid += 1
+                continue
+            if not seen.add(normalize_front(front)):
+                stats.duplicates += 1
+                continue
+            stats.records += 1
+            yield front, back
+
+
+async def iter_batches(records: AsyncIterator[Record], size: int) -> AsyncIterator[List[Record]]:
+    batch: List[Record] = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,225 @@
+"""
+File        : services/word_jobs.py
+Description : Submit/poll/stream jobs for word validation and flashcard generation
+
+A job is a Celery group of batch tasks saved in the result backend, plus a
+small Redis hash describing it. Nothing here blocks the event loop: Redis
+and result-backend reads run in worker threads and waiting uses
+``asyncio.sleep``, so one uvicorn process can follow many jobs at once.
+
+Jobs belong to the user who submitted them; for anyone else they do not
+exist. A job whose group can no longer be restored from the result backend
+(expired or lost) is reported as failed rather than running forever.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import redis
+from celery import group
+from celery.canvas import Signature
+from celery.result import GroupResult
+
+from app.celery_app import celery
+from app.globals import clients, configs
+
+JOB_TTL_SECONDS = 24 * 3600
+HEARTBEAT_SECONDS = 15.0
+
+# Job kind -> key holding the combined results, matching the blocking endpoints
+RESULT_KEYS = {"validate": "valid_words", "flashcards": "flashcards"}
+
+LOST_RESULTS_ERROR = "Job results are no longer available"
+
+
+class JobFailedError(Exception):
+    """Raised by ``wait_for_job`` when a batch of the job failed."""
+
+
+def _redis() -> redis.Redis:
+    if "word_jobs_redis" not in clients:
+        clients["word_jobs_redis"] = redis.Redis.from_url(configs["app_config"].IMPORT_JOBS_REDIS_URL)
+    return clients["word_jobs_redis"]
+
+
+def _job_key(job_id: str) -> str:
+    return f"word_job:{job_id}"
+
+
+def submit_job(
+    kind: str, owner_id: int, signatures: List[Signature], preset: Optional[List[Any]] = None
+) -> Dict[str, Any]:
+    """Dispatch ``signatures`` as one group and register the job for ``owner_id``.
+
+    ``preset`` holds results known without running a task (e.g. words the
+    wordlist pre-filter already accepted); they come first in the results.
+    """
+    job_id = uuid.uuid4().hex
+    group_id = ""
+    if signatures:
+        result = group(signatures).apply_async()
+        result.save()  # Lets any API process restore the group by id
+        group_id = result.id
+    key = _job_key(job_id)
+    _redis().pipeline().hset(
+        key,
+        mapping={
+            "kind": kind,
+            "owner_id": owner_id,
+            "group_id": group_id,
+            "total_batches": len(signatures),
+            "preset": json.dumps(preset or []),
+            "created_at": time.time(),
+        },
+    ).expire(key, JOB_TTL_SECONDS).execute()
+    return {"job_id": job_id, "kind": kind, "status": "running", "total_batches": len(signatures)}
+
+
+def load_job(job_id: str, owner_id: int) -> Optional[Dict[str, Any]]:
+    """The job, or None if it does not exist or belongs to another user."""
+    raw = _redis().hgetall(_job_key(job_id))
+    if not raw:
+        return None
+    meta = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    if meta.get("owner_id") != str(owner_id):
+        return None
+    children = []
+    lost = False
+    if meta["group_id"]:
+        restored = GroupResult.restore(meta["group_id"], app=celery)
+        if restored:
+            children = list(restored.results)
+        else:
+            lost = True
+    return {
+        "kind": meta["kind"],
+        "total_batches": int(meta["total_batches"]),
+        "preset": json.loads(meta["preset"]),
+        "children": children,
+        "lost": lost,
+    }
+
+
+def _batch_outcome(child) -> Optional[Dict[str, Any]]:
+    """Return the finished batch's outcome, or None while it is still running."""
+    if not child.ready():
+        return None
+    if child.successful():
+        return {"status": "done", "results": child.result}
+    return {"status": "failed", "error": str(child.result)}
+
+
+def job_state(job_id: str, owner_id: int) -> Optional[Dict[str, Any]]:
+    """Snapshot of a job with the results of every batch finished so far."""
+    job = load_job(job_id, owner_id)
+    if job is None:
+        return None
+    results = list(job["preset"])
+    errors = []
+    completed = 0
+    if job["lost"]:
+        return {
+            "job_id": job_id,
+            "kind": job["kind"],
+            "status": "failed",
+            "total_batches": job["total_batches"],
+            "completed_batches": 0,
+            "failed_batches": job["total_batches"],
+            RESULT_KEYS[job["kind"]]: results,
+            "errors": [{"batch": None, "error": LOST_RESULTS_ERROR}],
+        }
+    for index, child in enumerate(job["children"]):
+        outcome = _batch_outcome(child)
+        if outcome is None:
+            continue
+        completed += 1
+        if outcome["status"] == "done":
+            results.extend(outcome["results"])
+        else:
+            errors.append({"batch": index, "error": outcome["error"]})
+    return {
+        "job_id": job_id,
+        "kind": job["kind"],
+        "status": "done" if completed >= job["total_batches"] else "running",
+        "total_batches": job["total_batches"],
+        "completed_batches": completed,
+        "failed_batches": len(errors),
+        RESULT_KEYS[job["kind"]]: results,
+        "errors": errors,
+    }
+
+
+async def wait_for_job(job_id: str, owner_id: int, timeout: float) -> Dict[str, Any]:
+    """Poll until every batch finished; raise if one failed or time runs out."""
+    deadline = time.monotonic() + timeout
+    poll_seconds = configs["app_config"].WORD_JOB_POLL_SECONDS
+    while True:
+        state = await asyncio.to_thread(job_state, job_id, owner_id)
+        if state is None:
+            raise KeyError(job_id)
+        if state["status"] == "failed":
+            raise JobFailedError(state["errors"][0]["error"])
+        if state["status"] == "done":
+            if state["errors"]:
+                raise JobFailedError(state["errors"][0]["error"])
+            return state
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Job {job_id} did not finish within {timeout:.0f}s")
+        await asyncio.sleep(poll_seconds)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_job_events(job_id: str, job: Dict[str, Any], timeout: float) -> AsyncIterator[str]:
+    """Yield Server-Sent Events as the batches of ``job`` (from ``load_job``) finish.
+
+    Events: ``prefilter`` (preset results), ``batch`` (one finished batch),
+    ``error`` (one failed batch, or the whole job when its results are
+    lost), then ``done`` or ``timeout``.
+    """
+    result_key = RESULT_KEYS[job["kind"]]
+    if job["preset"]:
+        yield _sse("prefilter", {result_key: job["preset"]})
+    if job["lost"]:
+        yield _sse("error", {"batch": None, "error": LOST_RESULTS_ERROR})
+        return
+
+    pending = dict(enumerate(job["children"]))
+    failed = 0
+    poll_seconds = configs["app_config"].WORD_JOB_POLL_SECONDS
+    deadline = time.monotonic() + timeout
+    last_sent = time.monotonic()
+    while pending:
+        finished = await asyncio.to_thread(
+            lambda: {index: _batch_outcome(child) for index, child in pending.items()}
+        )
+        for index, outcome in finished.items():
+            if outcome is None:
+                continue
+            del pending[index]
+            last_sent = time.monotonic()
+            if outcome["status"] == "done":
+                yield _sse("batch", {"batch": index, result_key: outcome["results"]})
+            else:
+                failed += 1
+                yield _sse("error", {"batch": index, "error": outcome["error"]})
+        if not pending:
+            break
+        if time.monotonic() >= deadline:
+            yield _sse("timeout", {"pending_batches": sorted(pending)})
+            return
+        if time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(poll_seconds)
+
+    yield _sse("done", {
+        "job_id": job_id,
+        "total_batches": job["total_batches"],
+        "failed_batches": failed,
+    })
@@ -0,0 +1,131 @@
+"""
+File        : services/word_type.py
+Description : Local "word" vs "phrase" classification of flashcard fronts
+
+Decides from whitespace, punctuation and script rules alone and returns
+None whenever the text could go either way, so callers only ask the LLM
+about the uncertain cases. Script rules:
+
+- Space-separated scripts (Latin, Cyrillic, Hangul, ...): one token is a
+  word, three or more are a phrase, two are a phrase only when the first
+  is a function word (article, pronoun, preposition).
+- Vietnamese separates syllables, not words, with spaces: one syllable is a
+  word, four or more a phrase, anything in between is uncertain.
+- Chinese: one or two characters are a word, five or more a phrase.
+- Japanese: katakana-only text and kanji with trailing okurigana are words;
+  a particle between kanji marks a phrase.
+"""
+
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+# Sentence punctuation, Latin and CJK
+_SENTENCE_PUNCT = re.compile(r"[.!?,;:¡¿。！？，、；：…]")
+# Letters and marks that, among the seeded languages, only Vietnamese uses
+_VIETNAMESE_CHARS = set("ăđơưĂĐƠƯ")
+_VIETNAMESE_MARKS = {"\u0309", "\u0323", "\u031b"}  # hook above, dot below, horn
+_JAPANESE_PARTICLES = set("はがをにでへとものや")
+
+# Function words that cannot start a two-token compound in the seeded
+# languages (English, Spanish, French, German; lower case)
+_FUNCTION_WORDS = {
+    "a", "an", "the", "to", "of", "in", "on", "at", "for", "with", "by", "from", "is", "are",
+    "i", "you", "he", "she", "it", "we", "they", "my", "your", "his", "her", "our", "their",
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "en", "con", "por", "para",
+    "yo", "tú", "él", "ella", "mi", "tu", "su", "es", "muy", "no",
+    "le", "les", "une", "des", "du", "au", "aux", "dans", "sur", "avec", "pour", "je", "il",
+    "elle", "nous", "vous", "ils", "mon", "ton", "son", "ma", "ta", "sa", "est", "très", "ne", "pas",
+    "der", "die", "das", "den", "dem", "ein", "eine", "einen", "mit", "auf", "im", "zu", "ich",
+    "du", "er", "sie", "es", "wir", "ihr", "mein", "dein", "sein", "ist", "nicht", "sehr",
+}
+
+
+def _script(ch: str) -> str:
+    code = ord(ch)
+    if 0x3040 <= code <= 0x309F:
+        return "hiragana"
+    if 0x30A0 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF:
+        return "katakana"
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return "han"
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF:
+        return "hangul"
+    if 0x0E00 <= code <= 0x0EFF or 0x1000 <= code <= 0x109F or 0x1780 <= code <= 0x17FF:
+        return "unspaced"  # Thai, Lao, Myanmar, Khmer: no spaces between words
+    return "spaced"
+
+
+def _is_vietnamese(text: str) -> bool:
+    if any(ch in _VIETNAMESE_CHARS for ch in text):
+        return True
+    return any(ch in _VIETNAMESE_MARKS for ch in unicodedata.normalize("NFD", text))
+
+
+def _classify_cjk(text: str, scripts: set) -> Tuple[Optional[str], str]:
+    if scripts == {"han"}:
+        if len(text) <= 2:
+            return "word", "han<=2"
+        if len(text) >= 5:
+            return "phrase", "han>=5"
+        return None, "han 3-4"
+    if scripts == {"katakana"}:
+        return "word", "katakana"
+    kinds = [_script(ch) for ch in text]
+    # Kanji stem followed only by kana, e.g. 食べる, 美しい
+    if kinds[0] == "han" and "hiragana" in kinds:
+        first_kana = kinds.index("hiragana")
+        stem, tail = kinds[:first_kana], kinds[first_kana:]
+        if all(k == "han" for k in stem) and all(k == "hiragana" for k in tail):
+            return ("word", "kanji+okurigana") if len(text) <= 5 else (None, "long okurigana")
+    # A particle followed by more kanji/katakana: 猫が好き, 日本の首都
+    for i, ch in enumerate(text[1:-1], start=1):
+        if ch in _JAPANESE_PARTICLES and kinds[i - 1] in ("han", "katakana") and kinds[i + 1] in ("han", "katakana"):
+            return "phrase", "particle"
+    if len(text) <= 2:
+        return "word", "cjk<=2"
+    return None, "mixed cjk"
+
+
+def classify_with_reason(text: str) -> Tuple[Optional[str], str]:
+    """Return ("word" | "phrase" | None, rule that decided)."""
+    text = " ".join(unicodedata.normalize("NFC", text).split())
+    if not text:
+        return None, "empty"
+    tokens = text.split(" ")
+    core = text.strip("!?¡¿.…。！？")
+
+    if len(tokens) > 1 and (core != text or _SENTENCE_PUNCT.search(core)):
+        return "phrase", "punctuation"
+
+    scripts = {_script(ch) for ch in core if ch.isalpha()}
+    if not scripts:
+        return None, "no letters"
+    if "unspaced" in scripts:
+        return None, "unspaced script"
+    if scripts & {"han", "hiragana", "katakana"}:
+        if len(tokens) > 1:
+            return "phrase", "spaced cjk"
+        return _classify_cjk(core, scripts - {"spaced"})
+
+    if _is_vietnamese(text):
+        if len(tokens) == 1:
+            return "word", "vi 1 syllable"
+        if len(tokens) >= 4:
+            return "phrase", "vi >=4 syllables"
+        return None, "vi 2-3 syllables"
+
+    if len(tokens) == 1:
+        if core != text or "'" in text or "’" in text:
+            return None, "elision or punctuation"
+        return "word", "single token"
+    if len(tokens) >= 3:
+        return "phrase", ">=3 tokens"
+    if tokens[0].casefold() in _FUNCTION_WORDS:
+        return "phrase", "function word"
+    return None, "two tokens"
+
+
+def classify_word_type(text: str) -> Optional[str]:
+    """Return "word" or "phrase" when the rules are confident, otherwise None."""
+    return classify_with_reason(text)[0]
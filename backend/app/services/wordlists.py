@@ -0,0 +1,208 @@
+"""
+File        : wordlists.py
+Description : Per-language wordlists compiled into memory-mapped Bloom filters
+
+Used to settle obvious cases before word validation reaches the LLM:
+entries found in the language's wordlist are accepted, entries that cannot
+be vocabulary (no letters at all, URLs, e-mail addresses, markup) are
+rejected, and everything else stays ambiguous. Anything uncertain ("and/or",
+"C++", "rock & roll", long idioms) is left for the LLM to judge.
+
+Wordlists are plain text files, one word per line, named after the
+language in lower case (``WORDLIST_DIR/spanish.txt``). The compiled filter
+is written next to it as ``spanish.bloom`` and rebuilt when the text file
+is newer. A Bloom filter has no false negatives; its false positive rate
+(``WORDLIST_BLOOM_FP_RATE``) is the share of non-words that can be accepted
+without asking the LLM.
+
+Build filters ahead of time with ``python -m app.services.wordlists``.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.globals import configs
+
+_MAGIC = b"KLBLOOM1"
+# magic, number of bits, number of hash functions, number of words
+_HEADER = struct.Struct("<8sQQQ")
+
+_URL = re.compile(r"\b[a-z][a-z0-9+.-]*://|\bwww\.\S+\.\S", re.IGNORECASE)
+_EMAIL = re.compile(r"[^\s@]+@[^\s@]+\.[a-z]{2,}", re.IGNORECASE)
+# Tags (<b>, </p>, <!-- -->) and character entities (&amp; &#39;)
+_MARKUP = re.compile(r"<[a-z/!][^>]*>|&(?:[a-z]+|#\d+|#x[0-9a-f]+);", re.IGNORECASE)
+
+
+def normalize_word(word: str) -> str:
+    """Key used for wordlist lookups: NFC, stripped, case-folded."""
+    return unicodedata.normalize("NFC", word).strip().casefold()
+
+
+def is_garbage(word: str) -> bool:
+    """True for entries that cannot be a word or phrase in any language."""
+    word = word.strip()
+    # Numbers ("2024", "3.14") and bare punctuation
+    if not any(ch.isalpha() for ch in word):
+        return True
+    return bool(_URL.search(word) or _EMAIL.search(word) or _MARKUP.search(word))
+
+
+def _positions(key: str, num_bits: int, num_hashes: int) -> Iterable[int]:
+    # Double hashing (Kirsch-Mitzenmacher) over one 128-bit digest
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return ((h1 + i * h2) % num_bits for i in range(num_hashes))
+
+
+class BloomFilter:
+    """Read-only Bloom filter backed by a memory-mapped file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_bits, self.num_hashes, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a wordlist Bloom filter")
+        self.path = path
+
+    def __contains__(self, word: str) -> bool:
+        mm, offset = self._mm, _HEADER.size
+        return all(
+            mm[offset + (pos >> 3)] & (1 << (pos & 7))
+            for pos in _positions(normalize_word(word), self.num_bits, self.num_hashes)
+        )
+
+    def close(self) -> None:
+        self._mm.close()
+
+    @staticmethod
+    def build(words: Iterable[str], path: str, fp_rate: float) -> int:
+        """Write a filter for ``words`` to ``path`` and return the number of words."""
+        keys = {normalize_word(w) for w in words}
+        keys.discard("")
+        n = max(1, len(keys))
+        num_bits = max(64, int(math.ceil(-n * math.log(fp_rate) / (math.log(2) ** 2))))
+        num_hashes = max(1, round(num_bits / n * math.log(2)))
+        bits = bytearray((num_bits + 7) // 8)
+        for key in keys:
+            for pos in _positions(key, num_bits, num_hashes):
+                bits[pos >> 3] |= 1 << (pos & 7)
+
+        # Write to a temporary file first so concurrent readers never see a partial filter
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, num_bits, num_hashes, len(keys)))
+            f.write(bits)
+        os.replace(tmp_path, path)
+        return len(keys)
+
+
+class SeenFilter:
+    """Fixed-size in-memory Bloom filter for dedup of streams of unknown length.
+
+    Memory depends only on ``capacity`` and ``fp_rate``. A false positive
+    drops an entry as a duplicate; past ``capacity`` entries the rate rises.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.num_bits = max(64, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def add(self, key: str) -> bool:
+        """Add ``key``; False if it was (probably) seen before."""
+        new = False
+        for pos in _positions(key, self.num_bits, self.num_hashes):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+                new = True
+        return new
+
+
+_filters: Dict[str, Optional[BloomFilter]] = {}
+_filters_lock = threading.Lock()
+
+
+def _wordlist_path(language: str, suffix: str) -> str:
+    name = re.sub(r"[^a-z0-9_-]", "_", language.strip().lower())
+    return os.path.join(configs["app_config"].WORDLIST_DIR, f"{name}{suffix}")
+
+
+def compile_wordlist(language: str) -> Optional[str]:
+    """(Re)build the filter for ``language`` if its wordlist is newer; return its path."""
+    txt_path = _wordlist_path(language, ".txt")
+    bloom_path = _wordlist_path(language, ".bloom")
+    if not os.path.exists(txt_path):
+        return bloom_path if os.path.exists(bloom_path) else None
+    if os.path.exists(bloom_path) and os.path.getmtime(bloom_path) >= os.path.getmtime(txt_path):
+        return bloom_path
+    with open(txt_path, encoding="utf-8") as f:
+        count = BloomFilter.build(f, bloom_path, configs["app_config"].WORDLIST_BLOOM_FP_RATE)
+    logger.info("Compiled {} wordlist: {} words -> {}", language, count, bloom_path)
+    return bloom_path
+
+
+def get_wordlist(language: str) -> Optional[BloomFilter]:
+    """Return the loaded filter for ``language``, or None if there is no wordlist."""
+    key = language.lower()
+    if key in _filters:
+        return _filters[key]
+    with _filters_lock:
+        if key not in _filters:
+            try:
+                path = compile_wordlist(language)
+                _filters[key] = BloomFilter(path) if path else None
+            except (OSError, ValueError) as e:
+                logger.warning("Wordlist for {} unavailable: {}", language, e)
+                _filters[key] = None
+        return _filters[key]
+
+
+@dataclass
+class PrefilterResult:
+    accepted: List[str] = field(default_factory=list)
+    rejected: List[str] = field(default_factory=list)
+    ambiguous: List[str] = field(default_factory=list)
+
+
+def prefilter_words(words: Iterable[str], language: str) -> PrefilterResult:
+    """Split ``words`` into accepted, rejected and ambiguous (needs the LLM)."""
+    result = PrefilterResult()
+    wordlist = get_wordlist(language) if configs["app_config"].WORDLIST_PREFILTER_ENABLED else None
+    for word in words:
+        word = word.strip()
+        if is_garbage(word):
+            result.rejected.append(word)
+        elif wordlist is not None and word in wordlist:
+            result.accepted.append(word)
+        else:
+            result.ambiguous.append(word)
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.config import get_settings
+
+    configs["app_config"] = get_settings()
+    directory = configs["app_config"].WORDLIST_DIR
+    languages = sys.argv[1:] or [
+        name[:-4] for name in sorted(os.listdir(directory)) if name.endswith(".txt")
+    ]
+    for language in languages:
+        path = compile_wordlist(language)
+        print(f"{language}: {path or 'no wordlist'}")
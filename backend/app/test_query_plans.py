@@ -0,0 +1,239 @@
+"""Query-plan regression tests for the listing endpoints.
+
+Seeds a large dataset into a scratch PostgreSQL database, calls each listing
+endpoint as one user, and runs EXPLAIN on every query the endpoint issued. A
+sequential scan on one of the hot tables fails the test: with this data every
+endpoint reads a small, per-user slice of them, so a scan means an index is
+missing or a filter can no longer use one.
+
+The database is dropped and recreated, so point this at a throwaway one:
+
+    PLAN_TEST_DATABASE_URL=postgresql://postgres:postgres@db:5432/plans pytest app/test_query_plans.py
+"""
+
+import json
+import os
+import re
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+PLAN_TEST_DATABASE_URL = os.getenv("PLAN_TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not PLAN_TEST_DATABASE_URL, reason="PLAN_TEST_DATABASE_URL is not set (needs a scratch PostgreSQL database)"
+)
+
+HOT_TABLES = {
+    "flashcards",
+    "catalogs",
+    "catalog_flashcards",
+    "catalog_shares",
+    "user_catalog_collections",
+    "quizzes",
+    "user_flashcards",
+}
+
+USERS = 2_000
+FLASHCARDS_PER_USER = 100
+CATALOGS_PER_USER = 10
+FLASHCARDS_PER_CATALOG = 10
+PUBLIC_EVERY = 500  # One catalog in 500 is public
+COLLECTORS = 500  # Users 1..COLLECTORS added every public catalog to their collection
+USER_ID = 1
+LANGUAGE_ID = 2  # Language of every flashcard of USER_ID
+
+# Flashcard i (1-based) belongs to user ((i - 1) % USERS) + 1, catalog c likewise
+SEED_SQL = [
+    "INSERT INTO languages (id, name) SELECT g, 'Language ' || g FROM generate_series(1, 5) g",
+    "INSERT INTO quiz_types (id, name, difficulty) VALUES (1, 'Meaning Validation (True/False)', 1)",
+    f"""INSERT INTO users (id, email, username, hashed_password, is_admin, is_active)
+        SELECT g, 'user' || g || '@example.com', 'user' || g, 'x', false, true
+        FROM generate_series(1, {USERS}) g""",
+    f"""INSERT INTO flashcards (id, front, back, language_id, owner_id)
+        SELECT g, 'word ' || g, 'meaning ' || g, (g % 5) + 1, ((g - 1) % {USERS}) + 1
+        FROM generate_series(1, {USERS * FLASHCARDS_PER_USER}) g""",
+    f"""INSERT INTO catalogs (id, name, owner_id, target_language_id, visibility)
+        SELECT g, 'Catalog ' || g, ((g - 1) % {USERS}) + 1, (g % 5) + 1,
+               CASE WHEN g % {PUBLIC_EVERY} = 0 THEN 'PUBLIC' ELSE 'PRIVATE' END::catalogvisibility
+        FROM generate_series(1, {USERS * CATALOGS_PER_USER}) g""",
+    # The k-th flashcard of catalog c is one of its owner's
+    f"""INSERT INTO catalog_flashcards (catalog_id, flashcard_id)
+        SELECT c, ((c - 1) % {USERS}) + 1 + {USERS} * (((c - 1) / {USERS}) * {FLASHCARDS_PER_CATALOG} + k)
+        FROM generate_series(1, {USERS * CATALOGS_PER_USER}) c, generate_series(0, {FLASHCARDS_PER_CATALOG - 1}) k""",
+    f"""INSERT INTO catalog_shares (catalog_id, shared_with_id)
+        SELECT c, ((c * 7) % {USERS}) + 1 FROM generate_series(1, {USERS * CATALOGS_PER_USER // 2}) c""",
+    f"""INSERT INTO user_catalog_collections (user_id, catalog_id)
+        SELECT u, c FROM generate_series(1, {COLLECTORS}) u,
+            generate_series({PUBLIC_EVERY}, {USERS * CATALOGS_PER_USER}, {PUBLIC_EVERY}) c""",
+    """INSERT INTO quizzes (user_id, flashcard_id, language_id, quiz_type_id, content)
+        SELECT owner_id, id, language_id, 1, '{}' FROM flashcards""",
+    """INSERT INTO user_flashcards (user_id, flashcard_id, memory_strength, next_review)
+        SELECT owner_id, id, 0.5, now() + ((id % 30) - 15) * interval '1 day' FROM flashcards""",
+]
+
+ENDPOINTS = [
+    "/api/flashcards/all",
+    "/api/flashcards/stats",
+    "/api/flashcards/collection/count",
+    "/api/flashcards/collection",
+    "/api/flashcards/collection/export?format=jsonl",
+    "/api/catalogs/owned",
+    "/api/catalogs/public",
+    "/api/catalogs/shared",
+    "/api/catalogs/collection",
+    "/api/catalogs/accessible",
+    f"/api/catalogs/accessible-flashcards/{LANGUAGE_ID}",
+    f"/api/catalogs/accessible-by-language/{LANGUAGE_ID}",
+    f"/api/catalogs/{USER_ID}",
+    f"/api/catalogs/{USER_ID}/export?format=csv",
+    "/api/quizzes/history",
+]
+
+
+def _psycopg2_form(statement, parameters):
+    """asyncpg's $n placeholders as psycopg2 %s placeholders, with the parameters in order."""
+    ordered = []
+
+    def _placeholder(match):
+        ordered.append(parameters[int(match.group(1)) - 1])
+        return "%s"
+
+    statement = re.sub(r"\$(\d+)", _placeholder, statement.replace("%", "%%"))
+    return statement, tuple(ordered)
+
+
+def _scans(plan, found):
+    if plan.get("Node Type") == "Seq Scan":
+        found.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        _scans(child, found)
+    return found
+
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+
+    import app.models  # noqa: F401
+    from app.config import get_settings
+    from app.database import Base, get_db
+    from app.dependencies.auth import create_access_token
+    from app.globals import configs
+    from app.main import app
+    from app.services import catalog_export
+
+    configs.setdefault("app_config", get_settings())
+    sync_engine = create_engine(PLAN_TEST_DATABASE_URL, poolclass=NullPool)
+    async_engine = create_async_engine(
+        make_url(PLAN_TEST_DATABASE_URL).set(drivername="postgresql+asyncpg"), poolclass=NullPool
+    )
+
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        for statement in SEED_SQL:
+            conn.execute(text(statement))
+        for table in ("languages", "users", "flashcards", "catalogs", "quizzes"):
+            conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+    with sync_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            if conn.dialect.driver == "asyncpg":
+                statement, parameters = _psycopg2_form(statement, parameters)
+            captured.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", _capture)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _capture)
+
+    async def _get_db():
+        async with AsyncSession(async_engine, autoflush=False, expire_on_commit=False) as db:
+            yield db
+
+    app.dependency_overrides[get_db] = _get_db
+    export_session = catalog_export.SessionLocal
+    catalog_export.SessionLocal = sessionmaker(bind=sync_engine)
+
+    test_client = TestClient(app)
+    test_client.headers["Authorization"] = f"Bearer {create_access_token({'sub': f'user{USER_ID}@example.com'})}"
+    test_client.captured = captured
+    test_client.explain_engine = sync_engine
+    yield test_client
+
+    app.dependency_overrides.pop(get_db, None)
+    catalog_export.SessionLocal = export_session
+
+
+PAGED_ENDPOINTS = [
+    "/api/flashcards/all",
+    "/api/flashcards/collection",
+    "/api/catalogs/public",
+    "/api/catalogs/accessible",
+    "/api/quizzes/history",
+]
+
+
+def _assert_no_seq_scans(client, path):
+    assert client.captured, "no queries captured"
+    with client.explain_engine.connect() as conn:
+        for statement, parameters in client.captured:
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scanned = _scans(plan[0]["Plan"], set()) & HOT_TABLES
+            assert not scanned, f"{path}: sequential scan on {sorted(scanned)} in\n{statement}"
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_endpoint_queries_use_indexes(client, path):
+    client.captured.clear()
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    _assert_no_seq_scans(client, path)
+
+
+def _items(body):
+    return body["quizzes"] if isinstance(body, dict) else body
+
+
+@pytest.mark.parametrize("path", PAGED_ENDPOINTS)
+def test_next_page_uses_indexes(client, path):
+    first = client.get(path, params={"limit": 20, "include_total": "true"})
+    assert first.status_code == 200, first.text
+    assert int(first.headers["X-Total-Estimate"]) > 0
+    cursor = first.headers["X-Next-Cursor"]
+
+    client.captured.clear()
+    second = client.get(path, params={"limit": 20, "cursor": cursor})
+    assert second.status_code == 200, second.text
+    _assert_no_seq_scans(client, path)
+
+    ids = [item["id"] for item in _items(first.json()) + _items(second.json())]
+    assert len(ids) == 40
+    assert ids == sorted(ids, reverse=path.endswith("/history"))
+    assert len(set(ids)) == 40
+
+
+@pytest.mark.parametrize("path", [
+    "/api/catalogs/owned",
+    "/api/catalogs/public",
+    "/api/catalogs/shared",
+    "/api/catalogs/collection",
+    "/api/catalogs/accessible",
+    f"/api/catalogs/accessible-by-language/{LANGUAGE_ID}",
+])
+def test_catalog_listing_is_one_query(client, path):
+    client.captured.clear()
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert response.json(), "empty listing"
+    # One query loads the current user, one the listing
+    assert len(client.captured) == 2, [statement for statement, _ in client.captured]
@@ -0,0 +1,58 @@
+"""Indexes for the hot lookup paths
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-10-20
+
+First revision: the tables themselves were created by init_db.py
+(``Base.metadata.create_all``), so this only adds what create_all cannot add
+to existing tables. Indexes are built CONCURRENTLY on PostgreSQL, so the
+upgrade does not lock writes, and with IF NOT EXISTS, so it is a no-op on a
+database created from the current models.
+
+Duplicate (catalog_id, flashcard_id) rows are removed before the unique
+index on catalog_flashcards is built; the oldest row is kept.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns, unique
+INDEXES = [
+    ('ix_catalogs_owner_id', 'catalogs', ['owner_id'], False),
+    ('ix_catalogs_visibility', 'catalogs', ['visibility'], False),
+    ('uq_catalog_flashcards_catalog_flashcard', 'catalog_flashcards', ['catalog_id', 'flashcard_id'], True),
+    ('ix_catalog_flashcards_flashcard_id', 'catalog_flashcards', ['flashcard_id'], False),
+    ('ix_flashcards_owner_language_front', 'flashcards', ['owner_id', 'language_id', 'front'], False),
+    ('ix_quizzes_user_flashcard', 'quizzes', ['user_id', 'flashcard_id'], False),
+    ('ix_quizzes_flashcard_id', 'quizzes', ['flashcard_id'], False),
+    ('ix_flashcard_shares_shared_with_id', 'flashcard_shares', ['shared_with_id'], False),
+    ('ix_catalog_shares_shared_with_id', 'catalog_shares', ['shared_with_id'], False),
+    ('ix_user_flashcards_user_next_review', 'user_flashcards', ['user_id', 'next_review'], False),
+    ('ix_user_flashcards_flashcard_id', 'user_flashcards', ['flashcard_id'], False),
+]
+
+
+def upgrade() -> None:
+    op.execute(sa.text(
+        "DELETE FROM catalog_flashcards WHERE id NOT IN ("
+        "SELECT MIN(id) FROM catalog_flashcards GROUP BY catalog_id, flashcard_id)"
+    ))
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
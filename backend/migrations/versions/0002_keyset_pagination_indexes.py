@@ -0,0 +1,45 @@
+"""Indexes for keyset pagination
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-10-27
+
+List endpoints page through rows in id order within one owner (or one
+visibility), which needs the id as the second index column.
+ix_catalogs_visibility_id replaces ix_catalogs_visibility, of which it is a
+superset.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns
+INDEXES = [
+    ('ix_flashcards_owner_id_id', 'flashcards', ['owner_id', 'id']),
+    ('ix_catalogs_visibility_id', 'catalogs', ['visibility', 'id']),
+    ('ix_quizzes_user_id_id', 'quizzes', ['user_id', 'id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        op.drop_index('ix_catalogs_visibility', table_name='catalogs', if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_catalogs_visibility', 'catalogs', ['visibility'], if_not_exists=True, postgresql_concurrently=True
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -26,13 +26,15 @@ export function CatalogList() {
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [currentView, setCurrentView] = useState<ViewType>('owned');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   useEffect(() => {
     fetchCatalogs();
   }, [currentView]);
 
-  const fetchCatalogs = async () => {
-    setLoading(true);
+  // Without a cursor, (re)load the first page; with one, append the next page
+  const fetchCatalogs = async (cursor?: string) => {
+    if (!cursor) setLoading(true);
     try {
       let endpoint;
       switch (currentView) {
@@ -51,8 +53,10 @@ export function CatalogList() {
         default:
           endpoint = '/api/catalogs/owned';
       }
-      const response = await axios.get(endpoint);
-      setCatalogs(response.data);
+      const response = await axios.get(endpoint, { params: { cursor } });
+      setCatalogs(cursor ? (prev) => [...prev, ...response.data] : response.data);
+      // Only the public listing is paginated
+      setNextCursor(response.headers['x-next-cursor'] ?? null);
     } catch (err) {
       setError('Failed to load catalogs');
     } finally {
@@ -242,6 +246,17 @@ export function CatalogList() {
             </div>
           ))}
 
+          {nextCursor && (
+            <div className="col-span-full flex justify-center">
+              <button
+                onClick={() => fetchCatalogs(nextCursor)}
+                className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200"
+              >
+                Load more
+              </button>
+            </div>
+          )}
+
           {catalogs.length === 0 && !error && (
             <div className="col-span-full text-center py-12 bg-gray-50 rounded-lg">
               <Book className="mx-auto h-12 w-12 text-gray-400" />
@@ -20,11 +20,14 @@ export function CollectionFlashcards() {
   const [error, setError] = useState<string | null>(null);
   const [selectedCards, setSelectedCards] = useState<Set<number>>(new Set());
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  const fetchFlashcards = async () => {
+  // Without a cursor, (re)load the first page; with one, append the next page
+  const fetchFlashcards = async (cursor?: string) => {
     try {
-      const response = await axios.get('/api/flashcards/collection');
-      setFlashcards(response.data);
+      const response = await axios.get('/api/flashcards/collection', { params: { cursor } });
+      setFlashcards(cursor ? (prev) => [...prev, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] ?? null);
     } catch (err) {
       setError('Failed to load flashcards');
     } finally {
@@ -169,6 +172,16 @@ export function CollectionFlashcards() {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="flex justify-center mt-4">
+                <button
+                  onClick={() => fetchFlashcards(nextCursor)}
+                  className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200"
+                >
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -8,18 +8,20 @@ export function FlashcardTable(): JSX.Element {
   const [error, setError] = useState<string | null>(null);
   const [showOnlyOwned, setShowOnlyOwned] = useState(false);
   const [selectedCards, setSelectedCards] = useState<Set<string>>(new Set());
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   useEffect(() => {
     fetchFlashcards();
   }, []);
 
-  const fetchFlashcards = async (): Promise<void> => {
+  // Without a cursor, (re)load the first page; with one, append the next page
+  const fetchFlashcards = async (cursor?: string): Promise<void> => {
     try {
-      const response = await axios.get('/api/flashcards/all');
-      if (Array.isArray(response.data)) {
-        setFlashcards(response.data);
-      } else if (Array.isArray(response.data.flashcards)) {
-        setFlashcards(response.data.flashcards);
+      const response = await axios.get('/api/flashcards/all', { params: { cursor } });
+      const page = Array.isArray(response.data) ? response.data : response.data.flashcards;
+      if (Array.isArray(page)) {
+        setFlashcards(cursor ? (prev) => [...prev, ...page] : page);
+        setNextCursor(response.headers['x-next-cursor'] ?? null);
       } else {
         setError('Invalid response format');
       }
@@ -130,6 +132,16 @@ export function FlashcardTable(): JSX.Element {
           </tbody>
         </table>
       </div>
+      {nextCursor && (
+        <div className="flex justify-center mt-4">
+          <button
+            onClick={() => fetchFlashcards(nextCursor)}
+            className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200"
+          >
+            Load more
+          </button>
+        </div>
+      )}
       {error && <p className="text-red-500 text-sm mt-4">{error}</p>}
     </div>
   );
@@ -27,6 +27,7 @@ interface ImportStatus {
   status: 'processing' | 'completed';
   progress: number;
   message: string;
+  skipped_words?: string[];
 }
 
 export function ImportWords(): JSX.Element {
@@ -85,7 +86,8 @@ export function ImportWords(): JSX.Element {
     const pollStatus = async () => {
       try {
         const response = await axios.get(`/api/words/import/${taskId}/status`);
-        setImportStatus(response.data);
+        // The status endpoint does not repeat the words skipped as duplicates
+        setImportStatus(prev => ({ ...response.data, skipped_words: prev?.skipped_words }));
         
         if (response.data.status === 'completed') {
           const event = new CustomEvent('wordImportSuccess', {
@@ -171,8 +173,18 @@ export function ImportWords(): JSX.Element {
         setImportStatus({
           status: 'processing',
           progress: 0,
-          message: response.data.message
+          message: response.data.message,
+          skipped_words: response.data.skipped_words
         });
+      } else if (response.data.status === 'completed') {
+        // Every word was skipped as a duplicate: there is no job to poll
+        setImportStatus({
+          status: 'completed',
+          progress: 100,
+          message: response.data.message,
+          skipped_words: response.data.skipped_words
+        });
+        setImporting(false);
       }
     } catch (err) {
       const error = err as AxiosError<ApiError>;
@@ -387,8 +399,32 @@ export function ImportWords(): JSX.Element {
                   ></div>
                 </div>
                 <p className="text-gray-600">{importStatus.message}</p>
+                {importStatus.skipped_words && importStatus.skipped_words.length > 0 && (
+                  <div>
+                    <p className="text-sm text-gray-600">
+                      Skipped {importStatus.skipped_words.length} duplicate word{importStatus.skipped_words.length === 1 ? '' : 's'}:
+                    </p>
+                    <p className="text-sm text-gray-500">{importStatus.skipped_words.join(', ')}</p>
+                  </div>
+                )}
               </div>
             </div>
+            {importStatus.status === 'completed' && !taskId && (
+              <div className="flex justify-end space-x-4">
+                <button
+                  onClick={() => setStep('preview')}
+                  className="px-4 py-2 border border-gray-300 rounded-md shadow-sm text-sm font-medium text-gray-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500"
+                >
+                  Back
+                </button>
+                <button
+                  onClick={() => navigate('/dashboard')}
+                  className="px-6 py-2 border border-transparent rounded-md shadow-sm text-sm font-medium text-white bg-indigo-600 hover:bg-indigo-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500"
+                >
+                  Go to Dashboard
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -15,10 +15,13 @@ export function UserManager() {
   const [users, setUsers] = useState<User[]>([]);
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  const fetchUsers = async () => {
+  // Without a cursor, (re)load the first page; with one, append the next page
+  const fetchUsers = async (cursor?: string) => {
     try {
-      const response = await fetch('/auth/users', {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`/auth/users${query}`, {
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('token')}`
         }
@@ -29,7 +32,8 @@ export function UserManager() {
       }
 
       const data = await response.json();
-      setUsers(data);
+      setUsers(cursor ? (prev) => [...prev, ...data] : data);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (err) {
       setError('Failed to load users');
     } finally {
@@ -135,6 +139,16 @@ export function UserManager() {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="flex justify-center py-4">
+              <button
+                onClick={() => fetchUsers(nextCursor)}
+                className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
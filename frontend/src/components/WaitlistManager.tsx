@@ -17,10 +17,13 @@ export function WaitlistManager() {
   const [entries, setEntries] = useState<WaitlistEntry[]>([]);
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  const fetchWaitlist = async () => {
+  // Without a cursor, (re)load the first page; with one, append the next page
+  const fetchWaitlist = async (cursor?: string) => {
     try {
-      const response = await fetch('/auth/waitlist', {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`/auth/waitlist${query}`, {
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('token')}`
         }
@@ -31,7 +34,8 @@ export function WaitlistManager() {
       }
 
       const data = await response.json();
-      setEntries(data);
+      setEntries(cursor ? (prev) => [...prev, ...data] : data);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (err) {
       setError('Failed to load waitlist entries');
     } finally {
@@ -169,6 +173,16 @@ export function WaitlistManager() {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="flex justify-center py-4">
+              <button
+                onClick={() => fetchWaitlist(nextCursor)}
+                className="px-4 py-2 rounded-lg bg-gray-100 text-gray-700 hover:bg-gray-200"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>